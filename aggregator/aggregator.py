@@ -3,9 +3,23 @@ Main orchestrator script that coordinates fetching, parsing, and storing data fr
 """
 
 import logging
-from typing import Dict, List
 import time
-from .database.db_utils import DatabaseManager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .change_detector import ChangeDetector
+from .config import METRICS_CONFIG, PARSE_CONFIG, PIPELINE_CONFIG
+from .database.db_utils import DatabaseManager, HISTORY_TABLES
+from .delta_feed import DeltaFeed
+from .models import Event, Market
+from .odds_history import OddsHistoryRecorder
+from .parse_pool import ParsePool
+from .polling import AdaptivePoller
+from .prematch_tracker import PrematchTracker
+from .scheduler import PipelineScheduler
+from .streaming import stream_complete
+# Top-level, like the fetchers and database module, so they share one registry
+from metrics import (
+    PIPELINE_CHANGES, PIPELINE_CYCLES, PIPELINE_EVENTS, mark_odds_updated, stage_timer, start_http_server
+)
 
 # Tennis imports
 from .sports.tennis.tennis_parser import TennisParser
@@ -35,6 +49,12 @@ logger = logging.getLogger(__name__)
 class SportsAggregator:
     def __init__(self):
         self.db = DatabaseManager()
+        self.change_detector = ChangeDetector()
+        self.odds_history = OddsHistoryRecorder(self.db)
+        self.delta_feed = DeltaFeed()
+        self.parse_pool = ParsePool() if PARSE_CONFIG["workers"] > 0 else None
+        # {(sport, provider): (fetched at, parsed events)} of the last complete in-play event lists
+        self._event_lists: Dict[Tuple[str, str], Tuple[float, List[Event]]] = {}
         
         # Tennis components
         self.tennis_parser = TennisParser()
@@ -43,110 +63,280 @@ class SportsAggregator:
         self.tennis_rapid_odds = TennisRapidOddsFetcher()
         self.tennis_betsapi_events = TennisBetsAPIEventsFetcher()
         self.tennis_betsapi_odds = TennisBetsAPIOddsFetcher()
+        self.tennis_rapid_polling = AdaptivePoller("tennis", "bet365")
+        self.tennis_betsapi_polling = AdaptivePoller("tennis", "betsapi")
         
         # Soccer components
         self.soccer_parser = SoccerParser()
         self.soccer_merger = SoccerMerger()
         self.soccer_events = SoccerInplayEventsFetcher()
         self.soccer_odds = SoccerInplayOddsFetcher()
+        self.soccer_polling = AdaptivePoller("soccer", "bet365")
         self.soccer_prematch = SoccerPrematchFetcher()
+        self.soccer_upcoming = PrematchTracker("soccer", self.soccer_prematch, self.soccer_parser, self.db)
         
         # Basketball components
         self.basketball_parser = BasketballParser()
         self.basketball_merger = BasketballMerger()
         self.basketball_events = BasketballInplayEventsFetcher()
         self.basketball_odds = BasketballInplayOddsFetcher()
+        self.basketball_polling = AdaptivePoller("basketball", "bet365")
         self.basketball_prematch = BasketballPrematchFetcher()
+        self.basketball_upcoming = PrematchTracker("basketball", self.basketball_prematch, self.basketball_parser, self.db)
+
+    def store_changes(self, sport: str, merged_data: List[Event], partial: bool = False):
+        """Write new or changed matches with their versioned delta and record price movements"""
+        changes = self.change_detector.detect(sport, merged_data, partial)
+        delta, odds_state = self.delta_feed.build(changes)
+        # No later than the rows' NOW() timestamps
+        stored_at = time.time()
+        if self.db.store_sport_data(sport, changes.to_write, delta):
+            self.change_detector.commit(changes)
+            self.delta_feed.commit(sport, odds_state)
+            self.odds_history.record(changes)
+            for kind, count in changes.stats().items():
+                PIPELINE_CHANGES.labels(sport, kind).inc(count)
+            if any(match["odds"] for match in changes.to_write):
+                # Unchanged matches were not rewritten, so their stored odds stay as old as they were
+                mark_odds_updated(sport, stored_at)
 
     def aggregate_tennis_data(self):
         """Fetch, parse, and store tennis data"""
         try:
-            # 1. Fetch events and odds from Rapid API
-            rapid_events = self.tennis_rapid_events.fetch_events()
-            rapid_odds = self.tennis_rapid_odds.fetch_odds()
+            # 1. Stream Rapid API events into the parser (reading the body
+            # counts as parsing), then fetch their odds
+            rapid_events = self.event_list(
+                self.tennis_rapid_polling, self.tennis_rapid_events.fetch_events, self.tennis_parser.parse_events
+            )
+            parsed_rapid_events = rapid_events[0] if rapid_events is not None else []
+            rapid_due = self.tennis_rapid_polling.due([event.match_id for event in parsed_rapid_events])
+            rapid_fresh = self.fetch_odds(
+                "tennis", "bet365", self.tennis_rapid_odds, self.tennis_parser, rapid_due, "bet365_tennis"
+            )
             
             # 2. Fetch events and odds from BetsAPI
-            betsapi_events = self.tennis_betsapi_events.fetch_events()
-            if betsapi_events:
-                event_ids = [event.get("id") for event in betsapi_events]
-                betsapi_odds = self.tennis_betsapi_odds.fetch_odds_for_matches(event_ids)
-            else:
-                betsapi_odds = {}
-
-            # 3. Parse the raw data
-            parsed_rapid_events = self.tennis_parser.parse_events(rapid_events) if rapid_events else []
-            parsed_rapid_odds = self.tennis_parser.parse_odds(rapid_odds) if rapid_odds else {}
-            parsed_betsapi_events = self.tennis_parser.parse_events(betsapi_events) if betsapi_events else []
-            parsed_betsapi_odds = self.tennis_parser.parse_odds(betsapi_odds) if betsapi_odds else {}
-
-            # 4. Merge data
-            rapid_merged = self.tennis_merger.merge_events_and_odds(parsed_rapid_events, parsed_rapid_odds)
-            betsapi_merged = self.tennis_merger.merge_events_and_odds(parsed_betsapi_events, parsed_betsapi_odds)
+            betsapi_events = self.event_list(
+                self.tennis_betsapi_polling, self.tennis_betsapi_events.fetch_events, self.tennis_parser.parse_betsapi_events
+            )
+            if rapid_events is None and betsapi_events is None:
+                # An empty store would mark every tracked match as removed
+                logger.warning("Skipping tennis cycle: no provider returned events")
+                PIPELINE_CYCLES.labels("tennis", "skipped").inc()
+                return
+            # A list cut short by a bad body still counts; its missing matches are kept
+            partial = rapid_events is not None and not rapid_events[1]
+            parsed_betsapi_events = betsapi_events[0] if betsapi_events is not None else []
+            betsapi_due = self.tennis_betsapi_polling.due([event.match_id for event in parsed_betsapi_events])
+            betsapi_fresh = self.fetch_odds(
+                "tennis", "betsapi", self.tennis_betsapi_odds, self.tennis_parser, betsapi_due, "betsapi"
+            )
+            PIPELINE_EVENTS.labels("tennis", "bet365").observe(len(parsed_rapid_events))
+            PIPELINE_EVENTS.labels("tennis", "betsapi").observe(len(parsed_betsapi_events))
+
+            # 3. Merge fresh odds (or the last known ones for matches not
+            # polled) into each provider's events, then resolve matches both
+            # providers report into one with the best prices
+            with stage_timer("tennis", "merge"):
+                rapid_markets = self.tennis_rapid_polling.update(parsed_rapid_events, rapid_fresh)
+                betsapi_markets = self.tennis_betsapi_polling.update(parsed_betsapi_events, betsapi_fresh)
+                rapid_merged = self.tennis_merger.merge_events_and_odds(parsed_rapid_events, rapid_markets)
+                betsapi_merged = self.tennis_merger.merge_events_and_odds(parsed_betsapi_events, betsapi_markets)
+                merged_data = self.tennis_merger.merge_providers(rapid_merged, betsapi_merged)
             
-            # 5. Store in database
-            self.db.store_tennis_data(rapid_merged + betsapi_merged)
+            # 4. Store new or changed matches in database
+            with stage_timer("tennis", "store"):
+                self.store_changes("tennis", merged_data, partial=partial)
             
-            logger.info(f"Successfully aggregated tennis data: {len(rapid_merged)} Rapid API events, {len(betsapi_merged)} BetsAPI events")
+            PIPELINE_CYCLES.labels("tennis", "ok").inc()
+            logger.info(
+                f"Successfully aggregated tennis data: {len(merged_data)} matches from "
+                f"{len(rapid_merged)} Rapid API and {len(betsapi_merged)} BetsAPI events"
+            )
         except Exception as e:
+            PIPELINE_CYCLES.labels("tennis", "error").inc()
             logger.error(f"Error aggregating tennis data: {str(e)}")
 
+    def fetch_odds(self, sport: str, provider: str, fetcher, parser, match_ids: List[str],
+                   schema: str) -> Dict[str, Dict[str, Market]]:
+        """{match_id: markets} of the given matches; parsed in the parse pool if there is one"""
+        if self.parse_pool is not None:
+            # Parsing overlaps fetching, so both are timed as fetch_odds
+            with stage_timer(sport, "fetch_odds"):
+                return self.parse_pool.fetch_odds(sport, provider, fetcher, match_ids, schema)
+        with stage_timer(sport, "fetch_odds"):
+            odds = fetcher.fetch_odds_for_matches(match_ids)
+        with stage_timer(sport, "parse"):
+            return parser.parse_odds_batch(odds, provider=schema).markets
+
+    def event_list(self, poller: AdaptivePoller, fetch: Callable[[], Optional[Iterable[Dict]]],
+                   parse: Callable[[Iterable[Dict]], List[Event]]) -> Optional[Tuple[List[Event], bool]]:
+        """(the in-play events a poller polls odds for, whether the list is complete), None if it could not be fetched.
+
+        The list is fetched at most every poller.events_interval, the part of
+        the budget the poller leaves it; the ticks in between get copies of
+        the last complete one, which the mergers can change in place. A failed
+        or cut-short fetch is retried next tick.
+        """
+        sport, name = poller.sport, (poller.sport, poller.provider)
+        now = poller.clock()
+        cached = self._event_lists.get(name)
+        if cached is not None and now - cached[0] < poller.events_interval:
+            return [event.copy() for event in cached[1]], True
+        # Streamed lists go straight into the parser (reading the body
+        # counts as parsing)
+        with stage_timer(sport, "fetch_events"):
+            events = fetch()
+        if events is None:
+            return None
+        with stage_timer(sport, "parse"):
+            parsed_events = parse(events)
+        if not stream_complete(events):
+            return parsed_events, False
+        self._event_lists[name] = (now, parsed_events)
+        return [event.copy() for event in parsed_events], True
+
+    def inplay_events(self, poller: AdaptivePoller, fetcher, parser) -> Optional[Tuple[List[Event], bool]]:
+        """(a sport's in-play events, whether the list is complete), None if it could not be fetched"""
+        return self.event_list(poller, fetcher.fetch_events, parser.parse_events)
+
     def aggregate_soccer_data(self):
         """Fetch, parse, and store soccer data"""
         try:
-            # 1. Fetch events and odds
-            events = self.soccer_events.fetch_events()
-            if events:
-                event_ids = [event.get("id") for event in events]
-                odds = self.soccer_odds.fetch_odds_for_matches(event_ids)
-            else:
-                odds = {}
-
-            # 2. Parse the raw data
-            parsed_events = self.soccer_parser.parse_events(events) if events else []
-            parsed_odds = self.soccer_parser.parse_odds(odds) if odds else {}
-
-            # 3. Merge data
-            merged_data = self.soccer_merger.merge_events_and_odds(parsed_events, parsed_odds)
-
-            # 4. Store in database
-            self.db.store_soccer_data(merged_data)
+            # 1. Fetch and parse the in-play events
+            inplay = self.inplay_events(self.soccer_polling, self.soccer_events, self.soccer_parser)
+            if inplay is None:
+                # An empty store would mark every tracked match as removed
+                logger.warning("Skipping soccer cycle: no events available")
+                PIPELINE_CYCLES.labels("soccer", "skipped").inc()
+                return
+            parsed_events, complete = inplay
+            PIPELINE_EVENTS.labels("soccer", "bet365").observe(len(parsed_events))
+            match_ids = [event.match_id for event in parsed_events]
+            # Fixtures that just went in-play start with their prematch odds
+            self.soccer_polling.seed(self.soccer_upcoming.handover(match_ids))
+
+            # 2. Fetch and parse odds for the matches due a refresh
+            due = self.soccer_polling.due(match_ids)
+            fresh = self.fetch_odds("soccer", "bet365", self.soccer_odds, self.soccer_parser, due, "bet365")
+
+            # 3. Merge fresh odds, and the last known ones for matches not polled
+            with stage_timer("soccer", "merge"):
+                markets = self.soccer_polling.update(parsed_events, fresh)
+                merged_data = self.soccer_merger.merge_events_and_odds(parsed_events, markets)
+
+            # 4. Store new or changed matches in database
+            with stage_timer("soccer", "store"):
+                self.store_changes("soccer", merged_data, partial=not complete)
             
+            PIPELINE_CYCLES.labels("soccer", "ok").inc()
             logger.info(f"Successfully aggregated soccer data: {len(merged_data)} events")
         except Exception as e:
+            PIPELINE_CYCLES.labels("soccer", "error").inc()
             logger.error(f"Error aggregating soccer data: {str(e)}")
 
     def aggregate_basketball_data(self):
         """Fetch, parse, and store basketball data"""
         try:
-            # 1. Fetch events and odds
-            events = self.basketball_events.fetch_events()
-            if events:
-                event_ids = [event.get("id") for event in events]
-                odds = self.basketball_odds.fetch_odds_for_matches(event_ids)
-            else:
-                odds = {}
-
-            # 2. Parse the raw data
-            parsed_events = self.basketball_parser.parse_events(events) if events else []
-            parsed_odds = self.basketball_parser.parse_odds(odds) if odds else {}
-
-            # 3. Merge data
-            merged_data = self.basketball_merger.merge_events_and_odds(parsed_events, parsed_odds)
-
-            # 4. Store in database
-            self.db.store_basketball_data(merged_data)
+            # 1. Fetch and parse the in-play events
+            inplay = self.inplay_events(self.basketball_polling, self.basketball_events, self.basketball_parser)
+            if inplay is None:
+                # An empty store would mark every tracked match as removed
+                logger.warning("Skipping basketball cycle: no events available")
+                PIPELINE_CYCLES.labels("basketball", "skipped").inc()
+                return
+            parsed_events, complete = inplay
+            PIPELINE_EVENTS.labels("basketball", "bet365").observe(len(parsed_events))
+            match_ids = [event.match_id for event in parsed_events]
+            # Fixtures that just went in-play start with their prematch odds
+            self.basketball_polling.seed(self.basketball_upcoming.handover(match_ids))
+
+            # 2. Fetch and parse odds for the matches due a refresh
+            due = self.basketball_polling.due(match_ids)
+            fresh = self.fetch_odds("basketball", "bet365", self.basketball_odds, self.basketball_parser, due, "bet365")
+
+            # 3. Merge fresh odds, and the last known ones for matches not polled
+            with stage_timer("basketball", "merge"):
+                markets = self.basketball_polling.update(parsed_events, fresh)
+                merged_data = self.basketball_merger.merge_events_and_odds(parsed_events, markets)
+
+            # 4. Store new or changed matches in database
+            with stage_timer("basketball", "store"):
+                self.store_changes("basketball", merged_data, partial=not complete)
             
+            PIPELINE_CYCLES.labels("basketball", "ok").inc()
             logger.info(f"Successfully aggregated basketball data: {len(merged_data)} events")
         except Exception as e:
+            PIPELINE_CYCLES.labels("basketball", "error").inc()
             logger.error(f"Error aggregating basketball data: {str(e)}")
 
+    def aggregate_prematch_data(self):
+        """Refresh upcoming fixtures and the prematch odds that are due"""
+        for tracker in (self.soccer_upcoming, self.basketball_upcoming):
+            try:
+                tracker.refresh()
+                PIPELINE_CYCLES.labels(f"{tracker.sport}_prematch", "ok").inc()
+            except Exception as e:
+                PIPELINE_CYCLES.labels(f"{tracker.sport}_prematch", "error").inc()
+                logger.error(f"Error aggregating {tracker.sport} prematch data: {str(e)}")
+
+    @property
+    def pollers(self) -> List[AdaptivePoller]:
+        return [self.tennis_rapid_polling, self.tennis_betsapi_polling, self.soccer_polling, self.basketball_polling]
+
+    def maintain_history(self):
+        """Create upcoming history partitions, drop expired ones and prune old deltas"""
+        for sport in HISTORY_TABLES:
+            try:
+                self.db.ensure_history_partitions(sport)
+                self.db.drop_expired_history_partitions(sport)
+            except Exception as e:
+                logger.error(f"Error maintaining {sport} history partitions: {str(e)}")
+        try:
+            self.db.prune_odds_changes()
+        except Exception as e:
+            logger.error(f"Error pruning odds changes: {str(e)}")
+
+    def prepare(self):
+        """Make sure the schema and history partitions exist before the first cycle"""
+        try:
+            self.db.init_schema()
+        except Exception as e:
+            logger.error(f"Error initialising database schema: {str(e)}")
+        self.maintain_history()
+
+    def pipelines(self) -> Dict[str, Callable[[], None]]:
+        """Scheduled jobs by PIPELINE_CONFIG name"""
+        return {
+            "tennis": self.aggregate_tennis_data,
+            "soccer": self.aggregate_soccer_data,
+            "basketball": self.aggregate_basketball_data,
+            "prematch": self.aggregate_prematch_data,
+            "maintenance": self.maintain_history
+        }
+
+    def build_scheduler(self, time_scale: float = 1.0) -> PipelineScheduler:
+        """One pipeline per sport plus maintenance; time_scale > 1 runs them proportionally faster"""
+        scheduler = PipelineScheduler()
+        for sport, job in self.pipelines().items():
+            schedule = PIPELINE_CONFIG[sport]
+            scheduler.add(sport, job, schedule["interval"] / time_scale, schedule["deadline"] / time_scale)
+        return scheduler
+
     def run(self):
-        """Main loop to continuously aggregate sports data"""
-        while True:
-            self.aggregate_tennis_data()
-            self.aggregate_soccer_data()
-            self.aggregate_basketball_data()
-            time.sleep(60)  # Update every minute
+        """Run every sport as an independent pipeline on its own schedule"""
+        if METRICS_CONFIG["aggregator_port"]:
+            start_http_server(METRICS_CONFIG["aggregator_port"])
+        self.prepare()
+        scheduler = self.build_scheduler()
+        scheduler.start()
+        try:
+            scheduler.join()
+        except KeyboardInterrupt:
+            scheduler.stop()
+            scheduler.join()
+        finally:
+            if self.parse_pool is not None:
+                self.parse_pool.close()
 
 if __name__ == "__main__":
     aggregator = SportsAggregator()
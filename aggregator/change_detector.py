@@ -0,0 +1,117 @@
+"""
+Content-hash change detection between the mergers and the database.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import CHANGE_DETECTION_CONFIG
+from models import Event
+
+logger = logging.getLogger(__name__)
+
+def content_hash(event: Event) -> str:
+    """Stable digest of a merged event's full content"""
+    return hashlib.blake2b(repr(event.content_key()).encode(), digest_size=16).hexdigest()
+
+class ChangeSet:
+    """One cycle's merged matches split into what needs writing and what does not"""
+
+    def __init__(self, sport: str):
+        self.sport = sport
+        self.new: List[Dict] = []
+        self.changed: List[Dict] = []
+        self.heartbeat: List[Dict] = []
+        self.unchanged = 0
+        self.removed: List[str] = []
+        self.hashes: Dict[str, str] = {}
+
+    @property
+    def to_write(self) -> List[Dict]:
+        return self.new + self.changed + self.heartbeat
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "new": len(self.new),
+            "changed": len(self.changed),
+            "unchanged": self.unchanged,
+            "heartbeat": len(self.heartbeat),
+            "removed": len(self.removed)
+        }
+
+class ChangeDetector:
+    """Remembers a content hash per match_id so unchanged matches are not rewritten"""
+
+    def __init__(self, heartbeat_interval: float = None):
+        if heartbeat_interval is None:
+            heartbeat_interval = CHANGE_DETECTION_CONFIG["heartbeat_interval"]
+        self.heartbeat_interval = heartbeat_interval
+        self._seen: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        self._lock = threading.Lock()
+        self.last_stats: Dict[str, Dict[str, int]] = {}
+
+    def detect(self, sport: str, events: List[Event], partial: bool = False) -> ChangeSet:
+        """Classify this cycle's events as new, changed, unchanged or due a heartbeat.
+
+        Only events that need writing are serialized into the ChangeSet's rows.
+        With partial, events is known to be an incomplete list: matches
+        missing from it are kept as they were rather than reported removed.
+        """
+        changes = ChangeSet(sport)
+        now = time.time()
+        with self._lock:
+            seen = dict(self._seen.get(sport, {}))
+
+        for event in events:
+            match_id = event.match_id
+            digest = content_hash(event)
+            changes.hashes[match_id] = digest
+
+            previous = seen.get(match_id)
+            if previous is None:
+                changes.new.append(event.to_dict())
+            elif previous[0] != digest:
+                changes.changed.append(event.to_dict())
+            elif self.heartbeat_interval and now - previous[1] >= self.heartbeat_interval:
+                changes.heartbeat.append(event.to_dict())
+            else:
+                changes.unchanged += 1
+
+        missing = [match_id for match_id in seen if match_id not in changes.hashes]
+        if partial:
+            for match_id in missing:
+                changes.hashes[match_id] = seen[match_id][0]
+        else:
+            changes.removed = missing
+        self.last_stats[sport] = changes.stats()
+        logger.info(
+            f"{sport} changes: {len(changes.new)} new, {len(changes.changed)} changed, "
+            f"{changes.unchanged} unchanged, {len(changes.heartbeat)} heartbeat, {len(changes.removed)} removed"
+        )
+        return changes
+
+    def commit(self, changes: ChangeSet):
+        """Record a ChangeSet as written; call only after the store succeeded"""
+        now = time.time()
+        with self._lock:
+            previous = self._seen.get(changes.sport, {})
+            written = {match.get("match_id") for match in changes.to_write}
+            # Matches missing from this cycle are dropped so finished ones
+            # do not accumulate
+            self._seen[changes.sport] = {
+                match_id: (digest, now if match_id in written else previous.get(match_id, (None, now))[1])
+                for match_id, digest in changes.hashes.items()
+            }
+
+    def forget(self, sport: str, match_ids: Optional[Iterable[str]] = None):
+        """Drop matches (all of the sport's if None) without reporting them removed, e.g. when another process took them over"""
+        with self._lock:
+            if match_ids is None:
+                self._seen.pop(sport, None)
+                return
+            seen = self._seen.get(sport)
+            if seen:
+                for match_id in match_ids:
+                    seen.pop(match_id, None)
@@ -24,7 +24,21 @@ DB_CONFIG = {
     "host": os.getenv("DB_HOST", "localhost"),
     "database": os.getenv("DB_NAME", "sports_odds"),
     "user": os.getenv("DB_USER", "amireslami"),
-    "password": os.getenv("DB_PASSWORD", "Lincoln95$")
+    "password": os.getenv("DB_PASSWORD", "Lincoln95$"),
+    # Rows per statement for bulk upserts
+    "page_size": int(os.getenv("DB_PAGE_SIZE", "1000"))
+}
+
+# Database connection pool, shared by every DatabaseManager in a process
+DB_POOL_CONFIG = {
+    "min_size": int(os.getenv("DB_POOL_MIN", "1")),
+    "max_size": int(os.getenv("DB_POOL_MAX", "10")),
+    # Seconds before a connection is retired and replaced
+    "max_lifetime": 1800,
+    # Seconds to wait for a free connection before giving up
+    "checkout_timeout": 10,
+    # Connections idle for longer than this are pinged before reuse
+    "health_check_interval": 30
 }
 
 # API Base URLs
@@ -37,5 +51,261 @@ API_URLS = {
 REQUEST_CONFIG = {
     "timeout": 30,
     "max_retries": 3,
-    "retry_delay": 5
+    "retry_delay": 5,
+    "max_retry_delay": 60,
+    # Ask providers for gzip-compressed responses
+    "gzip": True,
+    # Maximum number of concurrent in-flight requests per provider
+    "max_in_flight": {
+        "bet365": 10,
+        "betsapi": 5
+    }
+}
+
+# Odds parsing in worker processes: fetch threads queue raw response bodies,
+# and a process pool decodes and normalizes them in batches, off the GIL of
+# the fetching process
+PARSE_CONFIG = {
+    # Parser processes; 0 decodes and normalizes on the fetching process
+    "workers": int(os.getenv("PARSE_WORKERS", "0")),
+    # Bodies per batch sent to a parser process; larger batches pickle less often
+    "batch_size": 64,
+    # Seconds a partial batch waits for more bodies before it is sent anyway
+    "batch_wait": 0.02,
+    # Fetched bodies waiting for a batch; fetch threads block while it is full
+    "queue_size": 512,
+    # Batches sent to the pool and not yet parsed, per worker process; no
+    # more are sent (and the queue fills) while the pool is this far behind
+    "pending_batches": 2
+}
+
+# Provider quotas enforced by the shared rate limiter. Keep "burst" at 1 for
+# providers that count requests over a sliding one-second window.
+RATE_LIMITS = {
+    "bet365": {
+        "per_second": 5,
+        "burst": 1,
+        "per_day": 100000,
+        # Fraction of per_day only event-list requests may use
+        "events_reserve": 0.1
+    },
+    "betsapi": {
+        "per_second": 3,
+        "burst": 1,
+        "per_day": 86400,
+        "events_reserve": 0.1
+    }
+}
+
+# Per-sport pipeline schedule in seconds. Each sport runs on its own thread;
+# "deadline" is how long a cycle may take before it is reported as overrunning.
+PIPELINE_CONFIG = {
+    # Sports tick quickly: each match's odds are polled on its own adaptive
+    # interval (ADAPTIVE_POLLING_CONFIG), while the event list is re-fetched
+    # only every events_interval seconds and reused by the ticks in between
+    "tennis": {
+        "interval": 5,
+        "deadline": 15,
+        "events_interval": 30
+    },
+    "soccer": {
+        "interval": 5,
+        "deadline": 15,
+        "events_interval": 30
+    },
+    "basketball": {
+        "interval": 5,
+        "deadline": 15,
+        "events_interval": 30
+    },
+    # Upcoming fixtures; see PREMATCH_CONFIG for how much each cycle refreshes
+    "prematch": {
+        "interval": 60,
+        "deadline": 45
+    },
+    # Sharded deployments only: worker shares, and match discovery and
+    # assignment on the coordinating worker
+    "coordination": {
+        "interval": 5,
+        "deadline": 15
+    },
+    "maintenance": {
+        "interval": 3600,
+        "deadline": 300
+    }
+}
+
+# Per-match odds refresh intervals between min_interval and max_interval,
+# shorter for volatile matches, recent score changes and deep markets,
+# longer for matches whose prices have not moved for a while
+ADAPTIVE_POLLING_CONFIG = {
+    # False polls every match's odds on every tick
+    "enabled": os.getenv("ADAPTIVE_POLLING", "1") == "1",
+    "min_interval": 5,
+    "max_interval": 120,
+    # Share of each provider's RATE_LIMITS per_day spent on live polling,
+    # event lists included; the rest is left for prematch fetches
+    "daily_share": 0.8,
+    # How a provider's live share is split between the sports polling it;
+    # with bet365's 100000 a day, tennis and basketball get 13.9 requests
+    # per minute and soccer 27.8, of which the event list takes 2 (see
+    # PIPELINE_CONFIG events_interval)
+    "sport_weights": {
+        "tennis": {"bet365": 1, "betsapi": 1},
+        "soccer": {"bet365": 2},
+        "basketball": {"bet365": 1}
+    },
+    # Mean relative price move per minute at which a match counts as fully hot
+    "volatility_scale": 0.02,
+    # Weight of the newest sample in the volatility moving average
+    "volatility_smoothing": 0.3,
+    # Seconds a score change keeps a match hot, fading linearly
+    "score_window": 120,
+    # Seconds without a price move that halve a match's volatility heat
+    "idle_half_life": 300,
+    # Markets at which a match gets full weight; fewer markets poll less often
+    "full_market_count": 20
+}
+
+# Upcoming fixtures and their prematch odds, served by /api/v1/upcoming
+PREMATCH_CONFIG = {
+    # League ids whose fixture lists are tracked; none fetches the provider's default list
+    "leagues": {
+        "soccer": [league for league in os.getenv("PREMATCH_SOCCER_LEAGUES", "").split(",") if league],
+        "basketball": [league for league in os.getenv("PREMATCH_BASKETBALL_LEAGUES", "").split(",") if league]
+    },
+    # Seconds between refreshes of one league's fixture list
+    "events_interval": 1800,
+    # How long fetched prematch odds stay fresh, by seconds to kickoff: the
+    # first (threshold, ttl) pair whose threshold the time to kickoff reaches applies
+    "odds_ttl": [(86400, 21600), (21600, 3600), (3600, 900), (900, 300), (0, 120)],
+    # Upper bound on prematch odds requests per sport per cycle; below it each
+    # sport spends an even share of the part of bet365's quota that
+    # ADAPTIVE_POLLING_CONFIG daily_share leaves, 6.9 requests per minute
+    # with two sports, and the rest wait for later cycles
+    "max_odds_per_cycle": 200,
+    # Seconds past kickoff after which a fixture that never went in-play is dropped
+    "drop_after": 3 * 3600
+}
+
+# Skip snapshot writes for matches whose content did not change between polls
+CHANGE_DETECTION_CONFIG = {
+    # Seconds after which an unchanged match is rewritten anyway to show it is
+    # still being tracked; 0 disables heartbeat writes
+    "heartbeat_interval": 300
+}
+
+# Odds movement history, stored in daily partitions
+HISTORY_CONFIG = {
+    # Partitions older than this many days are dropped
+    "retention_days": int(os.getenv("HISTORY_RETENTION_DAYS", "90")),
+    # Daily partitions created ahead of today
+    "partitions_ahead": 2,
+    # Rows fetched per round trip when streaming history
+    "stream_batch_size": 2000
+}
+
+# Read-side cache of the live snapshot served by the API
+CACHE_CONFIG = {
+    # Seconds after which an entry is reloaded even without an update notification
+    "max_age": 300,
+    # Seconds to wait before re-establishing a dropped LISTEN connection
+    "listen_retry_delay": 5
+}
+
+# Incremental change feed served by /api/v1/odds/changes
+DELTA_CONFIG = {
+    # Recent deltas each API worker keeps per sport
+    "buffer_size": 500,
+    # Minutes deltas are kept in the database
+    "retention_minutes": 120
+}
+
+# Server-Sent Events push channel
+PUSH_CONFIG = {
+    # Open streams allowed per API worker
+    "max_subscribers": int(os.getenv("PUSH_MAX_SUBSCRIBERS", "20000")),
+    # Seconds between keep-alive comments on an idle stream
+    "keepalive_interval": 15
+}
+
+# Markets flattened into live_market_prices, one row per outcome, so live
+# matches can be filtered and sorted by those prices from a btree index.
+# Filters on any other market go through the GIN index on odds_data.
+MARKET_INDEX_CONFIG = {
+    "markets": {
+        "tennis": [market for market in os.getenv("INDEXED_MARKETS_TENNIS", "Match Winner").split(",") if market],
+        "soccer": [market for market in os.getenv("INDEXED_MARKETS_SOCCER", "Fulltime Result").split(",") if market],
+        "basketball": [market for market in os.getenv("INDEXED_MARKETS_BASKETBALL", "Money Line").split(",") if market]
+    },
+    # Largest price the min_price/max_price filters accept
+    "max_price": 10000.0
+}
+
+# Read API responses
+API_CONFIG = {
+    # Page size of list endpoints when limit is not given, and the largest allowed
+    "default_page_size": 500,
+    "max_page_size": 2000,
+    # Bodies smaller than this are sent uncompressed
+    "compress_min_size": 1024,
+    # Dynamic-content levels: most of the size reduction for little CPU
+    "gzip_level": 6,
+    "brotli_quality": 5,
+    # Compressed bodies each worker keeps by ETag, so a cached snapshot is
+    # compressed once per encoding rather than once per request
+    "compressed_cache_entries": 64,
+    # Serialized pages of a live list each snapshot keeps; they go with it
+    # when the next snapshot replaces it
+    "page_cache_entries": 256
+}
+
+# Matching the same tennis match across providers
+RESOLVER_CONFIG = {
+    # Width in seconds of the start-time buckets candidates are indexed by
+    "time_bucket": 3600,
+    # Events whose start times differ by more than this never match
+    "max_start_diff": 7200,
+    # Minimum player-name similarity (0-1) to treat two events as one match
+    "min_score": 0.6,
+    # Name tokens shared by more events than this (common first names) are
+    # not used for blocking unless an event has no rarer token
+    "max_block_size": 50
+}
+
+# Raw provider response capture for offline replay (see replay.py)
+RECORDING_CONFIG = {
+    "enabled": os.getenv("RECORD_RESPONSES", "0") == "1",
+    "directory": os.getenv("RECORD_DIR", "recordings"),
+    # A segment is closed and a new one started past either limit
+    "segment_bytes": 64 * 1024 * 1024,
+    "segment_seconds": 3600,
+    # Seconds between flushes of the open segment
+    "flush_interval": 5,
+    # Query parameters never written to disk, and ignored when matching replays
+    "redact_params": ["token"]
+}
+
+# Prometheus metrics
+METRICS_CONFIG = {
+    # Port of the aggregator process's /metrics endpoint; 0 disables it.
+    # The API server exposes its own /metrics route.
+    "aggregator_port": int(os.getenv("METRICS_PORT", "9100"))
+}
+
+# Sharded deployment (python -m aggregator.sharded): matches are spread over
+# worker processes by consistent hashing; one worker also coordinates
+SHARDING_CONFIG = {
+    # Seconds between worker heartbeats
+    "heartbeat_interval": 5,
+    # Seconds without a heartbeat after which a worker counts as dead and its
+    # matches move; a worker that cannot heartbeat for this long stops polling
+    "worker_ttl": 20,
+    # Points per worker on the hash ring; more spreads matches more evenly
+    "virtual_nodes": 128,
+    # Advisory lock held by the coordinating worker
+    "coordinator_lock": "aggregator_coordinator",
+    # Sports polled whole by a single worker: tennis resolves matches across
+    # providers, which needs both providers' full event lists in one place
+    "whole_sports": ["tennis"]
 }
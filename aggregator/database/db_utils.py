@@ -2,70 +2,793 @@
 Database connection logic and helper functions for insert/update/query operations.
 """
 
+import functools
+import json
+import os
+import re
+import select
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import Dict, List
+from psycopg2 import extensions, sql
+from psycopg2.extras import Json, RealDictCursor, execute_values
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 import logging
-from config import DB_CONFIG
+from config import DB_CONFIG, DB_POOL_CONFIG, DELTA_CONFIG, HISTORY_CONFIG, MARKET_INDEX_CONFIG
+from database.pool import ConnectionPool
+from metrics import DB_OPERATION_ERRORS, DB_OPERATION_SECONDS
+from models import SPORT_FIELDS
 
 logger = logging.getLogger(__name__)
 
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "schema.sql")
+
+# Latest-snapshot table for each sport
+SPORT_TABLES = {
+    "tennis": "tennis_odds",
+    "soccer": "soccer_odds",
+    "basketball": "basketball_odds"
+}
+
+def connect():
+    """Create a new database connection"""
+    return psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["database"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        cursor_factory=RealDictCursor
+    )
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Return this process's connection pool, creating it after any fork"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool(connect, **DB_POOL_CONFIG)
+        return _pool
+
+# Append-only price movement table for each sport, partitioned by day
+HISTORY_TABLES = {
+    sport: f"{table}_history" for sport, table in SPORT_TABLES.items()
+}
+
+# Columns of prematch_odds the read API can return
+UPCOMING_COLUMNS = ("match_id", "event_name", "competition", "start_time", "odds_data", "timestamp")
+
+# NOTIFY channel carrying the sport whose live snapshot was just written
+LIVE_UPDATES_CHANNEL = "live_odds_updated"
+
+# Status given to snapshot rows of matches the provider stopped listing
+ENDED_STATUS = "Ended"
+
+PARTITION_SUFFIX = re.compile(r"_(\d{8})$")
+
+# Read API queries as (query, params), shared by DatabaseManager and the
+# EXPLAIN checks in benchmarks/query_plans.py so both see the same SQL.
+# Each is meant to be answered from an index in schema.sql.
+
+def live_matches_query(sport: str) -> Tuple[sql.Composable, tuple]:
+    """Live matches, newest first; the partial live timestamp index"""
+    return sql.SQL("""
+        SELECT * FROM {}
+        WHERE status = 'Live'
+        ORDER BY timestamp DESC
+    """).format(sql.Identifier(SPORT_TABLES[sport])), ()
+
+def match_query(sport: str, match_id: str) -> Tuple[sql.Composable, tuple]:
+    """One match by id; the primary key"""
+    return sql.SQL("SELECT * FROM {} WHERE match_id = %s").format(sql.Identifier(SPORT_TABLES[sport])), (match_id,)
+
+def upcoming_matches_query(sport: str, until: datetime, competition: Optional[str] = None, limit: int = 500,
+                           after: Optional[Tuple[datetime, str]] = None,
+                           columns: Sequence[str] = UPCOMING_COLUMNS) -> Tuple[sql.Composable, tuple]:
+    """A page of fixtures in (start_time, match_id) order; the prematch start or competition index"""
+    query = [
+        sql.SQL("SELECT {} FROM prematch_odds").format(sql.SQL(", ").join(map(sql.Identifier, columns))),
+        sql.SQL("WHERE sport = %s AND start_time >= NOW() AND start_time < %s")
+    ]
+    params = [sport, until]
+    if competition:
+        query.append(sql.SQL("AND competition = %s"))
+        params.append(competition)
+    if after is not None:
+        query.append(sql.SQL("AND (start_time, match_id) > (%s, %s)"))
+        params.extend(after)
+    query.append(sql.SQL("ORDER BY start_time, match_id LIMIT %s"))
+    params.append(limit)
+    return sql.SQL(" ").join(query), tuple(params)
+
+def upcoming_summary_query(sports: Sequence[str], until: datetime) -> Tuple[sql.Composable, tuple]:
+    """Fixture count and soonest start per sport; the prematch start index"""
+    return sql.SQL("""
+        SELECT sport, COUNT(*) AS upcoming, MIN(start_time) AS next_start
+        FROM prematch_odds
+        WHERE sport = ANY(%s::text[]) AND start_time >= NOW() AND start_time < %s
+        GROUP BY sport
+    """), (list(sports), until)
+
+def price_path(market: str, min_price: Optional[float] = None, max_price: Optional[float] = None) -> str:
+    """jsonpath matching an outcome of market priced within the bounds, e.g. $."Match Winner".* ? (@ >= 3.0)"""
+    name = market.replace("\\", "\\\\").replace('"', '\\"')
+    conditions = []
+    if min_price is not None:
+        conditions.append(f"@ >= {float(min_price)!r}")
+    if max_price is not None:
+        conditions.append(f"@ <= {float(max_price)!r}")
+    path = f'$."{name}"'
+    return f'{path}.* ? ({" && ".join(conditions)})' if conditions else path
+
+def market_filter_query(sport: str, market: str, min_price: Optional[float] = None,
+                        max_price: Optional[float] = None, competition: Optional[str] = None,
+                        limit: int = 500, after: Optional[str] = None) -> Tuple[sql.Composable, tuple]:
+    """A page of live matches in match_id order with an outcome of market within the price bounds.
+
+    MARKET_INDEX_CONFIG markets are looked up in live_market_prices; any
+    other market through the GIN index on odds_data. A competition is read
+    through the partial live competition index.
+    """
+    table = sql.Identifier(SPORT_TABLES[sport])
+    query = [sql.SQL("SELECT * FROM {} WHERE status = 'Live'").format(table)]
+    params = []
+    if market in MARKET_INDEX_CONFIG["markets"].get(sport, ()):
+        query.append(sql.SQL(
+            "AND match_id IN (SELECT match_id FROM live_market_prices WHERE sport = %s AND market = %s"
+        ))
+        params.extend((sport, market))
+        if min_price is not None:
+            query.append(sql.SQL("AND price >= %s"))
+            params.append(min_price)
+        if max_price is not None:
+            query.append(sql.SQL("AND price <= %s"))
+            params.append(max_price)
+        query.append(sql.SQL(")"))
+    else:
+        # The key test lets the GIN index narrow the rows even when a
+        # planner cannot extract the key from the path
+        query.append(sql.SQL("AND odds_data ? %s"))
+        params.append(market)
+        if min_price is not None or max_price is not None:
+            query.append(sql.SQL("AND odds_data @? %s::jsonpath"))
+            params.append(price_path(market, min_price, max_price))
+    if competition:
+        query.append(sql.SQL("AND competition = %s"))
+        params.append(competition)
+    if after is not None:
+        query.append(sql.SQL("AND match_id > %s"))
+        params.append(after)
+    query.append(sql.SQL("ORDER BY match_id LIMIT %s"))
+    params.append(limit)
+    return sql.SQL(" ").join(query), tuple(params)
+
+def market_prices_query(sport: str, market: str, min_price: Optional[float] = None,
+                        max_price: Optional[float] = None, limit: int = 500,
+                        after: Optional[Tuple[float, str, str]] = None,
+                        descending: bool = True) -> Tuple[sql.Composable, tuple]:
+    """A page of one indexed market's live outcomes in price order; the live_market_prices price index.
+
+    after is the (price, match_id, outcome) of the last row of the previous page.
+    """
+    query = [
+        sql.SQL("""
+            SELECT p.match_id, s.event_name, s.competition, p.outcome, p.price
+            FROM live_market_prices p JOIN {} s ON s.match_id = p.match_id AND s.status = 'Live'
+            WHERE p.sport = %s AND p.market = %s
+        """).format(sql.Identifier(SPORT_TABLES[sport]))
+    ]
+    params = [sport, market]
+    if min_price is not None:
+        query.append(sql.SQL("AND p.price >= %s"))
+        params.append(min_price)
+    if max_price is not None:
+        query.append(sql.SQL("AND p.price <= %s"))
+        params.append(max_price)
+    if after is not None:
+        query.append(sql.SQL("AND (p.price, p.match_id, p.outcome) {} (%s, %s, %s)").format(
+            sql.SQL("<" if descending else ">")
+        ))
+        params.extend(after)
+    # All keys in one direction, so the index can be read backwards for descending
+    direction = sql.SQL("DESC" if descending else "ASC")
+    query.append(sql.SQL("ORDER BY p.price {0}, p.match_id {0}, p.outcome {0} LIMIT %s").format(direction))
+    params.append(limit)
+    return sql.SQL(" ").join(query), tuple(params)
+
+def instrumented(method):
+    """Time a DatabaseManager operation and count it as an error if it raises or returns False"""
+    duration = DB_OPERATION_SECONDS.labels(method.__name__)
+    errors = DB_OPERATION_ERRORS.labels(method.__name__)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+        if result is False:
+            errors.inc()
+        return result
+
+    return wrapper
+
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, pool: ConnectionPool = None):
         self.config = DB_CONFIG
+        self._pool = pool
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # Resolved lazily so importing modules never opens connections
+        return self._pool or get_pool()
 
     def get_connection(self):
-        """Create a new database connection"""
-        return psycopg2.connect(
-            host=self.config["host"],
-            database=self.config["database"],
-            user=self.config["user"],
-            password=self.config["password"],
-            cursor_factory=RealDictCursor
+        """Create a new, unpooled database connection"""
+        return connect()
+
+    def pool_stats(self) -> Dict:
+        """Return in-use/idle counts, wait times and checkout timeouts for the pool"""
+        return self.pool.stats()
+
+    def ping(self) -> float:
+        """Seconds for a trivial query through the pool; raises if the database is unreachable"""
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+        return time.perf_counter() - started
+
+    @instrumented
+    def init_schema(self):
+        """Create any missing tables from schema.sql"""
+        with open(SCHEMA_FILE) as f:
+            schema = f.read()
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(schema)
+            conn.commit()
+
+    def bulk_upsert(self, cur, table: str, columns: Sequence[str], rows: List[tuple],
+                    conflict_columns: Sequence[str], update_columns: Sequence[str],
+                    template: str = None) -> int:
+        """Upsert rows in pages of page_size rows per INSERT ... ON CONFLICT statement.
+
+        Rows must be unique on conflict_columns, since PostgreSQL refuses to
+        update the same row twice in one statement. Returns the number of rows sent.
+        """
+        if not rows:
+            return 0
+
+        query = sql.SQL(
+            "INSERT INTO {table} ({columns}) VALUES %s "
+            "ON CONFLICT ({conflict}) DO UPDATE SET {updates}"
+        ).format(
+            table=sql.Identifier(table),
+            columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+            conflict=sql.SQL(", ").join(map(sql.Identifier, conflict_columns)),
+            updates=sql.SQL(", ").join(
+                sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(col))
+                for col in update_columns
+            )
         )
+        execute_values(cur, query.as_string(cur), rows, template=template, page_size=self.config["page_size"])
+        return len(rows)
 
-    def store_tennis_data(self, data: List[Dict]):
-        """Store tennis match data in the database"""
-        conn = self.get_connection()
-        cur = conn.cursor()
-        
-        try:
-            for match in data:
-                cur.execute("""
-                    INSERT INTO tennis_odds 
-                    (match_id, event_name, status, odds_data, timestamp)
-                    VALUES (%s, %s, %s, %s, NOW())
-                    ON CONFLICT (match_id) 
-                    DO UPDATE SET odds_data = %s, timestamp = NOW()
-                """, (
-                    match["match_id"],
-                    match["event_name"],
-                    match["status"],
-                    match["odds"],
-                    match["odds"]
-                ))
+    @instrumented
+    def store_sport_data(self, sport: str, data: List[Dict], delta: Dict = None) -> bool:
+        """Bulk upsert a cycle's merged matches into the sport's snapshot table.
+
+        A delta, if given, is appended to odds_changes in the same transaction,
+        and the matches it reports removed are retired from the live list.
+        """
+        # Keep the last row per match_id; the upsert cannot touch a row twice
+        matches = {match["match_id"]: match for match in data}
+        competition = SPORT_FIELDS[sport][1]
+        rows = [
+            (match["match_id"], match["event_name"], match.get(competition), match["status"], Json(match["odds"]))
+            for match in matches.values()
+        ]
+        if not rows and not delta:
+            return True
+
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
             
-            conn.commit()
-            logger.info(f"Successfully stored {len(data)} tennis matches")
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"Error storing tennis data: {str(e)}")
-        finally:
-            cur.close()
-            conn.close()
+            try:
+                self.bulk_upsert(
+                    cur,
+                    SPORT_TABLES[sport],
+                    ("match_id", "event_name", "competition", "status", "odds_data", "timestamp"),
+                    rows,
+                    conflict_columns=("match_id",),
+                    update_columns=("event_name", "competition", "status", "odds_data", "timestamp"),
+                    template="(%s, %s, %s, %s, %s, NOW())"
+                )
+                self.replace_market_prices(cur, sport, list(matches.values()))
+                if delta:
+                    self.retire_matches(cur, sport, delta["removed"])
+                    # Held until commit, so concurrent writers of the sport
+                    # commit their deltas in version order
+                    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (sport,))
+                    cur.execute(
+                        "INSERT INTO odds_changes (sport, payload) VALUES (%s, %s)",
+                        (sport, Json(delta, dumps=lambda obj: json.dumps(obj, default=str)))
+                    )
+                # Delivered on commit, telling API workers to refresh their cache
+                cur.execute("SELECT pg_notify(%s, %s)", (LIVE_UPDATES_CHANNEL, sport))
+                conn.commit()
+                logger.info(f"Successfully stored {len(rows)} {sport} matches")
+                return True
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Error storing {sport} data: {str(e)}")
+                return False
+            finally:
+                cur.close()
+
+    def retire_matches(self, cur, sport: str, match_ids: Sequence[str]) -> int:
+        """Mark live snapshot rows of matches no longer listed as ended and drop their
+        live_market_prices rows; returns the snapshot rows updated"""
+        if not match_ids:
+            return 0
+        cur.execute(sql.SQL("""
+            UPDATE {} SET status = %s, timestamp = NOW()
+            WHERE match_id = ANY(%s::text[]) AND status = 'Live'
+        """).format(sql.Identifier(SPORT_TABLES[sport])), (ENDED_STATUS, list(match_ids)))
+        retired = cur.rowcount
+        cur.execute(
+            "DELETE FROM live_market_prices WHERE sport = %s AND match_id = ANY(%s::text[])",
+            (sport, list(match_ids))
+        )
+        return retired
+
+    def replace_market_prices(self, cur, sport: str, matches: List[Dict]) -> int:
+        """Rewrite the live_market_prices rows of matches, unique by match_id; returns the rows written.
+
+        Only live matches get rows, so a match leaves the table when it is
+        written with another status, or when retire_matches drops it once
+        the provider stops listing it.
+        """
+        markets = MARKET_INDEX_CONFIG["markets"].get(sport)
+        if not markets or not matches:
+            return 0
+        rows = [
+            (sport, match["match_id"], market, outcome, float(price))
+            for match in matches if match["status"] == "Live"
+            for market in markets
+            for outcome, price in (match["odds"].get(market) or {}).items()
+        ]
+        cur.execute(
+            "DELETE FROM live_market_prices WHERE sport = %s AND match_id = ANY(%s::text[])",
+            (sport, [match["match_id"] for match in matches])
+        )
+        if rows:
+            execute_values(
+                cur, "INSERT INTO live_market_prices (sport, match_id, market, outcome, price) VALUES %s",
+                rows, page_size=self.config["page_size"]
+            )
+        return len(rows)
+
+    def store_tennis_data(self, data: List[Dict]) -> bool:
+        """Store tennis match data in the database"""
+        return self.store_sport_data("tennis", data)
+
+    def store_soccer_data(self, data: List[Dict]) -> bool:
+        """Store soccer match data in the database"""
+        return self.store_sport_data("soccer", data)
+
+    def store_basketball_data(self, data: List[Dict]) -> bool:
+        """Store basketball match data in the database"""
+        return self.store_sport_data("basketball", data)
+
+    @instrumented
+    def get_live_matches(self, sport: str) -> List[Dict]:
+        """Retrieve live matches for a sport from the database"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*live_matches_query(sport))
+                return cur.fetchall()
+
+    @instrumented
+    def get_match(self, sport: str, match_id: str) -> Optional[Dict]:
+        """A match's latest snapshot row whatever its status, None if unknown"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*match_query(sport, match_id))
+                return cur.fetchone()
+
+    @instrumented
+    def get_live_matches_by_market(self, sport: str, market: str, min_price: Optional[float] = None,
+                                   max_price: Optional[float] = None, competition: Optional[str] = None,
+                                   limit: int = 500, after: Optional[str] = None) -> List[Dict]:
+        """Live matches with an outcome of market priced within the bounds, in match_id order after after"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*market_filter_query(sport, market, min_price, max_price, competition, limit, after))
+                return cur.fetchall()
+
+    @instrumented
+    def get_market_prices(self, sport: str, market: str, min_price: Optional[float] = None,
+                          max_price: Optional[float] = None, limit: int = 500,
+                          after: Optional[Tuple[float, str, str]] = None, descending: bool = True) -> List[Dict]:
+        """Outcomes of an indexed market across live matches, highest price first unless not descending"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*market_prices_query(sport, market, min_price, max_price, limit, after, descending))
+                return cur.fetchall()
 
     def get_live_tennis_matches(self) -> List[Dict]:
         """Retrieve live tennis matches from the database"""
-        conn = self.get_connection()
-        cur = conn.cursor()
-        
+        return self.get_live_matches("tennis")
+
+    @instrumented
+    def store_prematch(self, sport: str, data: List[Dict]) -> bool:
+        """Bulk upsert upcoming fixtures (match_id, event_name, competition, start_time, odds)"""
+        rows = {
+            match["match_id"]: (
+                sport,
+                match["match_id"],
+                match["event_name"],
+                match["competition"],
+                match["start_time"],
+                Json(match["odds"])
+            )
+            for match in data
+        }
+        if not rows:
+            return True
+
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+
+            try:
+                self.bulk_upsert(
+                    cur,
+                    "prematch_odds",
+                    ("sport", "match_id", "event_name", "competition", "start_time", "odds_data", "timestamp"),
+                    list(rows.values()),
+                    conflict_columns=("sport", "match_id"),
+                    update_columns=("event_name", "competition", "start_time", "odds_data", "timestamp"),
+                    template="(%s, %s, %s, %s, %s, %s, NOW())"
+                )
+                conn.commit()
+                logger.info(f"Successfully stored {len(rows)} upcoming {sport} matches")
+                return True
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Error storing upcoming {sport} matches: {str(e)}")
+                return False
+            finally:
+                cur.close()
+
+    @instrumented
+    def delete_prematch(self, sport: str, match_ids: Sequence[str]) -> int:
+        """Remove fixtures that went in-play or left the fixture list"""
+        if not match_ids:
+            return 0
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM prematch_odds WHERE sport = %s AND match_id = ANY(%s)",
+                    (sport, list(match_ids))
+                )
+                deleted = cur.rowcount
+            conn.commit()
+        return deleted
+
+    @instrumented
+    def get_upcoming_matches(self, sport: str, until: datetime, competition: Optional[str] = None,
+                             limit: int = 500, after: Optional[Tuple[datetime, str]] = None,
+                             columns: Sequence[str] = UPCOMING_COLUMNS) -> List[Dict]:
+        """Fixtures of a sport that have not started yet and start before until, soonest first.
+
+        after is the (start_time, match_id) of the last row of the previous
+        page; columns must be among UPCOMING_COLUMNS.
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*upcoming_matches_query(sport, until, competition, limit, after, columns))
+                return cur.fetchall()
+
+    @instrumented
+    def get_upcoming_summary(self, sports: Sequence[str], until: datetime) -> Dict[str, Dict]:
+        """{sport: {"upcoming": fixtures starting before until, "next_start": soonest start}}"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*upcoming_summary_query(sports, until))
+                return {row["sport"]: {"upcoming": row["upcoming"], "next_start": row["next_start"]}
+                        for row in cur.fetchall()}
+
+    @instrumented
+    def get_odds_changes(self, sport: str, since: Optional[int], limit: int) -> Tuple[List[Dict], int]:
+        """Return (deltas after since, floor) ordered by version.
+
+        With since=None the newest limit deltas are returned, and floor is the
+        version below which deltas were left out.
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                if since is not None:
+                    cur.execute("""
+                        SELECT version, payload FROM odds_changes
+                        WHERE sport = %s AND version > %s
+                        ORDER BY version
+                        LIMIT %s
+                    """, (sport, since, limit))
+                    return cur.fetchall(), since
+
+                cur.execute("""
+                    SELECT version, payload FROM odds_changes
+                    WHERE sport = %s
+                    ORDER BY version DESC
+                    LIMIT %s
+                """, (sport, limit))
+                rows = cur.fetchall()[::-1]
+                if rows:
+                    return rows, rows[0]["version"] - 1
+
+                # Nothing buffered for this sport; any pruned delta is at or below the sequence position
+                cur.execute("SELECT CASE WHEN is_called THEN last_value ELSE 0 END AS version FROM odds_changes_version_seq")
+                return rows, cur.fetchone()["version"]
+
+    @instrumented
+    def heartbeat_worker(self, worker_id: str, host: str, pid: int):
+        """Register a sharded worker or refresh its heartbeat"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO aggregator_workers (worker_id, host, pid) VALUES (%s, %s, %s)
+                    ON CONFLICT (worker_id) DO UPDATE
+                    SET host = EXCLUDED.host, pid = EXCLUDED.pid, heartbeat_at = NOW()
+                """, (worker_id, host, pid))
+            conn.commit()
+
+    @instrumented
+    def remove_worker(self, worker_id: str):
+        """Deregister a worker on shutdown so its matches move without waiting for its heartbeat to expire"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM aggregator_workers WHERE worker_id = %s", (worker_id,))
+            conn.commit()
+
+    @instrumented
+    def live_workers(self, ttl: float) -> List[str]:
+        """Ids of workers whose last heartbeat is at most ttl seconds old"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT worker_id FROM aggregator_workers
+                    WHERE heartbeat_at > NOW() - %s * INTERVAL '1 second'
+                    ORDER BY worker_id
+                """, (ttl,))
+                return [row["worker_id"] for row in cur.fetchall()]
+
+    @instrumented
+    def sync_assignments(self, sport: str, targets: Dict[str, str], events: Dict[str, Dict],
+                         live: Sequence[str]) -> Dict[str, int]:
+        """Make a sport's assignments match the discovered matches and their ring owners.
+
+        targets maps every discovered match_id to its owner on the hash ring;
+        events holds the raw provider event of new or changed matches only.
+        Matches of dead workers move at once, matches of live workers through
+        pending_worker, and undiscovered matches are deleted.
+        """
+        live = list(live)
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+
+            try:
+                self.bulk_upsert(
+                    cur,
+                    "shard_assignments",
+                    ("sport", "match_id", "worker_id", "event", "updated_at"),
+                    [(sport, match_id, targets[match_id], Json(event)) for match_id, event in events.items()],
+                    conflict_columns=("sport", "match_id"),
+                    update_columns=("event", "updated_at"),
+                    template="(%s, %s, %s, %s, NOW())"
+                )
+                cur.execute(
+                    "CREATE TEMP TABLE shard_targets (match_id TEXT PRIMARY KEY, target TEXT NOT NULL) ON COMMIT DROP"
+                )
+                execute_values(cur, "INSERT INTO shard_targets (match_id, target) VALUES %s",
+                               list(targets.items()), page_size=self.config["page_size"])
+                cur.execute("""
+                    UPDATE shard_assignments a SET worker_id = t.target, pending_worker = NULL
+                    FROM shard_targets t
+                    WHERE a.sport = %s AND a.match_id = t.match_id
+                      AND a.worker_id <> t.target AND NOT a.worker_id = ANY(%s::text[])
+                """, (sport, live))
+                reassigned = cur.rowcount
+                cur.execute("""
+                    UPDATE shard_assignments a
+                    SET pending_worker = CASE WHEN a.worker_id = t.target THEN NULL ELSE t.target END
+                    FROM shard_targets t
+                    WHERE a.sport = %s AND a.match_id = t.match_id
+                      AND a.pending_worker IS DISTINCT FROM CASE WHEN a.worker_id = t.target THEN NULL ELSE t.target END
+                """, (sport,))
+                moving = cur.rowcount
+                cur.execute("""
+                    DELETE FROM shard_assignments a
+                    WHERE a.sport = %s AND NOT EXISTS (SELECT 1 FROM shard_targets t WHERE t.match_id = a.match_id)
+                """, (sport,))
+                deleted = cur.rowcount
+                conn.commit()
+                return {"upserted": len(events), "reassigned": reassigned, "moving": moving, "deleted": deleted}
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    @instrumented
+    def release_assignments(self, sport: str, worker_id: str) -> List[str]:
+        """Hand this worker's matches that have a pending owner over to it; returns their ids"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE shard_assignments SET worker_id = pending_worker, pending_worker = NULL
+                    WHERE sport = %s AND worker_id = %s AND pending_worker IS NOT NULL
+                    RETURNING match_id
+                """, (sport, worker_id))
+                released = [row["match_id"] for row in cur.fetchall()]
+            conn.commit()
+        return released
+
+    @instrumented
+    def owned_assignments(self, sport: str, worker_id: str) -> List[Dict]:
+        """(match_id, event) rows this worker polls"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT match_id, event FROM shard_assignments WHERE sport = %s AND worker_id = %s",
+                    (sport, worker_id)
+                )
+                return cur.fetchall()
+
+    @instrumented
+    def owned_match_ids(self, sport: str, worker_id: str) -> List[str]:
+        """Ids of the matches this worker polls, without their events"""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT match_id FROM shard_assignments WHERE sport = %s AND worker_id = %s",
+                    (sport, worker_id)
+                )
+                return [row["match_id"] for row in cur.fetchall()]
+
+    @instrumented
+    def prune_odds_changes(self, retention_minutes: int = None) -> int:
+        """Delete deltas older than the retention window"""
+        retention_minutes = DELTA_CONFIG["retention_minutes"] if retention_minutes is None else retention_minutes
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM odds_changes WHERE created_at < NOW() - %s * INTERVAL '1 minute'",
+                    (retention_minutes,)
+                )
+                deleted = cur.rowcount
+            conn.commit()
+        return deleted
+
+    def listen(self, channel: str, callback: Callable[[str], None], on_ready: Callable[[], None] = None,
+               stop_event: threading.Event = None):
+        """Deliver NOTIFY payloads on channel to callback until stop_event is set.
+
+        Uses its own unpooled connection, since it stays checked out for good.
+        """
+        conn = connect()
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
         try:
-            cur.execute("""
-                SELECT * FROM tennis_odds 
-                WHERE status = 'Live'
-                ORDER BY timestamp DESC
-            """)
-            return cur.fetchall()
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+            if on_ready:
+                on_ready()
+
+            while not (stop_event and stop_event.is_set()):
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    callback(conn.notifies.pop(0).payload)
         finally:
-            cur.close()
             conn.close()
+
+    @instrumented
+    def ensure_history_partitions(self, sport: str, start: date = None, days: int = None):
+        """Create the daily history partitions from start through the configured days ahead"""
+        start = start or datetime.now(timezone.utc).date()
+        days = HISTORY_CONFIG["partitions_ahead"] if days is None else days
+        table = HISTORY_TABLES[sport]
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                for offset in range(days + 1):
+                    day = start + timedelta(days=offset)
+                    # Explicit UTC bounds; a bare date would be read in the
+                    # session's time zone and miss the partition's UTC day
+                    cur.execute(sql.SQL(
+                        "CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table} "
+                        "FOR VALUES FROM (%s) TO (%s)"
+                    ).format(
+                        partition=sql.Identifier(f"{table}_{day:%Y%m%d}"),
+                        table=sql.Identifier(table)
+                    ), (f"{day:%Y-%m-%d} 00:00:00+00", f"{day + timedelta(days=1):%Y-%m-%d} 00:00:00+00"))
+            conn.commit()
+
+    @instrumented
+    def drop_expired_history_partitions(self, sport: str, retention_days: int = None) -> List[str]:
+        """Drop whole history partitions older than the retention window"""
+        retention_days = HISTORY_CONFIG["retention_days"] if retention_days is None else retention_days
+        cutoff = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+        table = HISTORY_TABLES[sport]
+        dropped = []
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT child.relname AS partition
+                    FROM pg_inherits
+                    JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+                    JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+                    WHERE parent.relname = %s
+                """, (table,))
+                for row in cur.fetchall():
+                    match = PARTITION_SUFFIX.search(row["partition"])
+                    if not match or datetime.strptime(match.group(1), "%Y%m%d").date() >= cutoff:
+                        continue
+                    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(row["partition"])))
+                    dropped.append(row["partition"])
+            conn.commit()
+
+        if dropped:
+            logger.info(f"Dropped {len(dropped)} expired {sport} history partitions")
+        return dropped
+
+    @instrumented
+    def store_odds_history(self, sport: str, movements: List[tuple]) -> bool:
+        """Append (match_id, market, outcome, price, ts) price movements"""
+        if not movements:
+            return True
+
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            
+            try:
+                execute_values(
+                    cur,
+                    sql.SQL("INSERT INTO {} (match_id, market, outcome, price, ts) VALUES %s").format(
+                        sql.Identifier(HISTORY_TABLES[sport])
+                    ).as_string(cur),
+                    movements,
+                    page_size=self.config["page_size"]
+                )
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Error storing {sport} odds history: {str(e)}")
+                return False
+            finally:
+                cur.close()
+
+    def stream_odds_history(self, sport: str, match_id: str, start: datetime, end: datetime) -> Iterator[Dict]:
+        """Yield a match's price movements in [start, end) using a server-side cursor"""
+        with self.pool.connection() as conn:
+            with conn.cursor(name="odds_history_stream") as cur:
+                cur.itersize = HISTORY_CONFIG["stream_batch_size"]
+                cur.execute(sql.SQL("""
+                    SELECT market, outcome, price, ts FROM {}
+                    WHERE match_id = %s AND ts >= %s AND ts < %s
+                    ORDER BY ts
+                """).format(sql.Identifier(HISTORY_TABLES[sport])), (match_id, start, end))
+                for row in cur:
+                    yield row
@@ -0,0 +1,205 @@
+"""
+Bounded, thread-safe PostgreSQL connection pool with checkout health checks.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(PoolError):
+    """Raised when no connection could be checked out within the timeout"""
+
+class ConnectionPool:
+    """Reuses connections across threads, holding between min_size and max_size open.
+
+    On checkout, connections older than max_lifetime are replaced. Connections
+    idle for longer than health_check_interval are pinged before being handed out.
+    Whenever closing one leaves fewer than min_size, the pool opens new ones.
+    """
+
+    def __init__(self, connect: Callable[[], extensions.connection], min_size: int, max_size: int,
+                 max_lifetime: float, checkout_timeout: float, health_check_interval: float):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, returned_at)
+        self._created: Dict[int, float] = {}
+        self._size = 0
+        # While the database refuses connections, _fill waits until then before retrying
+        self._fill_after = 0.0
+
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.opened = 0
+        self.closed = 0
+        self.health_check_failures = 0
+
+    def _open(self) -> extensions.connection:
+        conn = self.connect()
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+            self.opened += 1
+        return conn
+
+    def _close(self, conn: extensions.connection):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created.pop(id(conn), None)
+            self._size -= 1
+            self.closed += 1
+            self._cond.notify()
+
+    def _fill(self):
+        """Open connections up to min_size, on first use and whenever closed ones left the pool short"""
+        with self._cond:
+            if self._size >= self.min_size or time.monotonic() < self._fill_after:
+                return
+            missing = self.min_size - self._size
+            self._size += missing
+        for _ in range(missing):
+            try:
+                conn = self._open()
+            except psycopg2.Error as e:
+                logger.error(f"Error opening pooled connection: {str(e)}")
+                with self._cond:
+                    self._size -= 1
+                    self._fill_after = time.monotonic() + self.health_check_interval
+                    self._cond.notify()
+                continue
+            with self._cond:
+                self._idle.append((conn, self._created[id(conn)], time.monotonic()))
+                self._cond.notify()
+
+    def _healthy(self, conn: extensions.connection, created_at: float, returned_at: float) -> bool:
+        now = time.monotonic()
+        if conn.closed or now - created_at > self.max_lifetime:
+            return False
+        if now - returned_at < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            self.health_check_failures += 1
+            return False
+
+    def getconn(self, timeout: float = None) -> extensions.connection:
+        """Check out a healthy connection, waiting up to timeout seconds for one to free up"""
+        self._fill()
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"No database connection available after {timeout}s")
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    # LIFO keeps the most recently used connections warm
+                    idle = self._idle.pop()
+                else:
+                    idle = None
+                    self._size += 1
+
+            if idle is None:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                conn = idle[0]
+                if not self._healthy(*idle):
+                    self._close(conn)
+                    self._fill()
+                    continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self.checkouts += 1
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+            return conn
+
+    def putconn(self, conn: extensions.connection, discard: bool = False):
+        """Return a connection, closing it if it is broken, expired or discarded"""
+        created_at = self._created.get(id(conn), 0.0)
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        if discard or conn.closed or time.monotonic() - created_at > self.max_lifetime:
+            self._close(conn)
+            self._fill()
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a with block"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "in_use": self._size - idle,
+                "idle": idle,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total": round(self.wait_time_total, 4),
+                "wait_time_max": round(self.wait_time_max, 4),
+                "wait_time_avg": round(self.wait_time_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "opened": self.opened,
+                "closed": self.closed,
+                "health_check_failures": self.health_check_failures
+            }
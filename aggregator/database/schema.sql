@@ -0,0 +1,201 @@
+-- Latest odds snapshot per match, one table per sport. odds_data holds
+-- {market: {outcome: decimal price}}, prices as JSON numbers.
+
+CREATE TABLE IF NOT EXISTS tennis_odds (
+    match_id    TEXT PRIMARY KEY,
+    event_name  TEXT,
+    competition TEXT,
+    status      TEXT,
+    odds_data   JSONB NOT NULL DEFAULT '{}'::jsonb,
+    timestamp   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS soccer_odds (
+    match_id    TEXT PRIMARY KEY,
+    event_name  TEXT,
+    competition TEXT,
+    status      TEXT,
+    odds_data   JSONB NOT NULL DEFAULT '{}'::jsonb,
+    timestamp   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS basketball_odds (
+    match_id    TEXT PRIMARY KEY,
+    event_name  TEXT,
+    competition TEXT,
+    status      TEXT,
+    odds_data   JSONB NOT NULL DEFAULT '{}'::jsonb,
+    timestamp   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Read API lookups. The live list reads status = 'Live' rows newest first,
+-- so a partial index on timestamp returns them in that order however many
+-- finished matches remain, without a sort. Every snapshot write moves
+-- timestamp, which rules out HOT updates of these rows; change detection
+-- keeps those writes to changed matches and heartbeats. Market filters of
+-- one competition page through the competition index in match_id order.
+-- Databases created before competition existed get it here.
+
+ALTER TABLE tennis_odds ADD COLUMN IF NOT EXISTS competition TEXT;
+DROP INDEX IF EXISTS tennis_odds_live_idx;
+CREATE INDEX IF NOT EXISTS tennis_odds_live_ts_idx ON tennis_odds (timestamp DESC) WHERE status = 'Live';
+CREATE INDEX IF NOT EXISTS tennis_odds_live_competition_idx
+    ON tennis_odds (competition, match_id) WHERE status = 'Live';
+ALTER TABLE soccer_odds ADD COLUMN IF NOT EXISTS competition TEXT;
+DROP INDEX IF EXISTS soccer_odds_live_idx;
+CREATE INDEX IF NOT EXISTS soccer_odds_live_ts_idx ON soccer_odds (timestamp DESC) WHERE status = 'Live';
+CREATE INDEX IF NOT EXISTS soccer_odds_live_competition_idx
+    ON soccer_odds (competition, match_id) WHERE status = 'Live';
+ALTER TABLE basketball_odds ADD COLUMN IF NOT EXISTS competition TEXT;
+DROP INDEX IF EXISTS basketball_odds_live_idx;
+CREATE INDEX IF NOT EXISTS basketball_odds_live_ts_idx ON basketball_odds (timestamp DESC) WHERE status = 'Live';
+CREATE INDEX IF NOT EXISTS basketball_odds_live_competition_idx
+    ON basketball_odds (competition, match_id) WHERE status = 'Live';
+
+-- Databases created while odds_data was json or text get it converted once,
+-- before the GIN indexes below, which need jsonb
+DO $$
+DECLARE
+    snapshot TEXT;
+BEGIN
+    FOR snapshot IN
+        SELECT table_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND column_name = 'odds_data' AND data_type IN ('json', 'text')
+          AND table_name IN ('tennis_odds', 'soccer_odds', 'basketball_odds', 'prematch_odds')
+    LOOP
+        -- The old default cannot be cast along with the column
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN odds_data DROP DEFAULT', snapshot);
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN odds_data TYPE jsonb USING odds_data::jsonb', snapshot);
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN odds_data SET DEFAULT ''{}''::jsonb', snapshot);
+    END LOOP;
+END $$;
+
+-- Market filters on live matches: odds_data ? market and
+-- odds_data @? '$."market".* ? (@ >= min)' are answered from these, the
+-- price bound being rechecked on the few rows that have the market. Writes
+-- whose odds changed update them; heartbeat rewrites do not.
+CREATE INDEX IF NOT EXISTS tennis_odds_live_odds_idx ON tennis_odds USING GIN (odds_data) WHERE status = 'Live';
+CREATE INDEX IF NOT EXISTS soccer_odds_live_odds_idx ON soccer_odds USING GIN (odds_data) WHERE status = 'Live';
+CREATE INDEX IF NOT EXISTS basketball_odds_live_odds_idx ON basketball_odds USING GIN (odds_data) WHERE status = 'Live';
+
+-- The MARKET_INDEX_CONFIG markets of live matches, one row per outcome,
+-- rewritten with the snapshot rows in the same transaction. The index
+-- serves price ranges and price order within a market.
+
+CREATE TABLE IF NOT EXISTS live_market_prices (
+    sport    TEXT NOT NULL,
+    match_id TEXT NOT NULL,
+    market   TEXT NOT NULL,
+    outcome  TEXT NOT NULL,
+    price    DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (sport, match_id, market, outcome)
+);
+CREATE INDEX IF NOT EXISTS live_market_prices_price_idx
+    ON live_market_prices (sport, market, price, match_id, outcome);
+
+-- Upcoming fixtures with their latest prematch odds. Rows are removed once
+-- the match goes in-play or is dropped from the fixture list.
+
+CREATE TABLE IF NOT EXISTS prematch_odds (
+    sport       TEXT NOT NULL,
+    match_id    TEXT NOT NULL,
+    event_name  TEXT,
+    competition TEXT,
+    start_time  TIMESTAMPTZ,
+    odds_data   JSONB NOT NULL DEFAULT '{}'::jsonb,
+    timestamp   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (sport, match_id)
+);
+-- (sport, start_time, match_id) is the keyset order of /upcoming pages;
+-- the competition index serves the league filter in the same order
+DROP INDEX IF EXISTS prematch_odds_sport_start_idx;
+CREATE INDEX IF NOT EXISTS prematch_odds_sport_start_match_idx ON prematch_odds (sport, start_time, match_id);
+CREATE INDEX IF NOT EXISTS prematch_odds_sport_competition_start_idx
+    ON prematch_odds (sport, competition, start_time, match_id);
+
+-- Append-only price movements, one row per match/market/outcome change,
+-- price being the decimal price or NULL when the outcome disappeared.
+-- Range-partitioned by UTC day; partitions are created ahead of time and
+-- old ones dropped by DatabaseManager rather than deleted row by row.
+
+CREATE TABLE IF NOT EXISTS tennis_odds_history (
+    match_id TEXT NOT NULL,
+    market   TEXT NOT NULL,
+    outcome  TEXT NOT NULL,
+    price    DOUBLE PRECISION,
+    ts       TIMESTAMPTZ NOT NULL
+) PARTITION BY RANGE (ts);
+CREATE INDEX IF NOT EXISTS tennis_odds_history_match_ts_idx ON tennis_odds_history (match_id, ts);
+
+CREATE TABLE IF NOT EXISTS soccer_odds_history (
+    match_id TEXT NOT NULL,
+    market   TEXT NOT NULL,
+    outcome  TEXT NOT NULL,
+    price    DOUBLE PRECISION,
+    ts       TIMESTAMPTZ NOT NULL
+) PARTITION BY RANGE (ts);
+CREATE INDEX IF NOT EXISTS soccer_odds_history_match_ts_idx ON soccer_odds_history (match_id, ts);
+
+CREATE TABLE IF NOT EXISTS basketball_odds_history (
+    match_id TEXT NOT NULL,
+    market   TEXT NOT NULL,
+    outcome  TEXT NOT NULL,
+    price    DOUBLE PRECISION,
+    ts       TIMESTAMPTZ NOT NULL
+) PARTITION BY RANGE (ts);
+CREATE INDEX IF NOT EXISTS basketball_odds_history_match_ts_idx ON basketball_odds_history (match_id, ts);
+
+-- Databases created while price was TEXT get it converted once
+DO $$
+DECLARE
+    history TEXT;
+BEGIN
+    FOR history IN
+        SELECT table_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND column_name = 'price' AND data_type = 'text'
+          AND table_name IN ('tennis_odds_history', 'soccer_odds_history', 'basketball_odds_history')
+    LOOP
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN price TYPE DOUBLE PRECISION USING price::double precision',
+                       history);
+    END LOOP;
+END $$;
+
+-- Per-cycle added/changed/removed deltas behind /api/v1/odds/changes.
+-- Versions come from one sequence and are taken at insert time, so writers
+-- of the same sport (sharded workers) take a per-sport advisory lock before
+-- inserting and hold it until commit. Deltas of a sport therefore become
+-- visible in version order, which readers loading version > latest rely on.
+
+CREATE TABLE IF NOT EXISTS odds_changes (
+    version    BIGSERIAL PRIMARY KEY,
+    sport      TEXT NOT NULL,
+    payload    JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS odds_changes_sport_version_idx ON odds_changes (sport, version);
+
+-- Sharded deployments: live aggregator processes and which one polls each
+-- match. Only worker_id polls a match; a coordinator moving it to another
+-- live worker sets pending_worker, and the current owner hands it over at
+-- the start of its next cycle, so a match is never polled by two workers.
+-- Owners re-read their rows before storing, so a cycle that overran its
+-- lease never writes a match another worker now owns.
+
+CREATE TABLE IF NOT EXISTS aggregator_workers (
+    worker_id    TEXT PRIMARY KEY,
+    host         TEXT,
+    pid          INTEGER,
+    started_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS shard_assignments (
+    sport          TEXT NOT NULL,
+    match_id       TEXT NOT NULL,
+    worker_id      TEXT NOT NULL,
+    pending_worker TEXT,
+    event          JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (sport, match_id)
+);
+CREATE INDEX IF NOT EXISTS shard_assignments_worker_idx ON shard_assignments (worker_id, sport);
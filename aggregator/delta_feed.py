@@ -0,0 +1,152 @@
+"""
+Versioned per-cycle deltas: built by the aggregator, buffered and served by the API.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from change_detector import ChangeSet
+from config import DELTA_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class DeltaFeed:
+    """Builds the added/changed/removed delta for each applied ChangeSet.
+
+    Changed matches carry only the markets whose outcomes differ from the
+    previous cycle, plus the names of markets that disappeared.
+    """
+
+    def __init__(self):
+        self._odds: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def build(self, changes: ChangeSet) -> Tuple[Optional[Dict], Dict[str, Dict]]:
+        """Return (delta or None if nothing changed, odds state to commit after storing)"""
+        with self._lock:
+            previous = self._odds.get(changes.sport, {})
+
+        odds_state = {match_id: previous[match_id] for match_id in changes.hashes if match_id in previous}
+        changed = []
+        for match in changes.changed:
+            before = previous.get(match["match_id"], {})
+            after = match.get("odds") or {}
+            entry = {key: value for key, value in match.items() if key != "odds"}
+            entry["odds"] = {market: outcomes for market, outcomes in after.items() if before.get(market) != outcomes}
+            entry["removed_markets"] = [market for market in before if market not in after]
+            changed.append(entry)
+
+        for match in changes.new + changes.changed:
+            odds_state[match["match_id"]] = match.get("odds") or {}
+
+        if not (changes.new or changed or changes.removed):
+            return None, odds_state
+        return {"added": changes.new, "changed": changed, "removed": changes.removed}, odds_state
+
+    def commit(self, sport: str, odds_state: Dict[str, Dict]):
+        """Record the odds a stored delta was built against"""
+        with self._lock:
+            self._odds[sport] = odds_state
+
+def coalesce_deltas(deltas: List[Dict]) -> Dict[str, List]:
+    """Fold consecutive deltas into one added/changed/removed set"""
+    added: Dict[str, Dict] = {}
+    changed: Dict[str, Dict] = {}
+    removed = {}
+
+    for delta in deltas:
+        for row in delta["added"]:
+            match_id = row["match_id"]
+            added[match_id] = row
+            changed.pop(match_id, None)
+            removed.pop(match_id, None)
+
+        for update in delta["changed"]:
+            match_id = update["match_id"]
+            fields = {key: value for key, value in update.items() if key not in ("odds", "removed_markets")}
+            if match_id in added:
+                row = {**added[match_id], **fields}
+                odds = {**(row.get("odds") or {}), **update["odds"]}
+                for market in update["removed_markets"]:
+                    odds.pop(market, None)
+                row["odds"] = odds
+                added[match_id] = row
+                continue
+
+            entry = changed.setdefault(match_id, {"odds": {}, "removed_markets": []})
+            entry.update(fields)
+            entry["odds"].update(update["odds"])
+            for market in update["odds"]:
+                if market in entry["removed_markets"]:
+                    entry["removed_markets"].remove(market)
+            for market in update["removed_markets"]:
+                entry["odds"].pop(market, None)
+                if market not in entry["removed_markets"]:
+                    entry["removed_markets"].append(market)
+
+        for match_id in delta["removed"]:
+            added.pop(match_id, None)
+            changed.pop(match_id, None)
+            removed[match_id] = True
+
+    return {"added": list(added.values()), "changed": list(changed.values()), "removed": list(removed)}
+
+class DeltaBuffer:
+    """Bounded ring buffer of recent deltas per sport on the API side.
+
+    The buffer holds every delta with a version above its floor; a client
+    asking for changes since an older version has to take a full snapshot.
+    """
+
+    def __init__(self, loader: Callable[[str, Optional[int], int], Tuple[List[Dict], int]], size: int = None):
+        self.loader = loader
+        self.size = DELTA_CONFIG["buffer_size"] if size is None else size
+        self._buffers: Dict[str, deque] = {}
+        self._floors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _append(self, sport: str, rows: List[Dict]):
+        buffer = self._buffers[sport]
+        for row in rows:
+            if len(buffer) == buffer.maxlen:
+                self._floors[sport] = buffer[0][0]
+            buffer.append((row["version"], row["payload"]))
+
+    def _ensure(self, sport: str):
+        if sport in self._buffers:
+            return
+        rows, floor = self.loader(sport, None, self.size)
+        self._buffers[sport] = deque(maxlen=self.size)
+        self._floors[sport] = floor
+        self._append(sport, rows)
+
+    def on_update(self, sport: str):
+        """LiveUpdateListener callback: pull deltas newer than the buffer's latest"""
+        with self._lock:
+            if sport not in self._buffers:
+                return
+            while True:
+                rows, _ = self.loader(sport, self._latest(sport), self.size)
+                self._append(sport, rows)
+                if len(rows) < self.size:
+                    break
+
+    def reset(self):
+        """Drop every buffer; they are reloaded on the next request"""
+        with self._lock:
+            self._buffers.clear()
+            self._floors.clear()
+
+    def _latest(self, sport: str) -> int:
+        buffer = self._buffers[sport]
+        return buffer[-1][0] if buffer else self._floors[sport]
+
+    def since(self, sport: str, version: Optional[int]) -> Tuple[int, Optional[List[Dict]]]:
+        """Return (latest version, deltas after version), or None deltas if the buffer cannot cover it"""
+        with self._lock:
+            self._ensure(sport)
+            latest = self._latest(sport)
+            if version is None or version < self._floors[sport] or version > latest:
+                return latest, None
+            return latest, [payload for delta_version, payload in self._buffers[sport] if delta_version > version]
@@ -0,0 +1,40 @@
+"""
+Bounded-concurrency fan-out for per-event API calls.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+from config import REQUEST_CONFIG
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+def get_executor(provider: str) -> ThreadPoolExecutor:
+    """Return the shared worker pool for a provider, creating it on first use.
+
+    The pool size is REQUEST_CONFIG["max_in_flight"][provider], so every fetcher
+    talking to the same provider shares one in-flight limit.
+    """
+    with _lock:
+        executor = _executors.get(provider)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=REQUEST_CONFIG["max_in_flight"][provider],
+                thread_name_prefix=f"{provider}-fetch"
+            )
+            _executors[provider] = executor
+        return executor
+
+def fan_out(provider: str, func: Callable[[str], Optional[Dict]], keys: Iterable[str]) -> Dict[str, Dict]:
+    """Call func for every key concurrently and collect the non-empty results by key"""
+    unique_keys = list(dict.fromkeys(key for key in keys if key))
+    if not unique_keys:
+        return {}
+
+    results = {}
+    executor = get_executor(provider)
+    for key, result in zip(unique_keys, executor.map(func, unique_keys)):
+        if result:
+            results[key] = result
+    return results
@@ -0,0 +1,233 @@
+"""
+Shared pooled HTTP clients for the external odds providers.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from config import API_CREDENTIALS, API_URLS, RECORDING_CONFIG, REQUEST_CONFIG
+from metrics import PROVIDER_REQUEST_SECONDS, PROVIDER_REQUESTS, PROVIDER_RESPONSE_BYTES, register_stats_source
+from rate_limiter import PRIORITY_PREMATCH, get_limiter
+from recording import ResponseRecorder
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: throttling and transient upstream failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_DIGIT = re.compile(r"\d")
+
+def endpoint_label(url: str, base_url: str = "") -> str:
+    """URL path below base_url with id segments collapsed, e.g. /get_event_markets/:id, to keep metric labels bounded"""
+    path = urlsplit(url).path
+    base_path = urlsplit(base_url).path.rstrip("/")
+    if base_path and path.startswith(base_path):
+        path = path[len(base_path):]
+    return "/".join(":id" if _DIGIT.search(segment) else segment for segment in path.split("/"))
+
+class ConnectionStats:
+    """Per-host counters of connections opened vs. requests sent"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+
+    def _host(self, host: str) -> Dict[str, int]:
+        return self._hosts.setdefault(host, {"opened": 0, "requests": 0})
+
+    def record_open(self, host: str):
+        with self._lock:
+            self._host(host)["opened"] += 1
+
+    def record_request(self, host: str):
+        with self._lock:
+            self._host(host)["requests"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Return {host: {"opened", "reused", "requests"}}"""
+        with self._lock:
+            return {
+                host: {
+                    "opened": counts["opened"],
+                    "reused": max(counts["requests"] - counts["opened"], 0),
+                    "requests": counts["requests"]
+                }
+                for host, counts in self._hosts.items()
+            }
+
+def _counting_pool(base, stats: ConnectionStats):
+    """Build a urllib3 pool class that reports socket connects and requests to stats"""
+
+    class CountingConnectionPool(base):
+        def _new_conn(self):
+            conn = super()._new_conn()
+            connect = conn.connect
+            host = self.host
+
+            # Connections re-open their socket in place after a drop, so count
+            # at connect() rather than at object creation.
+            def counting_connect(*args, **kwargs):
+                stats.record_open(host)
+                return connect(*args, **kwargs)
+
+            conn.connect = counting_connect
+            return conn
+
+        def urlopen(self, *args, **kwargs):
+            stats.record_request(self.host)
+            return super().urlopen(*args, **kwargs)
+
+    return CountingConnectionPool
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools record ConnectionStats"""
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats)
+        }
+
+class HTTPClient:
+    """Keep-alive, rate-limited session for one provider with retries driven by REQUEST_CONFIG"""
+
+    def __init__(self, provider: str, headers: Optional[Dict[str, str]] = None):
+        self.provider = provider
+        self.config = REQUEST_CONFIG
+        self.stats = ConnectionStats()
+        self.limiter = get_limiter(provider)
+        self.recorder = None
+
+        # Size the pool to the fan-out width so concurrent requests reuse sockets
+        pool_size = self.config["max_in_flight"][provider]
+        adapter = PooledHTTPAdapter(self.stats, pool_connections=4, pool_maxsize=pool_size)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(headers or {})
+        self.session.headers["Connection"] = "keep-alive"
+        self.session.headers["Accept-Encoding"] = "gzip, deflate" if self.config["gzip"] else "identity"
+
+    def get(self, url: str, params: Optional[Dict] = None, priority: int = PRIORITY_PREMATCH,
+            **kwargs) -> requests.Response:
+        """GET with rate limiting, exponential backoff and jitter; raises the last RequestException"""
+        kwargs.setdefault("timeout", self.config["timeout"])
+        max_retries = self.config["max_retries"]
+        endpoint = endpoint_label(url, API_URLS.get(self.provider, ""))
+        latency = PROVIDER_REQUEST_SECONDS.labels(self.provider, endpoint)
+
+        for attempt in range(max_retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire(priority)
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                latency.observe(time.perf_counter() - started)
+                PROVIDER_REQUESTS.labels(self.provider, endpoint, "error").inc()
+                if attempt == max_retries:
+                    raise
+                logger.warning(f"{self.provider} request to {url} failed ({str(e)}), retrying")
+            else:
+                latency.observe(time.perf_counter() - started)
+                self.observe(endpoint, response, kwargs.get("stream", False))
+                retry_after = self.limiter.observe(response) if self.limiter is not None else None
+                if self.recorder is not None:
+                    self.recorder.record(self.provider, response)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                    return response
+                logger.warning(f"{self.provider} request to {url} returned {response.status_code}, retrying")
+                response.close()
+                if retry_after is not None:
+                    # The limiter holds every caller back until Retry-After has passed
+                    continue
+
+            time.sleep(self.backoff(attempt))
+
+    def observe(self, endpoint: str, response: requests.Response, stream: bool):
+        """Count the response by status and record its size without reading a streamed body"""
+        PROVIDER_REQUESTS.labels(self.provider, endpoint, str(response.status_code)).inc()
+        length = response.headers.get("Content-Length")
+        if length is not None and length.isdigit():
+            PROVIDER_RESPONSE_BYTES.labels(self.provider, endpoint).observe(int(length))
+        elif not stream:
+            PROVIDER_RESPONSE_BYTES.labels(self.provider, endpoint).observe(len(response.content))
+
+    def mount(self, adapter: HTTPAdapter, rate_limited: bool = True):
+        """Send every request through adapter, e.g. a ReplayTransport; rate_limited=False bypasses the quota"""
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not rate_limited:
+            self.limiter = None
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given zero-based attempt"""
+        delay = min(self.config["max_retry_delay"], self.config["retry_delay"] * 2 ** attempt)
+        return random.uniform(0, delay)
+
+_clients: Dict[str, HTTPClient] = {}
+_lock = threading.Lock()
+# Applied to every client, including ones created later
+_recorder = None
+_transport: Optional[Tuple[HTTPAdapter, bool]] = None
+
+def _provider_headers(provider: str) -> Dict[str, str]:
+    if provider == "bet365":
+        return {
+            "x-rapidapi-key": API_CREDENTIALS["bet365"]["api_key"],
+            "x-rapidapi-host": API_CREDENTIALS["bet365"]["api_host"]
+        }
+    # BetsAPI authenticates with a token query parameter
+    return {}
+
+def get_client(provider: str) -> HTTPClient:
+    """Return the process-wide HTTPClient for a provider"""
+    global _recorder
+    with _lock:
+        if _recorder is None and RECORDING_CONFIG["enabled"]:
+            _recorder = ResponseRecorder()
+        client = _clients.get(provider)
+        if client is None:
+            client = HTTPClient(provider, _provider_headers(provider))
+            client.recorder = _recorder
+            if _transport is not None:
+                client.mount(*_transport)
+            _clients[provider] = client
+        return client
+
+def record_responses(recorder: Optional[ResponseRecorder]):
+    """Write every provider response to recorder; None stops recording"""
+    global _recorder
+    with _lock:
+        _recorder = recorder
+        for client in _clients.values():
+            client.recorder = recorder
+
+def use_transport(adapter: HTTPAdapter, rate_limited: bool = False):
+    """Route every provider request through adapter instead of the network"""
+    global _transport
+    with _lock:
+        _transport = (adapter, rate_limited)
+        for client in _clients.values():
+            client.mount(adapter, rate_limited)
+
+def connection_stats() -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Return {provider: {host: counters}} for every client created so far"""
+    with _lock:
+        clients = dict(_clients)
+    return {provider: client.stats.snapshot() for provider, client in clients.items()}
+
+register_stats_source("connections", connection_stats)
@@ -0,0 +1,184 @@
+"""
+In-memory cache of each sport's live snapshot, pre-serialized for the read API.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    """A versioned, already-serialized live snapshot with the rows it was built from"""
+    __slots__ = ("version", "etag", "body", "rows", "loaded_at", "views")
+
+    def __init__(self, version: int, etag: str, body: bytes, rows: List[Dict], loaded_at: float):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        self.rows = rows
+        self.loaded_at = loaded_at
+        # Other forms of the rows built on first use, e.g. a paging index
+        self.views: Dict[str, object] = {}
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+class LiveSnapshotCache:
+    """Serves live lists from memory, reloading a sport only when it changes.
+
+    Entries are refreshed when the aggregator's NOTIFY arrives, on a cold
+    start, or once they are older than CACHE_CONFIG["max_age"] as a safety net.
+    """
+
+    def __init__(self, loader: Callable[[str], List[Dict]], serialize: Callable[[Dict], bytes],
+                 max_age: float = None):
+        self.loader = loader
+        self.serialize = serialize
+        self.max_age = CACHE_CONFIG["max_age"] if max_age is None else max_age
+        self._entries: Dict[str, CacheEntry] = {}
+        self._versions: Dict[str, int] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def publish(self, sport: str, rows: List[Dict]) -> CacheEntry:
+        """Serialize rows once and make them the current entry for sport"""
+        body = self.serialize({"data": rows})
+        # Content-based ETags agree across every worker holding the same data
+        etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        with self._lock:
+            current = self._entries.get(sport)
+            if current is not None and current.etag == etag:
+                current.loaded_at = time.monotonic()
+                return current
+            version = self._versions.get(sport, 0) + 1
+            self._versions[sport] = version
+            entry = CacheEntry(version, etag, body, rows, time.monotonic())
+            self._entries[sport] = entry
+        return entry
+
+    def _fresh(self, sport: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(sport)
+        if entry is not None and time.monotonic() - entry.loaded_at < self.max_age:
+            return entry
+        return None
+
+    def _load(self, sport: str, only_if_stale: bool) -> CacheEntry:
+        # One loader call per sport at a time, so a cold start is a single query
+        with self._lock:
+            load_lock = self._load_locks.setdefault(sport, threading.Lock())
+        with load_lock:
+            if only_if_stale:
+                entry = self._fresh(sport)
+                if entry is not None:
+                    return entry
+            entry = self.publish(sport, self.loader(sport))
+            self.refreshes += 1
+            return entry
+
+    def refresh(self, sport: str) -> CacheEntry:
+        """Reload a sport from the database"""
+        return self._load(sport, only_if_stale=False)
+
+    def get(self, sport: str) -> CacheEntry:
+        """Return the cached entry, loading it on a cold start or when stale"""
+        entry = self._fresh(sport)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return self._load(sport, only_if_stale=True)
+
+    def invalidate(self, sport: str = None):
+        with self._lock:
+            if sport is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(sport, None)
+
+    def on_update(self, sport: str):
+        """LiveUpdateListener callback: refresh the sport that was just written"""
+        try:
+            self.refresh(sport)
+        except Exception:
+            self.invalidate(sport)
+            raise
+
+    def ages(self) -> Dict[str, float]:
+        """Seconds since each cached sport was loaded or confirmed unchanged"""
+        now = time.monotonic()
+        return {sport: round(now - entry.loaded_at, 3) for sport, entry in list(self._entries.items())}
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "refreshes": self.refreshes,
+            "entries": {
+                sport: {"version": entry.version, "etag": entry.etag, "count": entry.count}
+                for sport, entry in list(self._entries.items())
+            }
+        }
+
+class LiveUpdateListener:
+    """Background LISTEN thread fanning the aggregator's NOTIFYs out to subscribers.
+
+    on_update(sport) is called for each notification; on_reset() whenever the
+    connection is (re)established, since updates may have been missed meanwhile.
+    """
+
+    def __init__(self, db, channel: str):
+        self.db = db
+        self.channel = channel
+        self._subscribers: List[Tuple[Callable[[str], None], Optional[Callable[[], None]]]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        # Whether this process is currently LISTENing, for health checks
+        self.connected = False
+
+    def subscribe(self, on_update: Callable[[str], None], on_reset: Callable[[], None] = None):
+        """Subscribers are called in subscription order"""
+        self._subscribers.append((on_update, on_reset))
+
+    def start(self):
+        """Start the thread once per process, so it also survives pre-forking servers"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(target=self._listen, name="live-update-listener", daemon=True)
+            self._pid = os.getpid()
+            self.connected = False
+        self._thread.start()
+
+    def _notify(self, sport: str):
+        for on_update, _ in self._subscribers:
+            try:
+                on_update(sport)
+            except Exception as e:
+                logger.error(f"Error handling live {sport} update: {str(e)}")
+
+    def _reset(self):
+        self.connected = True
+        for _, on_reset in self._subscribers:
+            if on_reset:
+                on_reset()
+
+    def _listen(self):
+        while True:
+            try:
+                self.db.listen(self.channel, self._notify, on_ready=self._reset)
+            except Exception as e:
+                logger.error(f"Live update listener disconnected: {str(e)}")
+            self.connected = False
+            time.sleep(CACHE_CONFIG["listen_retry_delay"])
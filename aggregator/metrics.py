@@ -0,0 +1,384 @@
+"""
+Process-wide counters, gauges and histograms rendered in the Prometheus text format.
+
+Recording is a dict lookup for the label values plus a short locked update,
+so the hot path (every provider request, parse and database call) can stay
+instrumented in production. Import this module top-level ("metrics"), like
+http_client, so every component of a process shares one registry.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds of histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** power for power in range(10))
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+class _CounterValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class _GaugeValue(_CounterValue):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # Per-bucket (non-cumulative) counts, the last one for +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the duration of its block, including when it raises"""
+        return _Timer(self)
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: _HistogramValue):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+class Metric:
+    """A named metric with one value per combination of label values"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Value for the given label values, in the order the labels were declared"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield (suffix, label text, value) for every series"""
+        for values, child in list(self._children.items()):
+            yield "", _label_text(self.label_names, values), child.value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+class Gauge(Metric):
+    """A settable value, or one computed at scrape time by function returning {label values: value}"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 function: Callable[[], Dict[Tuple[str, ...], float]] = None, registry: "Registry" = None):
+        super().__init__(name, documentation, labels, registry)
+        self.function = function
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        if self.function is None:
+            yield from super().samples()
+            return
+        for values, value in self.function().items():
+            yield "", _label_text(self.label_names, values), value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: "Registry" = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labels, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        bounds = self.buckets + (float("inf"),)
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield "_bucket", _label_text(self.label_names + ("le",), values + (_format_value(bound),)), cumulative
+            labels = _label_text(self.label_names, values)
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def render() -> str:
+    """All metrics of this process in the Prometheus text exposition format"""
+    return REGISTRY.render()
+
+# Stats that other modules keep themselves, read at scrape time. They
+# register a function here rather than this module importing them, since
+# they import this module.
+_stats_sources: Dict[str, Callable[[], Dict]] = {}
+
+def register_stats_source(name: str, function: Callable[[], Dict]):
+    """Make function's stats available to the gauges reading source name"""
+    _stats_sources[name] = function
+
+def _stats(name: str) -> Dict:
+    function = _stats_sources.get(name)
+    return function() if function is not None else {}
+
+def _connection_samples() -> Dict[Tuple[str, ...], float]:
+    return {
+        (provider, host, kind): counts[kind]
+        for provider, hosts in _stats("connections").items()
+        for host, counts in hosts.items()
+        for kind in ("opened", "reused")
+    }
+
+def _rate_limit_samples(key: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    return lambda: {
+        (provider,): stats[key] for provider, stats in _stats("rate_limits").items() if stats.get(key) is not None
+    }
+
+# Provider HTTP calls, labelled by endpoint path with ids collapsed
+PROVIDER_REQUEST_SECONDS = Histogram(
+    "provider_request_seconds", "Time until provider response headers arrived",
+    ("provider", "endpoint")
+)
+PROVIDER_REQUESTS = Counter(
+    "provider_requests_total", "Provider request attempts by HTTP status, or error for connection failures",
+    ("provider", "endpoint", "status")
+)
+PROVIDER_RESPONSE_BYTES = Histogram(
+    "provider_response_bytes", "Provider response body size: Content-Length if sent, else the decoded body",
+    ("provider", "endpoint"), buckets=BYTES_BUCKETS
+)
+PROVIDER_CONNECTIONS = Gauge(
+    "provider_connections", "Provider requests since start that opened a connection (opened) or reused one (reused)",
+    ("provider", "host", "kind"), function=_connection_samples
+)
+
+# Provider quotas, from each provider's RateLimiter
+RATE_LIMIT_TOKENS = Gauge(
+    "rate_limit_tokens", "Requests the provider's token bucket allows right now",
+    ("provider",), function=_rate_limit_samples("tokens")
+)
+RATE_LIMIT_DAILY_REMAINING = Gauge(
+    "rate_limit_daily_remaining", "Requests left in the provider's daily budget, event-list reserve included",
+    ("provider",), function=_rate_limit_samples("daily_remaining")
+)
+RATE_LIMIT_WAITING = Gauge(
+    "rate_limit_waiting", "Requests queued for a token of the provider",
+    ("provider",), function=_rate_limit_samples("waiting")
+)
+RATE_LIMIT_THROTTLED = Gauge(
+    "rate_limit_throttled", "429 responses from the provider since start",
+    ("provider",), function=_rate_limit_samples("throttled")
+)
+
+# Aggregation pipelines
+PIPELINE_STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds", "Duration of one pipeline stage (fetch_events, fetch_odds, parse, parse_batch, merge, store)",
+    ("sport", "stage")
+)
+PIPELINE_EVENTS = Histogram(
+    "pipeline_events", "Events one provider returned in a cycle",
+    ("sport", "provider"), buckets=COUNT_BUCKETS
+)
+PIPELINE_CYCLES = Counter(
+    "pipeline_cycles_total", "Aggregation cycles by outcome (ok, skipped, error)",
+    ("sport", "outcome")
+)
+PIPELINE_CHANGES = Counter(
+    "pipeline_changes_total", "Matches per stored cycle by change kind (new, changed, unchanged, heartbeat, removed)",
+    ("sport", "kind")
+)
+PIPELINE_RUN_SECONDS = Histogram(
+    "pipeline_run_seconds", "Duration of a scheduled pipeline run",
+    ("pipeline",)
+)
+PIPELINE_OVERRUNS = Counter(
+    "pipeline_overruns_total", "Scheduled runs that exceeded their deadline",
+    ("pipeline",)
+)
+
+def stage_timer(sport: str, stage: str):
+    """Context manager timing one pipeline stage"""
+    return PIPELINE_STAGE_SECONDS.labels(sport, stage).time()
+
+# Odds parse pool
+PARSE_QUEUE_DEPTH = Gauge(
+    "parse_queue_depth", "Odds bodies waiting for a batch (queued) and batches inside the parse pool (parsing)",
+    ("stage",)
+)
+PARSE_BACKPRESSURE_SECONDS = Counter(
+    "parse_backpressure_seconds_total",
+    "Time spent blocked on a full parse stage: fetch threads on the queue (queued), batching on the pool (parsing)",
+    ("stage",)
+)
+PARSE_BATCH_SIZE = Histogram(
+    "parse_batch_size", "Odds bodies per batch sent to the parse pool",
+    ("sport",), buckets=COUNT_BUCKETS
+)
+
+# Adaptive odds polling
+ODDS_POLL_INTERVAL = Histogram(
+    "odds_poll_interval_seconds", "Time between two odds polls of the same match",
+    ("sport", "provider"), buckets=(2.5, 5, 7.5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300)
+)
+ODDS_POLLS_DEFERRED = Counter(
+    "odds_polls_deferred_total", "Due odds polls pushed to a later tick by the request budget",
+    ("sport", "provider")
+)
+
+# Database
+DB_OPERATION_SECONDS = Histogram(
+    "db_operation_seconds", "Duration of a DatabaseManager operation, pool checkout included",
+    ("operation",)
+)
+DB_OPERATION_ERRORS = Counter(
+    "db_operation_errors_total", "DatabaseManager operations that raised or reported failure",
+    ("operation",)
+)
+
+# API server
+API_REQUEST_SECONDS = Histogram(
+    "api_request_seconds", "Time to build an API response; streamed bodies are not included",
+    ("endpoint",)
+)
+API_RESPONSES = Counter(
+    "api_responses_total", "API responses by route and HTTP status",
+    ("endpoint", "status")
+)
+
+# Data freshness
+_odds_updated: Dict[str, float] = {}
+
+def mark_odds_updated(sport: str, when: Optional[float] = None):
+    """Record when a sport's newest odds were written to its snapshot table"""
+    _odds_updated[sport] = time.time() if when is None else when
+
+ODDS_LAST_UPDATED = Gauge(
+    "odds_last_updated_timestamp_seconds", "Unix time of the newest stored odds",
+    ("sport",), function=lambda: {(sport,): when for sport, when in list(_odds_updated.items())}
+)
+ODDS_STALENESS = Gauge(
+    "odds_staleness_seconds", "Age of the newest stored odds at scrape time",
+    ("sport",), function=lambda: {(sport,): round(time.time() - when, 3) for sport, when in list(_odds_updated.items())}
+)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread, for processes without a web app such as the aggregator"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on {host}:{port}/metrics")
+    return server
@@ -0,0 +1,136 @@
+"""
+Compact in-memory model for parsed events and their markets.
+
+Events live as slotted objects from parsing through change detection; only
+the ones that need writing are serialized back to dicts for the database
+and delta feed.
+"""
+
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Decimal odds; kept as a bare float rather than a wrapper object, which
+# would cost more than the value itself
+Price = float
+
+# Dict keys each sport has always used for its participants, competition and
+# score; a sport without score keys keeps the provider's score as-is
+SPORT_FIELDS = {
+    "tennis": ("players", "tournament", None),
+    "soccer": ("teams", "league", ("home", "away")),
+    "basketball": ("teams", "league", ("home", "away", "period"))
+}
+
+def intern_name(value: Any) -> Any:
+    """Intern team, league, market and outcome names repeated across events"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+def start_epoch(value: Any) -> Optional[float]:
+    """Start time as epoch seconds from an epoch number/string or an ISO 8601 string"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+class Outcome:
+    """One selection of a market and its decimal price"""
+    __slots__ = ("name", "price")
+
+    def __init__(self, name: str, price: Price):
+        self.name = name
+        self.price = price
+
+    @property
+    def implied_probability(self) -> float:
+        return 1.0 / self.price
+
+class Market:
+    """A market's outcomes, stored as a names tuple and a parallel array of prices"""
+    __slots__ = ("name", "outcome_names", "prices", "margin")
+
+    def __init__(self, name: str, outcome_names: Tuple[str, ...], prices: array, margin: Optional[float] = None):
+        self.name = name
+        self.outcome_names = outcome_names
+        self.prices = prices
+        self.margin = margin
+
+    def __len__(self):
+        return len(self.outcome_names)
+
+    @property
+    def outcomes(self) -> List[Outcome]:
+        return [Outcome(name, price) for name, price in zip(self.outcome_names, self.prices)]
+
+    def price_map(self) -> Dict[str, Price]:
+        """{outcome: price}"""
+        return dict(zip(self.outcome_names, self.prices))
+
+    def content_key(self) -> tuple:
+        return self.name, self.outcome_names, tuple(self.prices), self.margin
+
+class Event:
+    """A parsed event; mergers attach its markets in place"""
+    __slots__ = ("match_id", "sport", "event_name", "status", "score", "home", "away",
+                 "competition", "start_time", "markets", "sources")
+
+    def __init__(self, match_id: str, sport: str, event_name: str = None, status: str = None, score: Any = None,
+                 home: str = None, away: str = None, competition: str = None, start_time: Any = None,
+                 markets: Dict[str, Market] = None, sources: Dict[str, str] = None):
+        self.match_id = match_id
+        self.sport = sport
+        self.event_name = event_name
+        self.status = status
+        # A tuple ordered like the sport's score keys in SPORT_FIELDS
+        self.score = score
+        self.home = intern_name(home)
+        self.away = intern_name(away)
+        self.competition = intern_name(competition)
+        self.start_time = start_time
+        self.markets = {} if markets is None else markets
+        # {provider: provider's event id} once resolved across providers
+        self.sources = sources
+
+    def copy(self) -> "Event":
+        """A shallow copy whose markets, match_id and sources can be replaced without touching this event"""
+        return Event(
+            self.match_id, self.sport, self.event_name, self.status, self.score, self.home, self.away,
+            self.competition, self.start_time, dict(self.markets), None if self.sources is None else dict(self.sources)
+        )
+
+    def content_key(self) -> tuple:
+        """Everything the stored row is built from, for change detection"""
+        return (
+            self.match_id, self.event_name, self.status, self.score, self.home, self.away,
+            self.competition, self.start_time,
+            tuple(market.content_key() for market in self.markets.values()),
+            tuple(sorted(self.sources.items())) if self.sources else None
+        )
+
+    def to_dict(self) -> Dict:
+        """Serialize to the row shape the database, delta feed and API use"""
+        participants, competition, score_keys = SPORT_FIELDS[self.sport]
+        score = self.score
+        if score_keys is not None and score is not None:
+            score = dict(zip(score_keys, score))
+        row = {
+            "match_id": self.match_id,
+            "event_name": self.event_name,
+            "status": self.status,
+            "score": score,
+            participants: {"home": self.home, "away": self.away},
+            competition: self.competition,
+            "start_time": self.start_time,
+            "odds": {name: market.price_map() for name, market in self.markets.items()},
+            "margins": {name: market.margin for name, market in self.markets.items() if market.margin is not None}
+        }
+        if self.sources is not None:
+            row["sources"] = dict(self.sources)
+        return row
@@ -0,0 +1,230 @@
+"""
+Batch odds normalization: provider payloads to decimal prices, implied
+probabilities and per-market bookmaker margins in one NumPy pass.
+"""
+
+import logging
+from array import array
+from typing import Dict, List
+import numpy as np
+from models import Market, intern_name
+
+logger = logging.getLogger(__name__)
+
+# Where each provider keeps markets, outcomes and prices in an odds payload.
+# price_format is "decimal", "fractional", "american" or "auto"; "auto"
+# treats "a/b" as fractional, a leading sign as American and anything else
+# as decimal.
+ODDS_SCHEMAS = {
+    # bet365 RapidAPI get_event_markets for soccer and basketball
+    "bet365": {
+        "markets": "markets",
+        "market_name": "name",
+        "outcomes": "outcomes",
+        "outcome_name": "name",
+        "price": "odds",
+        "price_format": "auto"
+    },
+    # bet365 RapidAPI tennis markets
+    "bet365_tennis": {
+        "markets": "markets",
+        "market_name": "marketName",
+        "outcomes": "outcomes",
+        "outcome_name": "outcomeName",
+        "price": "price",
+        "price_format": "auto"
+    },
+    # BetsAPI event/odds results
+    "betsapi": {
+        "markets": "markets",
+        "market_name": "marketName",
+        "outcomes": "outcomes",
+        "outcome_name": "outcomeName",
+        "price": "price",
+        "price_format": "auto"
+    }
+}
+
+def _to_float(values: np.ndarray) -> np.ndarray:
+    """Vectorized float parse, falling back per element only if some value is malformed"""
+    try:
+        return values.astype(np.float64)
+    except ValueError:
+        parsed = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                parsed[i] = float(value)
+            except ValueError:
+                pass
+        return parsed
+
+def to_decimal(raw_prices: List, price_format: str = "auto") -> np.ndarray:
+    """Convert raw prices in any supported format to decimal odds; invalid ones become NaN"""
+    text = np.array([str(price).strip() for price in raw_prices], dtype=str)
+    decimal = np.full(len(text), np.nan)
+    if not len(text):
+        return decimal
+
+    if price_format == "auto":
+        fractional = np.char.find(text, "/") >= 0
+        american = ~fractional & (np.char.startswith(text, "+") | np.char.startswith(text, "-"))
+    else:
+        fractional = np.full(len(text), price_format == "fractional")
+        american = np.full(len(text), price_format == "american")
+    plain = ~fractional & ~american
+
+    if fractional.any():
+        parts = np.char.partition(text[fractional], "/")
+        numerator = _to_float(parts[:, 0])
+        denominator = _to_float(parts[:, 2])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            decimal[fractional] = 1.0 + numerator / denominator
+
+    if american.any():
+        value = _to_float(text[american])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            decimal[american] = np.where(value > 0, 1.0 + value / 100.0, 1.0 + 100.0 / np.abs(value))
+
+    if plain.any():
+        decimal[plain] = _to_float(text[plain])
+
+    # Anything that is not a payable price is dropped
+    decimal[~np.isfinite(decimal) | (decimal <= 1.0)] = np.nan
+    return decimal
+
+class OddsBatch:
+    """Columnar result for every outcome in a cycle, with per-event dict views"""
+
+    def __init__(self, event_ids: List[str], market_names: List[str], market_event: np.ndarray,
+                 outcome_market: np.ndarray, outcome_names: List[str], decimal: np.ndarray):
+        self.event_ids = event_ids
+        self.market_names = market_names
+        self.market_event = market_event
+        self.outcome_market = outcome_market
+        self.outcome_names = outcome_names
+        self.decimal = decimal
+        self._derive()
+
+    def _derive(self):
+        valid = ~np.isnan(self.decimal)
+        self.implied_probability = np.where(valid, 1.0 / np.where(valid, self.decimal, 1.0), np.nan)
+        # Overround: summed implied probability of a market's outcomes minus one
+        self.margin = np.bincount(
+            self.outcome_market[valid], weights=self.implied_probability[valid], minlength=len(self.market_names)
+        ) - 1.0
+        self.valid = valid
+
+    def __getstate__(self) -> Dict:
+        # Batches cross process boundaries (see parse_pool); derived columns
+        # are cheaper to recompute than to pickle
+        return {
+            "event_ids": self.event_ids,
+            "market_names": self.market_names,
+            "market_event": self.market_event,
+            "outcome_market": self.outcome_market,
+            "outcome_names": self.outcome_names,
+            "decimal": self.decimal
+        }
+
+    def __setstate__(self, state: Dict):
+        # Names arrive as new strings; intern them like a local parse would
+        state["market_names"] = [intern_name(name) for name in state["market_names"]]
+        state["outcome_names"] = [intern_name(name) for name in state["outcome_names"]]
+        self.__dict__.update(state)
+        self._derive()
+
+    def __len__(self):
+        return len(self.decimal)
+
+    @property
+    def odds(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{event_id: {market: {outcome: decimal price}}}"""
+        result: Dict[str, Dict[str, Dict[str, float]]] = {event_id: {} for event_id in self.event_ids}
+        markets = [result[self.event_ids[event]] for event in self.market_event.tolist()]
+        prices = np.round(self.decimal, 4).tolist()
+        for market, outcome, price, valid in zip(self.outcome_market.tolist(), self.outcome_names,
+                                                 prices, self.valid.tolist()):
+            if valid:
+                markets[market].setdefault(self.market_names[market], {})[outcome] = price
+        return result
+
+    @property
+    def margins(self) -> Dict[str, Dict[str, float]]:
+        """{event_id: {market: bookmaker margin}} for markets with at least one valid price"""
+        priced = np.bincount(self.outcome_market[self.valid], minlength=len(self.market_names)) > 0
+        result: Dict[str, Dict[str, float]] = {event_id: {} for event_id in self.event_ids}
+        for market, (event, margin, has_prices) in enumerate(zip(
+                self.market_event.tolist(), np.round(self.margin, 4).tolist(), priced.tolist())):
+            if has_prices:
+                result[self.event_ids[event]][self.market_names[market]] = margin
+        return result
+
+    @property
+    def markets(self) -> Dict[str, Dict[str, Market]]:
+        """{event_id: {market name: Market}} for markets with at least one valid price"""
+        result: Dict[str, Dict[str, Market]] = {event_id: {} for event_id in self.event_ids}
+        valid = np.flatnonzero(self.valid)
+        # Outcomes are stored market by market, so each market is one slice
+        ends = np.cumsum(np.bincount(self.outcome_market[valid], minlength=len(self.market_names))).tolist()
+        prices = np.round(self.decimal[valid], 4)
+        margins = np.round(self.margin, 4).tolist()
+        positions = valid.tolist()
+        start = 0
+        for market, (event, end) in enumerate(zip(self.market_event.tolist(), ends)):
+            if end > start:
+                name = self.market_names[market]
+                result[self.event_ids[event]][name] = Market(
+                    name,
+                    tuple(self.outcome_names[position] for position in positions[start:end]),
+                    array("d", prices[start:end].tobytes()),
+                    margins[market]
+                )
+            start = end
+        return result
+
+class OddsEngine:
+    """Normalizes many events' odds payloads at once using a provider schema"""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.schema = ODDS_SCHEMAS[provider]
+
+    def normalize(self, raw_odds: Dict[str, Dict]) -> OddsBatch:
+        """Flatten {event_id: payload} into columns, then convert and score them together"""
+        schema = self.schema
+        event_ids: List[str] = []
+        market_names: List[str] = []
+        market_event: List[int] = []
+        outcome_market: List[int] = []
+        outcome_names: List[str] = []
+        raw_prices: List = []
+
+        for event_id, payload in raw_odds.items():
+            event_index = len(event_ids)
+            event_ids.append(event_id)
+            try:
+                for market in payload.get(schema["markets"]) or []:
+                    market_name = intern_name(market.get(schema["market_name"]))
+                    if not market_name:
+                        continue
+                    market_index = len(market_names)
+                    market_names.append(market_name)
+                    market_event.append(event_index)
+                    for outcome in market.get(schema["outcomes"]) or []:
+                        outcome_name = outcome.get(schema["outcome_name"])
+                        price = outcome.get(schema["price"])
+                        if outcome_name and price:
+                            outcome_market.append(market_index)
+                            outcome_names.append(intern_name(outcome_name))
+                            raw_prices.append(price)
+            except (AttributeError, TypeError) as e:
+                logger.error(f"Error parsing {self.provider} odds for event {event_id}: {str(e)}")
+
+        return OddsBatch(
+            event_ids,
+            market_names,
+            np.array(market_event, dtype=np.int64),
+            np.array(outcome_market, dtype=np.int64),
+            outcome_names,
+            to_decimal(raw_prices, schema["price_format"])
+        )
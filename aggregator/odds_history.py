@@ -0,0 +1,63 @@
+"""
+Derive per-outcome price movements from changed matches for the history tables.
+"""
+
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+from change_detector import ChangeSet
+
+logger = logging.getLogger(__name__)
+
+def flatten_odds(odds: Dict) -> Dict[Tuple[str, str], float]:
+    """{market: {outcome: price}} -> {(market, outcome): price}"""
+    return {
+        (market, outcome): price
+        for market, outcomes in (odds or {}).items()
+        for outcome, price in (outcomes or {}).items()
+    }
+
+class OddsHistoryRecorder:
+    """Appends one history row per match/market/outcome whose price moved.
+
+    The last known prices live in memory, so the first cycle after a restart
+    records every current price once as its opening row.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._prices: Dict[str, Dict[str, Dict[Tuple[str, str], float]]] = {}
+        self._lock = threading.Lock()
+
+    def movements(self, changes: ChangeSet, ts: datetime) -> Tuple[List[tuple], Dict]:
+        """Return (history rows, updated price map) for a ChangeSet"""
+        with self._lock:
+            previous = self._prices.get(changes.sport, {})
+
+        # Keep only matches still present this cycle
+        prices = {match_id: previous[match_id] for match_id in changes.hashes if match_id in previous}
+        rows = []
+        for match in changes.new + changes.changed:
+            match_id = match.get("match_id")
+            current = flatten_odds(match.get("odds"))
+            before = previous.get(match_id, {})
+            for key in current.keys() | before.keys():
+                price = current.get(key)
+                if price != before.get(key):
+                    # A vanished outcome is recorded as a NULL price
+                    rows.append((match_id, key[0], key[1], None if price is None else float(price), ts))
+            prices[match_id] = current
+        return rows, prices
+
+    def record(self, changes: ChangeSet) -> int:
+        """Store the price movements in a ChangeSet; returns the number of rows written"""
+        rows, prices = self.movements(changes, datetime.now(timezone.utc))
+        if not self.db.store_odds_history(changes.sport, rows):
+            return 0
+
+        with self._lock:
+            self._prices[changes.sport] = prices
+        if rows:
+            logger.info(f"Recorded {len(rows)} {changes.sport} price movements")
+        return len(rows)
@@ -0,0 +1,175 @@
+"""
+Odds parsing in worker processes, fed by the fetch threads through a bounded queue.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from config import PARSE_CONFIG
+from fanout import get_executor
+from metrics import PARSE_BACKPRESSURE_SECONDS, PARSE_BATCH_SIZE, PARSE_QUEUE_DEPTH, PIPELINE_STAGE_SECONDS
+from models import Market
+from odds_engine import OddsBatch, OddsEngine
+
+logger = logging.getLogger(__name__)
+
+# One engine per schema in each parser process
+_engines: Dict[str, OddsEngine] = {}
+
+def parse_batch(schema: str, decode: Callable[[bytes], Optional[Dict]],
+                bodies: List[Tuple[str, bytes]]) -> Tuple[OddsBatch, float]:
+    """Decode a batch of odds bodies and normalize them together; runs in a parser process.
+
+    Returns the columnar batch, which pickles compactly, and the seconds spent.
+    """
+    started = time.perf_counter()
+    raw_odds = {}
+    for key, body in bodies:
+        odds = decode(body)
+        if odds:
+            raw_odds[key] = odds
+    engine = _engines.get(schema)
+    if engine is None:
+        engine = _engines[schema] = OddsEngine(schema)
+    return engine.normalize(raw_odds), time.perf_counter() - started
+
+class ParsePool:
+    """Decodes and normalizes odds bodies in worker processes while the fetch threads keep fetching.
+
+    Fetch threads put each raw body on a bounded queue. The calling thread
+    groups them into batches of batch_size, or whatever arrived within
+    batch_wait, and sends each batch to the pool as one task, so pickling
+    costs one round trip per batch instead of one per body. Both stages are
+    bounded: when the parsers fall behind, batching waits for a free slot, the
+    queue fills up and fetch threads block before fetching more.
+    """
+
+    def __init__(self, workers: int = None, config: Dict = None):
+        self.config = PARSE_CONFIG if config is None else config
+        self.workers = self.config["workers"] if workers is None else workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Batches in the pool across all sports
+        self._slots = threading.BoundedSemaphore(self.workers * self.config["pending_batches"])
+        self._queued = PARSE_QUEUE_DEPTH.labels("queued")
+        self._parsing = PARSE_QUEUE_DEPTH.labels("parsing")
+        self._queue_blocked = PARSE_BACKPRESSURE_SECONDS.labels("queued")
+        self._pool_blocked = PARSE_BACKPRESSURE_SECONDS.labels("parsing")
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process whose fetch threads hold locks could
+                # deadlock the child, so workers start fresh
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Drop a broken pool; the next cycle starts a new one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, executor: ProcessPoolExecutor, sport: str, schema: str,
+                decode: Callable[[bytes], Optional[Dict]], batch: List[Tuple[str, bytes]]) -> Optional[Future]:
+        started = time.perf_counter()
+        self._slots.acquire()
+        self._pool_blocked.inc(time.perf_counter() - started)
+        try:
+            future = executor.submit(parse_batch, schema, decode, batch)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._slots.release()
+            logger.error(f"Error sending {len(batch)} {sport} odds bodies to the parse pool: {str(e)}")
+            self._discard(executor)
+            return None
+        self._parsing.inc()
+        PARSE_BATCH_SIZE.labels(sport).observe(len(batch))
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future: Future):
+        self._parsing.dec()
+        self._slots.release()
+
+    def fetch_odds(self, sport: str, provider: str, fetcher, keys: Iterable[str],
+                   schema: str) -> Dict[str, Dict[str, Market]]:
+        """Fetch the keys' odds bodies on the provider's fetch threads and parse them in the pool.
+
+        fetcher provides fetch_odds_body(key) and a picklable decode_odds(body).
+        Returns {key: {market name: Market}} for every key whose body was
+        fetched and decoded, like parse_odds_batch(...).markets would.
+        """
+        unique_keys = list(dict.fromkeys(key for key in keys if key))
+        if not unique_keys:
+            return {}
+        bodies = queue.Queue(self.config["queue_size"])
+
+        def fetch(key: str):
+            body = None
+            try:
+                body = fetcher.fetch_odds_body(key)
+            except Exception as e:
+                logger.error(f"Error fetching {sport} odds for {key}: {str(e)}")
+            finally:
+                # Blocks while the queue is full: the backpressure on fetching
+                started = time.perf_counter()
+                bodies.put((key, body))
+                self._queue_blocked.inc(time.perf_counter() - started)
+                self._queued.inc()
+
+        fetch_executor = get_executor(provider)
+        for key in unique_keys:
+            fetch_executor.submit(fetch, key)
+
+        executor = self.executor()
+        batch_size = self.config["batch_size"]
+        futures = []
+        batch: List[Tuple[str, bytes]] = []
+        received = 0
+        while received < len(unique_keys):
+            try:
+                key, body = bodies.get(timeout=self.config["batch_wait"] if batch else None)
+            except queue.Empty:
+                # Nothing more arrived in time; do not hold a partial batch back
+                futures.append(self._submit(executor, sport, schema, fetcher.decode_odds, batch))
+                batch = []
+                continue
+            received += 1
+            self._queued.dec()
+            if body:
+                batch.append((key, body))
+            if len(batch) >= batch_size:
+                futures.append(self._submit(executor, sport, schema, fetcher.decode_odds, batch))
+                batch = []
+        if batch:
+            futures.append(self._submit(executor, sport, schema, fetcher.decode_odds, batch))
+
+        markets: Dict[str, Dict[str, Market]] = {}
+        for future in futures:
+            if future is None:
+                continue
+            try:
+                odds_batch, seconds = future.result()
+            except BrokenProcessPool as e:
+                logger.error(f"Parse pool failed while parsing {sport} odds: {str(e)}")
+                self._discard(executor)
+                continue
+            except Exception as e:
+                logger.error(f"Error parsing a batch of {sport} odds: {str(e)}")
+                continue
+            PIPELINE_STAGE_SECONDS.labels(sport, "parse_batch").observe(seconds)
+            markets.update(odds_batch.markets)
+        logger.info(f"Parsed odds of {len(markets)}/{len(unique_keys)} {sport} matches in {len(futures)} batches")
+        return markets
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
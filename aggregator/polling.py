@@ -0,0 +1,302 @@
+"""
+Adaptive per-match odds polling within a provider request budget.
+"""
+
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config import ADAPTIVE_POLLING_CONFIG, PIPELINE_CONFIG, PREMATCH_CONFIG, RATE_LIMITS
+from metrics import ODDS_POLL_INTERVAL, ODDS_POLLS_DEFERRED
+from models import Event, Market
+
+logger = logging.getLogger(__name__)
+
+class MatchState:
+    """What the poller knows about one match between polls"""
+    __slots__ = ("markets", "last_polled", "last_changed", "volatility", "score", "score_changed",
+                 "last_attempted", "awaiting", "failures")
+
+    def __init__(self):
+        self.markets: Dict[str, Market] = {}
+        self.last_polled: Optional[float] = None
+        self.last_changed: Optional[float] = None
+        # Moving average of the mean relative price move per minute
+        self.volatility = 0.0
+        self.score: Any = None
+        self.score_changed: Optional[float] = None
+        # When due() last handed the match out, whether update() has yet to
+        # see that poll, and how many polls in a row brought nothing back
+        self.last_attempted: Optional[float] = None
+        self.awaiting = False
+        self.failures = 0
+
+def price_movement(old: Dict[str, Market], new: Dict[str, Market]) -> Optional[float]:
+    """Mean relative price move across outcomes both snapshots have, None if there are none"""
+    total = 0.0
+    compared = 0
+    for name, market in new.items():
+        previous = old.get(name)
+        if previous is None or previous.outcome_names != market.outcome_names:
+            continue
+        for before, after in zip(previous.prices, market.prices):
+            if before > 0:
+                total += abs(after - before) / before
+                compared += 1
+    return total / compared if compared else None
+
+def provider_rpm(provider: str) -> float:
+    """A provider's whole RATE_LIMITS quota in requests per minute, spread over the day if it has a daily one"""
+    limits = RATE_LIMITS[provider]
+    return limits["per_day"] / 1440.0 if limits.get("per_day") else limits["per_second"] * 60.0
+
+def budget_rpm_for(sport: str, provider: str, config: Dict = None) -> float:
+    """A sport's weighted slice of the daily_share of a provider's RATE_LIMITS, in requests per minute"""
+    config = ADAPTIVE_POLLING_CONFIG if config is None else config
+    per_minute = provider_rpm(provider)
+    weights = [sport_weights[provider] for sport_weights in config["sport_weights"].values() if provider in sport_weights]
+    return per_minute * config["daily_share"] * config["sport_weights"][sport][provider] / sum(weights)
+
+def prematch_budget_rpm(sport: str, provider: str = "bet365", config: Dict = None) -> float:
+    """A sport's even slice of the part of a provider's RATE_LIMITS live polling leaves, in requests per minute"""
+    config = PREMATCH_CONFIG if config is None else config
+    per_minute = provider_rpm(provider)
+    return per_minute * (1 - ADAPTIVE_POLLING_CONFIG["daily_share"]) / len(config["leagues"])
+
+def stretch_exponent(heat: float) -> float:
+    """Share of an over-budget stretch a match takes: all of it when cold, half (in log terms) when hot"""
+    return 1.0 - 0.5 * heat
+
+class AdaptivePoller:
+    """Chooses which matches' odds one sport fetches from one provider each tick.
+
+    Each match gets an interval between min_interval and max_interval from its
+    heat: recent price volatility (fading while prices stand still), a recent
+    score change and its market count. When the intervals add up to more than
+    the budget, they are stretched by a common factor s: cold matches by s,
+    the hottest by its square root, so the budget squeezes cold matches much
+    harder without starving them. Per tick the poller spends what the budget accrued since the last
+    tick, less the event list polled every events_interval, on the most overdue matches first.
+
+    Matches not polled on a tick keep the markets from their last poll. A
+    poll that brings nothing back is retried after min_interval, doubling
+    with each further failure up to max_interval.
+    """
+
+    def __init__(self, sport: str, provider: str, budget_rpm: float = None, tick: float = None,
+                 events_interval: float = None, clock: Callable[[], float] = time.monotonic, config: Dict = None):
+        self.sport = sport
+        self.provider = provider
+        self.config = ADAPTIVE_POLLING_CONFIG if config is None else config
+        self.enabled = self.config["enabled"]
+        self.budget_rpm = budget_rpm_for(sport, provider, self.config) if budget_rpm is None else budget_rpm
+        self.tick = PIPELINE_CONFIG[sport]["interval"] if tick is None else tick
+        self.events_interval = PIPELINE_CONFIG[sport]["events_interval"] if events_interval is None else events_interval
+        # Fraction of the budget this process may spend, below 1 when sharded
+        self.share = 1.0
+        if self.enabled:
+            if self.budget_rpm <= 60.0 / self.events_interval:
+                logger.warning(
+                    f"{sport} {provider} budget of {self.budget_rpm:.1f} rpm is used up by the event list alone; "
+                    f"odds will not be polled"
+                )
+            else:
+                logger.info(
+                    f"{sport} {provider}: {self.odds_rpm:.1f} odds rpm keep at most "
+                    f"{self.capacity():.0f} live matches within max_interval"
+                )
+        self.clock = clock
+        self.states: Dict[str, MatchState] = {}
+        self._allowance = 0.0
+        self._last_due: Optional[float] = None
+        self.stretch = 1.0
+        self._over_capacity = False
+        self._interval_metric = ODDS_POLL_INTERVAL.labels(sport, provider)
+        self._deferred_metric = ODDS_POLLS_DEFERRED.labels(sport, provider)
+
+    @property
+    def odds_rpm(self) -> float:
+        """This process's share of the requests per minute left after polling the event list every events_interval"""
+        return max(self.budget_rpm - 60.0 / self.events_interval, 0.0) * self.share
+
+    def capacity(self) -> float:
+        """Live matches odds_rpm can poll once per max_interval each"""
+        return self.odds_rpm * self.config["max_interval"] / 60.0
+
+    def check_capacity(self, live: int):
+        """Warn when there are more live matches than the budget polls within max_interval, once per episode"""
+        over = live > self.capacity()
+        if over and not self._over_capacity:
+            logger.warning(
+                f"{live} live {self.sport} matches exceed the {self.capacity():.0f} that {self.odds_rpm:.1f} "
+                f"{self.provider} odds rpm poll within max_interval; the coldest wait longer"
+            )
+        elif self._over_capacity and not over:
+            logger.info(f"{live} live {self.sport} matches fit the {self.provider} odds budget again")
+        self._over_capacity = over
+
+    def heat(self, state: MatchState, now: float) -> float:
+        """0 for a cold match up to 1 for one that should be polled at min_interval"""
+        config = self.config
+        volatility_heat = min(state.volatility / config["volatility_scale"], 1.0)
+        if state.last_changed is not None:
+            volatility_heat *= 0.5 ** ((now - state.last_changed) / config["idle_half_life"])
+        score_heat = 0.0
+        if state.score_changed is not None:
+            score_heat = max(1.0 - (now - state.score_changed) / config["score_window"], 0.0)
+        market_weight = min(len(state.markets) / config["full_market_count"], 1.0)
+        return max(volatility_heat, score_heat) * (0.5 + 0.5 * market_weight)
+
+    def interval(self, heat: float) -> float:
+        """Geometric interpolation from max_interval (heat 0) to min_interval (heat 1)"""
+        low, high = self.config["min_interval"], self.config["max_interval"]
+        return high * (low / high) ** heat
+
+    def fit_budget(self, schedule: List[Tuple[float, float]]) -> float:
+        """Stretch s such that each interval scaled by s ** stretch_exponent(heat) fits the odds budget.
+
+        schedule holds (interval, heat) pairs. The per-tick allowance in due()
+        caps the spend regardless, e.g. while new matches get their first poll.
+        """
+        capacity = self.odds_rpm
+
+        def demand(stretch: float) -> float:
+            return sum(60.0 / (interval * stretch ** stretch_exponent(heat)) for interval, heat in schedule)
+
+        if capacity <= 0 or demand(1.0) <= capacity:
+            return 1.0
+        low, high = 1.0, 2.0
+        while demand(high) > capacity and high < 1e4:
+            low, high = high, high * 2
+        for _ in range(20):
+            middle = (low + high) / 2
+            if demand(middle) > capacity:
+                low = middle
+            else:
+                high = middle
+        return high
+
+    def backoff(self, failures: int) -> float:
+        """Seconds before retrying a match whose last failures polls brought nothing back"""
+        return min(self.config["min_interval"] * 2 ** (failures - 1), self.config["max_interval"])
+
+    def due(self, match_ids: List[str]) -> List[str]:
+        """Match ids to fetch odds for on this tick"""
+        if not self.enabled:
+            return list(match_ids)
+
+        self.check_capacity(len(match_ids))
+        now = self.clock()
+        elapsed = self.tick if self._last_due is None else max(now - self._last_due, 0.0)
+        self._last_due = now
+        # Unspent budget carries over for at most a few ticks
+        per_second = self.odds_rpm / 60.0
+        self._allowance = min(self._allowance + per_second * elapsed, per_second * self.tick * 3)
+
+        candidates = []
+        scheduled = []
+        for match_id in match_ids:
+            state = self.states.get(match_id)
+            if state is not None and state.failures and now - state.last_attempted < self.backoff(state.failures):
+                continue
+            if state is None or state.last_polled is None:
+                # Never polled: ahead of everything else
+                candidates.append((math.inf, match_id))
+                continue
+            heat = self.heat(state, now)
+            scheduled.append((match_id, state, self.interval(heat), heat))
+
+        self.stretch = self.fit_budget([(interval, heat) for _, _, interval, heat in scheduled])
+        for match_id, state, interval, heat in scheduled:
+            overdue = (now - state.last_polled) / (interval * self.stretch ** stretch_exponent(heat))
+            if overdue >= 1.0:
+                candidates.append((overdue, match_id))
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        take = min(int(self._allowance), len(candidates))
+        self._allowance -= take
+        if len(candidates) > take:
+            self._deferred_metric.inc(len(candidates) - take)
+        taken = [match_id for _, match_id in candidates[:take]]
+        for match_id in taken:
+            state = self.states.setdefault(match_id, MatchState())
+            state.last_attempted = now
+            state.awaiting = True
+        return taken
+
+    def seed(self, markets: Dict[str, Dict[str, Market]]):
+        """Start matches handed over from prematch with their last prematch markets.
+
+        They are still polled first; until then they show the prematch odds
+        instead of none.
+        """
+        if not self.enabled:
+            return
+        for match_id, match_markets in markets.items():
+            if match_id not in self.states:
+                state = MatchState()
+                state.markets = match_markets
+                self.states[match_id] = state
+
+    def update(self, events: List[Event], fresh: Dict[str, Dict[str, Market]]) -> Dict[str, Dict[str, Market]]:
+        """Learn from this tick's events and fetched markets; return markets for every event.
+
+        Events whose odds were not fetched (or failed) get their last known
+        markets. Matches no longer listed are forgotten.
+        """
+        if not self.enabled:
+            return fresh
+
+        now = self.clock()
+        states = {}
+        markets = {}
+        for event in events:
+            match_id = event.match_id
+            state = self.states.get(match_id) or MatchState()
+            states[match_id] = state
+
+            if state.score is not None and event.score is not None and event.score != state.score:
+                state.score_changed = now
+            if event.score is not None:
+                state.score = event.score
+
+            new_markets = fresh.get(match_id)
+            if new_markets is not None:
+                self._observe(state, new_markets, now)
+                state.failures = 0
+            elif state.awaiting:
+                # Failed or empty; backs off in due() rather than staying first in line
+                state.failures += 1
+            state.awaiting = False
+            markets[match_id] = state.markets
+
+        self.states = states
+        return markets
+
+    def _observe(self, state: MatchState, new_markets: Dict[str, Market], now: float):
+        if state.last_polled is None:
+            state.last_changed = now
+        else:
+            movement = price_movement(state.markets, new_markets)
+            minutes = max(now - state.last_polled, self.tick) / 60.0
+            sample = (movement or 0.0) / minutes
+            smoothing = self.config["volatility_smoothing"]
+            state.volatility = smoothing * sample + (1 - smoothing) * state.volatility
+            if movement or new_markets.keys() != state.markets.keys():
+                state.last_changed = now
+            self._interval_metric.observe(now - state.last_polled)
+        state.markets = new_markets
+        state.last_polled = now
+
+    def stats(self) -> Dict:
+        now = self.clock()
+        heats = [self.heat(state, now) for state in self.states.values()]
+        intervals = sorted(self.interval(heat) * self.stretch ** stretch_exponent(heat) for heat in heats)
+        return {
+            "matches": len(intervals),
+            "odds_rpm": self.odds_rpm,
+            "stretch": round(self.stretch, 2),
+            "demand_rpm": round(sum(60.0 / interval for interval in intervals), 1),
+            "min_interval": round(intervals[0], 1) if intervals else None,
+            "median_interval": round(intervals[len(intervals) // 2], 1) if intervals else None
+        }
@@ -0,0 +1,235 @@
+"""
+Upcoming fixtures and their prematch odds, refreshed incrementally.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from config import PIPELINE_CONFIG, PREMATCH_CONFIG
+from change_detector import content_hash
+from fanout import fan_out
+from metrics import stage_timer
+from models import Event, Market, start_epoch
+from polling import prematch_budget_rpm
+from streaming import stream_complete
+
+logger = logging.getLogger(__name__)
+
+# Key of the fixture list fetched without a league filter
+ALL_LEAGUES = ""
+
+class PrematchEntry:
+    """One upcoming fixture with the odds from its last prematch poll"""
+    __slots__ = ("event", "league", "start", "markets", "fetched_at", "stored_hash")
+
+    def __init__(self, event: Event, league: str):
+        self.event = event
+        self.league = league
+        self.start = start_epoch(event.start_time)
+        self.markets: Dict[str, Market] = {}
+        self.fetched_at: Optional[float] = None
+        self.stored_hash: Optional[str] = None
+
+class PrematchTracker:
+    """Keeps one sport's upcoming fixtures and prematch odds current on a small request budget.
+
+    Each cycle refreshes only the league fixture lists older than
+    events_interval, and fetches prematch odds only for new fixtures and for
+    ones whose cached odds outlived their TTL, which shrinks as kickoff nears.
+    Odds fetches spend what the sport's prematch budget (prematch_budget_rpm,
+    less the fixture lists) accrued since the last cycle; the rest wait.
+    Only fixtures whose content changed are written. When the in-play
+    pipeline sees a fixture go live, handover() passes its last prematch
+    markets on and stops tracking it.
+    """
+
+    def __init__(self, sport: str, fetcher, parser, db, config: Dict = None, budget_rpm: float = None,
+                 clock: Callable[[], float] = time.time):
+        self.sport = sport
+        self.fetcher = fetcher
+        self.parser = parser
+        self.db = db
+        self.config = PREMATCH_CONFIG if config is None else config
+        self.clock = clock
+        self.leagues = self.config["leagues"].get(sport) or [ALL_LEAGUES]
+        self.budget_rpm = prematch_budget_rpm(sport, config=self.config) if budget_rpm is None else budget_rpm
+        self.cycle = PIPELINE_CONFIG["prematch"]["interval"]
+        if self.odds_rpm <= 0:
+            logger.warning(
+                f"{sport} prematch budget of {self.budget_rpm:.1f} rpm is used up by the fixture lists alone; "
+                f"prematch odds will not be fetched"
+            )
+        self._allowance = 0.0
+        self._last_refresh: Optional[float] = None
+        self.entries: Dict[str, PrematchEntry] = {}
+        self._league_refreshed: Dict[str, float] = {}
+        # Fixtures whose rows still need deleting
+        self._removed: List[str] = []
+        # {match_id: handover time} of fixtures now owned by the in-play pipeline
+        self._live: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def odds_rpm(self) -> float:
+        """Requests per minute left for odds after refreshing every league's fixture list each events_interval"""
+        return max(self.budget_rpm - len(self.leagues) * 60.0 / self.config["events_interval"], 0.0)
+
+    def odds_ttl(self, seconds_to_start: Optional[float]) -> float:
+        """How long odds stay fresh at this distance from kickoff; unknown starts get the longest TTL"""
+        tiers = self.config["odds_ttl"]
+        if seconds_to_start is None:
+            return tiers[0][1]
+        for threshold, ttl in tiers:
+            if seconds_to_start >= threshold:
+                return ttl
+        return tiers[-1][1]
+
+    def handover(self, live_ids: List[str]) -> Dict[str, Dict[str, Market]]:
+        """Stop tracking fixtures that are now in-play; return {match_id: last prematch markets}"""
+        handed_over = {}
+        now = self.clock()
+        with self._lock:
+            for match_id in live_ids:
+                entry = self.entries.pop(match_id, None)
+                if entry is not None:
+                    handed_over[match_id] = entry.markets
+                    self._removed.append(match_id)
+                    self._live[match_id] = now
+        if handed_over:
+            logger.info(f"Handed {len(handed_over)} {self.sport} matches over to the in-play pipeline")
+        return handed_over
+
+    def refresh_events(self, now: float):
+        """Re-fetch the fixture lists of leagues not refreshed within events_interval"""
+        for league in self.leagues:
+            if now - self._league_refreshed.get(league, float("-inf")) < self.config["events_interval"]:
+                continue
+            raw_events = self.fetcher.fetch_prematch_events(league or None)
+            if raw_events is None:
+                # Keep what we have; the league is retried next cycle
+                continue
+            events = self.parser.parse_events(raw_events)
+            complete = stream_complete(raw_events)
+            if complete:
+                self._league_refreshed[league] = now
+
+            listed = set()
+            with self._lock:
+                for event in events:
+                    if not event.match_id:
+                        continue
+                    listed.add(event.match_id)
+                    if event.match_id in self._live:
+                        # Still listed as a fixture, but already in-play
+                        continue
+                    entry = self.entries.get(event.match_id)
+                    if entry is None:
+                        self.entries[event.match_id] = PrematchEntry(event, league)
+                        continue
+                    # Fresh fixture details, cached odds
+                    entry.event = event
+                    entry.league = league
+                    entry.start = start_epoch(event.start_time)
+                if not complete:
+                    # A cut-short list says nothing about the fixtures after the cut
+                    continue
+                for match_id, entry in list(self.entries.items()):
+                    if entry.league == league and match_id not in listed:
+                        del self.entries[match_id]
+                        self._removed.append(match_id)
+
+    def due_odds(self, now: float) -> List[str]:
+        """Fixtures needing odds: never fetched first, then expired ones soonest kickoff first, as many as the budget allows"""
+        elapsed = self.cycle if self._last_refresh is None else max(now - self._last_refresh, 0.0)
+        self._last_refresh = now
+        # Unspent budget carries over for at most a few cycles
+        per_second = self.odds_rpm / 60.0
+        self._allowance = min(self._allowance + per_second * elapsed, per_second * self.cycle * 3)
+
+        new, expired = [], []
+        with self._lock:
+            for match_id, entry in self.entries.items():
+                if entry.fetched_at is None:
+                    new.append((entry.start or float("inf"), match_id))
+                    continue
+                seconds_to_start = None if entry.start is None else entry.start - now
+                if now - entry.fetched_at >= self.odds_ttl(seconds_to_start):
+                    expired.append((entry.start or float("inf"), match_id))
+        due = [match_id for _, match_id in sorted(new) + sorted(expired)]
+        take = min(int(self._allowance), self.config["max_odds_per_cycle"], len(due))
+        self._allowance -= take
+        return due[:take]
+
+    def refresh(self):
+        """One prematch cycle: fixture lists, due odds, then changed rows"""
+        now = self.clock()
+        with stage_timer(self.sport, "prematch_events"):
+            self.refresh_events(now)
+
+        with self._lock:
+            for match_id, entry in list(self.entries.items()):
+                if entry.start is not None and now - entry.start > self.config["drop_after"]:
+                    # Kicked off long ago and never seen in-play
+                    del self.entries[match_id]
+                    self._removed.append(match_id)
+            self._live = {
+                match_id: handed_at for match_id, handed_at in self._live.items()
+                if now - handed_at <= self.config["drop_after"]
+            }
+
+        due = self.due_odds(now)
+        with stage_timer(self.sport, "prematch_odds"):
+            raw_odds = fan_out("bet365", self.fetcher.fetch_prematch_odds, due)
+            markets = self.parser.parse_odds_batch(raw_odds).markets
+
+        rows = []
+        with self._lock:
+            for match_id in due:
+                entry = self.entries.get(match_id)
+                if entry is None:
+                    continue
+                if match_id in raw_odds:
+                    entry.markets = markets.get(match_id, {})
+                    entry.fetched_at = now
+            for entry in self.entries.values():
+                entry.event.markets = entry.markets
+                digest = content_hash(entry.event)
+                if digest != entry.stored_hash:
+                    rows.append((entry, digest))
+            removed, self._removed = self._removed, []
+
+        with stage_timer(self.sport, "prematch_store"):
+            if self.db.store_prematch(self.sport, [self._row(entry.event, entry.start) for entry, _ in rows]):
+                for entry, digest in rows:
+                    entry.stored_hash = digest
+            if removed:
+                try:
+                    self.db.delete_prematch(self.sport, removed)
+                except Exception as e:
+                    logger.error(f"Error removing {len(removed)} {self.sport} prematch rows: {str(e)}")
+                    with self._lock:
+                        self._removed.extend(removed)
+
+        logger.info(
+            f"Prematch {self.sport}: {len(self.entries)} fixtures, {len(raw_odds)}/{len(due)} odds fetched, "
+            f"{len(rows)} written, {len(removed)} removed"
+        )
+
+    @staticmethod
+    def _row(event: Event, start: Optional[float]) -> Dict:
+        return {
+            "match_id": event.match_id,
+            "event_name": event.event_name,
+            "competition": event.competition,
+            "start_time": None if start is None else datetime.fromtimestamp(start, timezone.utc),
+            "odds": {name: market.price_map() for name, market in event.markets.items()}
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "fixtures": len(self.entries),
+                "without_odds": sum(1 for entry in self.entries.values() if entry.fetched_at is None)
+            }
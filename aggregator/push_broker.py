@@ -0,0 +1,156 @@
+"""
+In-process broker fanning applied odds deltas out to push subscribers.
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Set
+from config import PUSH_CONFIG
+from delta_feed import DeltaBuffer, coalesce_deltas
+
+logger = logging.getLogger(__name__)
+
+def filter_delta(delta: Dict, match_id: str = None, market: str = None) -> Optional[Dict]:
+    """Narrow a delta to one match and/or market; None if nothing is left"""
+    def keep(row):
+        return match_id is None or row["match_id"] == match_id
+
+    def markets(odds):
+        return odds if market is None else {name: outcomes for name, outcomes in odds.items() if name == market}
+
+    added = [{**row, "odds": markets(row.get("odds") or {})} for row in delta["added"] if keep(row)]
+    changed = []
+    for entry in delta["changed"]:
+        if not keep(entry):
+            continue
+        entry = {**entry, "odds": markets(entry["odds"])}
+        if market is not None:
+            entry["removed_markets"] = [name for name in entry["removed_markets"] if name == market]
+            if not entry["odds"] and not entry["removed_markets"]:
+                continue
+        changed.append(entry)
+    removed = [removed_id for removed_id in delta["removed"] if match_id is None or removed_id == match_id]
+
+    if not (added or changed or removed):
+        return None
+    return {"added": added, "changed": changed, "removed": removed}
+
+class Subscription:
+    """One client's coalesced backlog.
+
+    Updates arriving faster than the client reads them are folded into a
+    single pending delta, so a slow consumer costs memory proportional to the
+    matches it follows, not to the number of updates.
+    """
+
+    def __init__(self, sport: str, match_id: str = None, market: str = None):
+        self.sport = sport
+        self.match_id = match_id
+        self.market = market
+        self.version = 0
+        self.coalesced = 0
+        self._resync = False
+        self._pending: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def push(self, version: int, delta: Dict):
+        delta = filter_delta(delta, self.match_id, self.market)
+        if delta is None:
+            return
+        with self._lock:
+            if self._pending is None:
+                self._pending = delta
+            else:
+                self._pending = coalesce_deltas([self._pending, delta])
+                self.coalesced += 1
+            self.version = version
+        self._ready.set()
+
+    def resync(self, version: int):
+        """Tell the client its backlog was lost and it should reload the snapshot"""
+        with self._lock:
+            self._pending = None
+            self._resync = True
+            self.version = version
+        self._ready.set()
+
+    def wait(self, timeout: float) -> Optional[Dict]:
+        """Block until updates are pending; returns them with their version, or None on timeout"""
+        if not self._ready.wait(timeout):
+            return None
+        with self._lock:
+            pending, self._pending = self._pending, None
+            resync, self._resync = self._resync, False
+            self._ready.clear()
+            version = self.version
+        if resync:
+            return {"version": version, "resync": True}
+        if pending is None:
+            return None
+        return {"version": version, **pending}
+
+class PushBroker:
+    """Publishes each new delta from a DeltaBuffer to the matching subscriptions"""
+
+    def __init__(self, deltas: DeltaBuffer, max_subscribers: int = None):
+        self.deltas = deltas
+        self.max_subscribers = PUSH_CONFIG["max_subscribers"] if max_subscribers is None else max_subscribers
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._count = 0
+        self.published = 0
+
+    def subscribe(self, sport: str, match_id: str = None, market: str = None) -> Optional[Subscription]:
+        """Register a subscription, or return None when the broker is full"""
+        if sport not in self._versions:
+            # Start the sport's stream at the current version so the next
+            # update is published rather than used to find our place
+            self._versions[sport] = self.deltas.since(sport, None)[0]
+
+        subscription = Subscription(sport, match_id, market)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            self._subscriptions.setdefault(sport, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.sport, set())
+            if subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+
+    def on_update(self, sport: str):
+        """LiveUpdateListener callback, subscribed after the DeltaBuffer"""
+        if sport not in self._versions:
+            return
+        latest, changes = self.deltas.since(sport, self._versions[sport])
+        self._versions[sport] = latest
+
+        with self._lock:
+            subscribers = list(self._subscriptions.get(sport, ()))
+        if changes is None:
+            # Missed more deltas than the buffer holds, e.g. across a reconnect
+            for subscription in subscribers:
+                subscription.resync(latest)
+            return
+        if not changes:
+            return
+
+        delta = coalesce_deltas(changes)
+        for subscription in subscribers:
+            subscription.push(latest, delta)
+        self.published += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "by_sport": {sport: len(subscribers) for sport, subscribers in self._subscriptions.items()},
+                "versions": dict(self._versions),
+                "published": self.published
+            }
@@ -0,0 +1,195 @@
+"""
+Token-bucket rate limiting and request prioritisation per API provider.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import requests
+from config import RATE_LIMITS
+from metrics import register_stats_source
+
+logger = logging.getLogger(__name__)
+
+# Lower value is served first when requests queue up for a token
+PRIORITY_EVENTS = 0
+PRIORITY_LIVE_ODDS = 1
+PRIORITY_PREMATCH = 2
+
+# Headers some providers use to report the quota left in the current window
+REMAINING_HEADERS = ("x-ratelimit-requests-remaining", "x-ratelimit-remaining")
+
+class BudgetExhausted(requests.exceptions.RequestException):
+    """Raised when a provider's daily request budget is used up"""
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+class TokenBucket:
+    """Classic token bucket; callers hold the owning limiter's lock"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until_token(self) -> float:
+        return max((1 - self.tokens) / self.rate, 0.0)
+
+class RateLimiter:
+    """Per-second token bucket plus daily budget, granting tokens in priority order.
+
+    The events_reserve fraction of the daily budget is kept for PRIORITY_EVENTS
+    requests, so event lists still refresh after odds polling has used up the rest.
+    """
+
+    def __init__(self, provider: str, per_second: float, burst: float, per_day: Optional[int] = None,
+                 events_reserve: float = 0.0):
+        self.provider = provider
+        self.bucket = TokenBucket(per_second, burst)
+        self.daily_limit = per_day
+        self.events_reserve = events_reserve
+        # Full provider quota, of which set_share() may grant this process a part
+        self.quota = (per_second, per_day)
+        self.daily_used = 0
+        self.day = datetime.now(timezone.utc).date()
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def _roll_day(self):
+        today = datetime.now(timezone.utc).date()
+        if today != self.day:
+            self.day = today
+            self.daily_used = 0
+
+    def acquire(self, priority: int = PRIORITY_PREMATCH):
+        """Block until a request may be sent; raises BudgetExhausted when the day's quota is gone"""
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._roll_day()
+                    if self.daily_limit and self.daily_used >= self._daily_allowance(priority):
+                        raise BudgetExhausted(f"{self.provider} daily request budget of {self.daily_limit} exhausted"
+                                              + ("" if priority <= PRIORITY_EVENTS else " outside the event-list reserve"))
+
+                    now = time.monotonic()
+                    wait = self.paused_until - now
+                    if wait <= 0 and self._waiters[0] == ticket:
+                        self.bucket.refill(now)
+                        if self.bucket.tokens >= 1:
+                            self.bucket.tokens -= 1
+                            self.daily_used += 1
+                            return
+                        wait = self.bucket.time_until_token()
+
+                    # Only the head of the queue waits on the clock; the rest
+                    # sleep until it takes its token and notifies them.
+                    self._cond.wait(timeout=wait if wait > 0 else None)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def _daily_allowance(self, priority: int) -> int:
+        """Requests of this priority the day's budget allows in total"""
+        if priority <= PRIORITY_EVENTS:
+            return self.daily_limit
+        return self.daily_limit - int(self.daily_limit * self.events_reserve)
+
+    def set_share(self, share: float):
+        """Use only this fraction of the provider quota, e.g. 1/N when N processes share it"""
+        per_second, per_day = self.quota
+        with self._cond:
+            self.bucket.refill(time.monotonic())
+            self.bucket.rate = per_second * share
+            self.daily_limit = int(per_day * share) if per_day else per_day
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold back every request for the given number of seconds"""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def observe(self, response: requests.Response) -> Optional[float]:
+        """Update limiter state from a response; returns its Retry-After delay if any"""
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if response.status_code == 429:
+            with self._cond:
+                self.throttled += 1
+            logger.warning(f"{self.provider} throttled the aggregator (Retry-After: {retry_after})")
+        if retry_after is not None and response.status_code in (429, 503):
+            self.pause(retry_after)
+
+        for header in REMAINING_HEADERS:
+            remaining = response.headers.get(header)
+            if remaining and remaining.isdigit() and self.daily_limit:
+                with self._cond:
+                    self.daily_used = max(self.daily_used, self.daily_limit - int(remaining))
+                break
+
+        return retry_after
+
+    def stats(self) -> Dict:
+        """Return remaining-budget metrics for this provider"""
+        with self._cond:
+            self.bucket.refill(time.monotonic())
+            return {
+                "tokens": round(self.bucket.tokens, 2),
+                "daily_limit": self.daily_limit,
+                "daily_remaining": self.daily_limit - self.daily_used if self.daily_limit else None,
+                "daily_reserved_for_events": int(self.daily_limit * self.events_reserve) if self.daily_limit else None,
+                "waiting": len(self._waiters),
+                "paused_for": round(max(self.paused_until - time.monotonic(), 0.0), 2),
+                "throttled": self.throttled
+            }
+
+_limiters: Dict[str, RateLimiter] = {}
+_lock = threading.Lock()
+
+def get_limiter(provider: str) -> RateLimiter:
+    """Return the process-wide RateLimiter for a provider, configured from RATE_LIMITS"""
+    with _lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limits = RATE_LIMITS[provider]
+            limiter = RateLimiter(provider, limits["per_second"], limits["burst"], limits.get("per_day"),
+                                  limits.get("events_reserve", 0.0))
+            _limiters[provider] = limiter
+        return limiter
+
+def budget_stats() -> Dict[str, Dict]:
+    """Return {provider: limiter stats} for every limiter created so far"""
+    with _lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.stats() for provider, limiter in limiters.items()}
+
+register_stats_source("rate_limits", budget_stats)
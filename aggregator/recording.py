@@ -0,0 +1,194 @@
+"""
+Capture of raw provider responses to compressed segments, and a transport
+that replays them.
+"""
+
+import base64
+import bisect
+import glob
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from config import RECORDING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = "segment-*.jsonl.gz"
+
+def replay_key(method: str, url: str) -> Tuple[str, str]:
+    """Request identity: method plus URL with redacted parameters dropped and the rest sorted"""
+    parts = urlsplit(url)
+    redacted = set(RECORDING_CONFIG["redact_params"])
+    query = sorted((name, value) for name, value in parse_qsl(parts.query) if name not in redacted)
+    return method.upper(), urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+def _body_fields(content: bytes) -> Dict[str, str]:
+    try:
+        return {"body": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(content).decode("ascii")}
+
+def _record_body(record: Dict) -> bytes:
+    if "body_b64" in record:
+        return base64.b64decode(record["body_b64"])
+    return record.get("body", "").encode("utf-8")
+
+def _raw_response(content: bytes, status: int, headers: Dict[str, str]) -> HTTPResponse:
+    """An already-decoded body wrapped so streaming readers can consume it like a live one"""
+    return HTTPResponse(body=io.BytesIO(content), headers=headers, status=status,
+                        preload_content=False, decode_content=False)
+
+class ResponseRecorder:
+    """Appends every response to gzip-compressed JSON-lines segments.
+
+    Each line holds the receive time, provider, method, redacted URL, status,
+    content type and body. Segments are named by start time and pid, so
+    several processes can record into one directory.
+    """
+
+    def __init__(self, directory: str = None, segment_bytes: int = None, segment_seconds: float = None):
+        self.directory = RECORDING_CONFIG["directory"] if directory is None else directory
+        self.segment_bytes = RECORDING_CONFIG["segment_bytes"] if segment_bytes is None else segment_bytes
+        self.segment_seconds = RECORDING_CONFIG["segment_seconds"] if segment_seconds is None else segment_seconds
+        self._file = None
+        self._path = None
+        self._opened_at = 0.0
+        self._flushed_at = 0.0
+        self._written = 0
+        self._lock = threading.Lock()
+        self.records = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _open(self, now: float):
+        stamp = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self._path = os.path.join(self.directory, f"segment-{stamp}-{os.getpid()}.jsonl.gz")
+        self._file = gzip.open(self._path, "ab")
+        self._opened_at = self._flushed_at = now
+        self._written = 0
+        logger.info(f"Recording provider responses to {self._path}")
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, provider: str, response: requests.Response):
+        """Write a response; its body is buffered, and re-exposed on response.raw for streaming readers"""
+        content = response.content
+        response.raw = _raw_response(content, response.status_code, {})
+        line = json.dumps({
+            "ts": time.time(),
+            "provider": provider,
+            "method": response.request.method,
+            "url": replay_key(response.request.method, response.url)[1],
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type"),
+            **_body_fields(content)
+        }, separators=(",", ":")).encode("utf-8") + b"\n"
+
+        with self._lock:
+            now = time.time()
+            if self._file is not None and (self._written >= self.segment_bytes
+                                           or now - self._opened_at >= self.segment_seconds):
+                self._close()
+            if self._file is None:
+                self._open(now)
+            self._file.write(line)
+            self._written += len(line)
+            self.records += 1
+            if now - self._flushed_at >= RECORDING_CONFIG["flush_interval"]:
+                self._file.flush()
+                self._flushed_at = now
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+def read_segments(directory: str) -> Iterator[Dict]:
+    """Yield recorded responses from every segment in directory, oldest segment first.
+
+    A segment cut short by a crash yields what was flushed before it.
+    """
+    for path in sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN))):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as segment:
+                for line in segment:
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile) as e:
+            logger.warning(f"Truncated recording segment {path}: {str(e)}")
+
+class ReplayTransport(HTTPAdapter):
+    """Answers requests from recorded responses instead of the network.
+
+    Each request gets the latest response recorded for it at or before the
+    replay clock (or the earliest one if the clock has not reached it yet).
+    With a speed the clock runs that many times faster than real time from
+    the first request; with speed=None it only moves when step_to() is
+    called, which lets a driver run cycles back to back.
+    """
+
+    def __init__(self, records: Iterable[Dict], speed: Optional[float] = 1.0):
+        super().__init__()
+        self.speed = speed
+        self._index: Dict[Tuple[str, str], Tuple[List[float], List[Dict]]] = {}
+        for record in sorted(records, key=lambda record: record["ts"]):
+            timestamps, entries = self._index.setdefault(replay_key(record["method"], record["url"]), ([], []))
+            timestamps.append(record["ts"])
+            entries.append(record)
+
+        all_timestamps = [timestamps for timestamps, _ in self._index.values()]
+        self.start = min((timestamps[0] for timestamps in all_timestamps), default=0.0)
+        self.end = max((timestamps[-1] for timestamps in all_timestamps), default=0.0)
+        self._position = self.start
+        self._started_at = None
+        self._lock = threading.Lock()
+        self.served = 0
+        self.unknown = 0
+
+    def now(self) -> float:
+        """Current position on the recorded timeline"""
+        if self.speed is None:
+            return self._position
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = time.monotonic()
+            return self.start + (time.monotonic() - self._started_at) * self.speed
+
+    def step_to(self, ts: float):
+        self._position = ts
+
+    @property
+    def finished(self) -> bool:
+        return self.now() > self.end
+
+    def timeline(self, method: str, url: str) -> List[float]:
+        """Recorded times of one request, e.g. an event list, for stepping through cycles"""
+        return list(self._index.get(replay_key(method, url), ([], []))[0])
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        entry = self._index.get(replay_key(request.method, request.url))
+        if entry is None:
+            self.unknown += 1
+            raw = _raw_response(b"", 404, {})
+        else:
+            timestamps, records = entry
+            record = records[max(bisect.bisect_right(timestamps, self.now()) - 1, 0)]
+            headers = {"Content-Type": record["content_type"]} if record.get("content_type") else {}
+            raw = _raw_response(_record_body(record), record["status"], headers)
+            self.served += 1
+
+        response = self.build_response(request, raw)
+        if not stream:
+            response.content
+        return response
@@ -0,0 +1,77 @@
+"""
+gzip and brotli response compression, negotiated per request from Accept-Encoding.
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import brotli
+from flask import Response, request
+from config import API_CONFIG
+
+# In order of preference when the client accepts both equally
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = {"application/json", "text/plain"}
+
+def compress(body: bytes, encoding: str, config: Dict = None) -> bytes:
+    config = API_CONFIG if config is None else config
+    if encoding == "br":
+        return brotli.compress(body, mode=brotli.MODE_TEXT, quality=config["brotli_quality"])
+    # mtime=0 keeps the output identical across workers and requests
+    return gzip.compress(body, compresslevel=config["gzip_level"], mtime=0)
+
+class ResponseCompressor:
+    """after_request hook compressing buffered JSON and text responses.
+
+    Streamed responses (SSE, NDJSON) pass through untouched so they are not
+    held back. Responses with an ETag, such as the cached live snapshots, are
+    compressed once per encoding and then served from a small LRU.
+    """
+
+    def __init__(self, config: Dict = None):
+        self.config = API_CONFIG if config is None else config
+        self._cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _compressed(self, etag: Optional[str], encoding: str, body: bytes) -> bytes:
+        if etag is None:
+            return compress(body, encoding, self.config)
+        key = (etag, encoding)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+        compressed = compress(body, encoding, self.config)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = compressed
+            while len(self._cache) > self.config["compressed_cache_entries"]:
+                self._cache.popitem(last=False)
+        return compressed
+
+    def __call__(self, response: Response) -> Response:
+        if response.mimetype not in COMPRESSIBLE_TYPES or response.is_streamed or response.direct_passthrough:
+            return response
+        response.vary.add("Accept-Encoding")
+        if response.status_code != 200 or "Content-Encoding" in response.headers:
+            return response
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < self.config["compress_min_size"]:
+            return response
+
+        etag, _ = response.get_etag()
+        response.set_data(self._compressed(etag, encoding, body))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache)}
@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for the read API.
+
+Threaded sync workers: requests are short and mostly served from the
+in-memory snapshot cache, while the threads cover the occasional database
+round trip:
+
+    gunicorn -c gunicorn.conf.py "server:create_app()"
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("API_BIND", "0.0.0.0:5000")
+worker_class = "gthread"
+workers = int(os.getenv("API_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("API_THREADS", "4"))
+# Import the app once in the master and fork it; pools and listeners are
+# per process, created on first use
+preload_app = True
+keepalive = 5
+# Recycle workers now and then so fragmentation cannot build up
+max_requests = 50000
+max_requests_jitter = 5000
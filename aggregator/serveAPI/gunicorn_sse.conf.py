@@ -0,0 +1,20 @@
+"""
+Gunicorn settings for the Server-Sent Events push channel.
+
+gevent workers serve each open stream as a greenlet, so thousands of idle
+subscribers cost no thread each:
+
+    gunicorn -c gunicorn_sse.conf.py "server:create_app()"
+"""
+
+bind = "0.0.0.0:5001"
+worker_class = "gevent"
+workers = 2
+# Concurrent streams per worker
+worker_connections = 10000
+keepalive = 75
+
+def post_fork(server, worker):
+    # Make psycopg2 cooperative so a query does not stall every stream in the worker
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
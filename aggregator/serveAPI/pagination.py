@@ -0,0 +1,57 @@
+"""
+Keyset pagination cursors and fields= projection for the list endpoints.
+"""
+
+import base64
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+import orjson
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque cursor holding the sort key of the last row of a page"""
+    return base64.urlsafe_b64encode(orjson.dumps(list(values), default=str)).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """Sort key values from a cursor; ValueError if it was not produced by encode_cursor"""
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+def parse_fields(value: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """Requested fields in the order given, None for all; ValueError on unknown names"""
+    if not value:
+        return None
+    fields = list(dict.fromkeys(field.strip() for field in value.split(",") if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}; choose from {', '.join(allowed)}")
+    return fields
+
+def project(rows: List[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    if fields is None:
+        return rows
+    return [{field: row.get(field) for field in fields} for row in rows]
+
+class KeysetIndex:
+    """Rows ordered by one unique key, paged by the last key seen rather than an offset.
+
+    Pages stay consistent while rows change between requests: a client never
+    sees a row twice or skips one that existed throughout.
+    """
+    __slots__ = ("keys", "rows")
+
+    def __init__(self, rows: List[Dict], key: str):
+        ordered = sorted(rows, key=lambda row: str(row[key]))
+        self.keys = [str(row[key]) for row in ordered]
+        self.rows = ordered
+
+    def page(self, after: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+        """(rows after the given key, key of the last row if more follow)"""
+        start = 0 if after is None else bisect.bisect_right(self.keys, after)
+        rows = self.rows[start:start + limit]
+        more = start + limit < len(self.rows)
+        return rows, (self.keys[start + limit - 1] if more else None)
@@ -2,24 +2,426 @@
 HTTP endpoints for accessing sports data.
 """
 
-from flask import jsonify
-from database.db_utils import DatabaseManager
-
-db = DatabaseManager()
-
-def register_routes(app):
-    @app.route('/api/tennis/live', methods=['GET'])
-    def get_live_tennis():
-        """Get all live tennis matches"""
-        matches = db.get_live_tennis_matches()
-        return jsonify({'data': matches})
-
-    @app.route('/api/tennis/match/<match_id>', methods=['GET'])
-    def get_tennis_match(match_id):
-        """Get specific tennis match details"""
-        match = db.get_tennis_match(match_id)
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+from flask import Response, g, jsonify, make_response, request, stream_with_context
+from config import API_CONFIG, MARKET_INDEX_CONFIG, PREMATCH_CONFIG, PUSH_CONFIG
+from database.db_utils import (
+    DatabaseManager, HISTORY_TABLES, LIVE_UPDATES_CHANNEL, SPORT_TABLES, UPCOMING_COLUMNS
+)
+from delta_feed import DeltaBuffer, coalesce_deltas
+from fast_json import dumps
+from live_cache import LiveSnapshotCache, LiveUpdateListener
+from metrics import API_REQUEST_SECONDS, API_RESPONSES, CONTENT_TYPE, render
+from pagination import KeysetIndex, decode_cursor, encode_cursor, parse_fields, project
+from push_broker import PushBroker
+
+# Columns of the live snapshot tables
+LIVE_FIELDS = ("match_id", "event_name", "competition", "status", "odds_data", "timestamp")
+# The same without odds, for event listings
+EVENT_FIELDS = tuple(field for field in LIVE_FIELDS if field != "odds_data")
+# Query parameters filtering live lists by price, inside PostgreSQL
+PRICE_FILTERS = ("market", "min_price", "max_price")
+
+def parse_time(value, default):
+    """Parse an ISO 8601 query parameter, assuming UTC when no offset is given"""
+    if not value:
+        return default
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def page_limit() -> int:
+    """The limit query parameter, API_CONFIG's default page size if absent"""
+    limit = request.args.get('limit', API_CONFIG['default_page_size'], type=int)
+    if not 0 < limit <= API_CONFIG['max_page_size']:
+        raise ValueError(f"limit must be in (0, {API_CONFIG['max_page_size']}]")
+    return limit
+
+def price_filter() -> Tuple[Optional[str], Optional[float], Optional[float]]:
+    """The market, min_price and max_price parameters; ValueError on a bad bound or a bound without a market"""
+    market = request.args.get('market') or None
+    bounds = []
+    for name in ('min_price', 'max_price'):
+        value = request.args.get(name)
+        if not value:
+            bounds.append(None)
+            continue
+        price = float(value)
+        if not 1.0 <= price <= MARKET_INDEX_CONFIG['max_price']:
+            raise ValueError(f"{name} must be in [1, {MARKET_INDEX_CONFIG['max_price']:g}]")
+        bounds.append(price)
+    if market is None and bounds != [None, None]:
+        raise ValueError('min_price and max_price need a market')
+    return market, bounds[0], bounds[1]
+
+def tagged_body(payload: Any) -> Tuple[bytes, str]:
+    """Serialized payload with its content ETag"""
+    body = dumps(payload)
+    return body, hashlib.blake2b(body, digest_size=12).hexdigest()
+
+def json_response(payload: Any = None, tagged: Tuple[bytes, str] = None) -> Response:
+    """Serialize once, tagged with a content ETag so unchanged pages can be answered with 304"""
+    body, etag = tagged_body(payload) if tagged is None else tagged
+    response = Response(body, mimetype='application/json')
+    # Weak, because the body may be sent compressed
+    response.set_etag(etag, weak=True)
+    return response.make_conditional(request)
+
+def register_routes(app, db: DatabaseManager = None):
+    """Add the API routes; each app gets its own caches and live update listener"""
+    db = DatabaseManager() if db is None else db
+    live_cache = LiveSnapshotCache(db.get_live_matches, dumps)
+    deltas = DeltaBuffer(db.get_odds_changes)
+    # The cache refreshes before the delta buffer, so a snapshot is never
+    # older than the delta version reported alongside it
+    live_updates = LiveUpdateListener(db, LIVE_UPDATES_CHANNEL)
+    live_updates.subscribe(live_cache.on_update, live_cache.invalidate)
+    live_updates.subscribe(deltas.on_update, deltas.reset)
+    # After the reset the broker replays whatever the reloaded buffer covers
+    broker = PushBroker(deltas)
+    live_updates.subscribe(broker.on_update)
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        # Label by route pattern, not path, so match ids do not create series
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        started = g.get('request_started')
+        if started is not None:
+            API_REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+        API_RESPONSES.labels(endpoint, str(response.status_code)).inc()
+        return response
+
+    def league_index(entry, league):
+        """The entry's rows of one competition in match_id order, built for all competitions at once"""
+        leagues = entry.views.get('by_league')
+        if leagues is None:
+            grouped = {}
+            for row in entry.rows:
+                grouped.setdefault(row.get('competition'), []).append(row)
+            leagues = entry.views.setdefault(
+                'by_league', {name: KeysetIndex(rows, 'match_id') for name, rows in grouped.items()}
+            )
+        return leagues.get(league) or KeysetIndex([], 'match_id')
+
+    def page_args(allowed) -> Tuple[int, Optional[List[str]], Optional[str]]:
+        """limit, fields (all of allowed by default) and the match_id to page after; ValueError if invalid"""
+        limit = page_limit()
+        fields = parse_fields(request.args.get('fields'), allowed)
+        if fields is None and allowed is not LIVE_FIELDS:
+            fields = list(allowed)
+        after = request.args.get('after')
+        return limit, fields, str(decode_cursor(after, 1)[0]) if after else None
+
+    def live_page(entry, allowed=LIVE_FIELDS):
+        """One page of a cached live list in match_id order, optionally one league's and only some fields"""
+        try:
+            limit, fields, after = page_args(allowed)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        league = request.args.get('league')
+
+        # Clients polling the same page get the body serialized for the first of them
+        pages = entry.views.setdefault('pages', {})
+        key = (league, after, limit, None if fields is None else tuple(fields))
+        tagged = pages.get(key)
+        if tagged is None:
+            if league:
+                index = league_index(entry, league)
+            else:
+                index = entry.views.get('by_match_id')
+                if index is None:
+                    index = entry.views.setdefault('by_match_id', KeysetIndex(entry.rows, 'match_id'))
+            rows, last = index.page(after, limit)
+            tagged = tagged_body({'data': project(rows, fields), 'next': encode_cursor([last]) if last else None})
+            if len(pages) < API_CONFIG['page_cache_entries']:
+                pages[key] = tagged
+        return json_response(tagged=tagged)
+
+    def market_page(sport, allowed=LIVE_FIELDS):
+        """One page of live matches with an outcome of market priced within min_price/max_price.
+
+        Filtered by PostgreSQL rather than from the snapshot cache, through
+        live_market_prices or the GIN index on odds_data.
+        """
+        try:
+            market, min_price, max_price = price_filter()
+            limit, fields, after = page_args(allowed)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        matches = db.get_live_matches_by_market(
+            sport, market, min_price, max_price, request.args.get('league'), limit + 1, after
+        )
+        next_cursor = None
+        if len(matches) > limit:
+            matches = matches[:limit]
+            next_cursor = encode_cursor([matches[-1]['match_id']])
+        return json_response({'data': project(matches, fields), 'next': next_cursor})
+
+    def live_response(sport, allowed=LIVE_FIELDS):
+        """Serve a sport's live list from the snapshot cache, honouring If-None-Match.
+
+        With limit, after, fields or league, or fewer fields than LIVE_FIELDS
+        allowed, the list is paged by match_id; otherwise the pre-serialized
+        snapshot is sent whole, newest first. Price filters go to the database.
+        """
+        if sport not in SPORT_TABLES:
+            return jsonify({'error': f'Unknown sport: {sport}'}), 400
+        if any(request.args.get(name) for name in PRICE_FILTERS):
+            return market_page(sport, allowed)
+
+        live_updates.start()
+        entry = live_cache.get(sport)
+        if allowed is not LIVE_FIELDS or any(name in request.args for name in ('limit', 'after', 'fields', 'league')):
+            response = make_response(live_page(entry, allowed))
+        else:
+            if request.if_none_match.contains_weak(entry.etag):
+                response = Response(status=304)
+            else:
+                response = Response(entry.body, mimetype='application/json')
+            # Weak, because the body may be sent compressed
+            response.set_etag(entry.etag, weak=True)
+        response.headers['X-Snapshot-Version'] = str(entry.version)
+        return response
+
+    def match_response(sport, match_id):
+        if sport not in SPORT_TABLES:
+            return jsonify({'error': f'Unknown sport: {sport}'}), 400
+        match = db.get_match(sport, match_id)
         if not match:
             return jsonify({'error': 'Match not found'}), 404
-        return jsonify({'data': match})
+        return json_response({'data': match})
+
+    @app.route('/api/<sport>/live', methods=['GET'])
+    def get_live_sport(sport):
+        """Get all live matches of a sport"""
+        return live_response(sport)
+
+    @app.route('/api/<sport>/match/<match_id>', methods=['GET'])
+    def get_sport_match(sport, match_id):
+        """Get specific match details, live or not"""
+        return match_response(sport, match_id)
+
+    @app.route('/api/v1/odds/live', methods=['GET'])
+    def get_live_odds():
+        """Get a sport's live matches with their odds, optionally one league's"""
+        return live_response(request.args.get('sport', 'tennis'))
+
+    @app.route('/api/v1/odds/match/<match_id>', methods=['GET'])
+    def get_match_odds(match_id):
+        """Get one match's latest odds, live or not"""
+        return match_response(request.args.get('sport', 'tennis'), match_id)
+
+    @app.route('/api/v1/odds/prices', methods=['GET'])
+    def get_market_prices():
+        """Get one indexed market's outcomes across live matches, sorted by price"""
+        sport = request.args.get('sport', 'tennis')
+        if sport not in SPORT_TABLES:
+            return jsonify({'error': f'Unknown sport: {sport}'}), 400
+        indexed = MARKET_INDEX_CONFIG['markets'].get(sport, [])
+        order = request.args.get('order', 'desc')
+        try:
+            market, min_price, max_price = price_filter()
+            if market not in indexed:
+                raise ValueError(f"market must be one of: {', '.join(indexed)}")
+            if order not in ('asc', 'desc'):
+                raise ValueError('order must be asc or desc')
+            limit = page_limit()
+            after = request.args.get('after')
+            if after:
+                price, match_id, outcome = decode_cursor(after, 3)
+                after = (float(price), str(match_id), str(outcome))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        prices = db.get_market_prices(sport, market, min_price, max_price, limit + 1, after, order == 'desc')
+        next_cursor = None
+        if len(prices) > limit:
+            prices = prices[:limit]
+            last = prices[-1]
+            next_cursor = encode_cursor([last['price'], last['match_id'], last['outcome']])
+        return json_response({'data': prices, 'next': next_cursor})
+
+    @app.route('/api/v1/events/active', methods=['GET'])
+    def get_active_events():
+        """Get a sport's live events without their odds"""
+        return live_response(request.args.get('sport', 'tennis'), EVENT_FIELDS)
+
+    @app.route('/api/v1/events/summary', methods=['GET'])
+    def get_events_summary():
+        """Get live and upcoming match counts for every sport"""
+        hours = request.args.get('hours', 24, type=float)
+        if not 0 < hours <= 168:
+            return jsonify({'error': 'hours must be in (0, 168]'}), 400
+
+        live_updates.start()
+        until = datetime.now(timezone.utc) + timedelta(hours=hours)
+        upcoming = db.get_upcoming_summary(list(PREMATCH_CONFIG['leagues']), until)
+        summary = {}
+        for sport in SPORT_TABLES:
+            entry = live_cache.get(sport)
+            live = entry.views.get('summary')
+            if live is None:
+                live = entry.views.setdefault('summary', {
+                    'live': entry.count,
+                    'leagues': len({row.get('competition') for row in entry.rows} - {None}),
+                    'last_update': max((row['timestamp'] for row in entry.rows), default=None)
+                })
+            # None rather than 0 where no fixtures are tracked at all
+            covered = sport in PREMATCH_CONFIG['leagues']
+            summary[sport] = {
+                **live,
+                'version': entry.version,
+                **upcoming.get(sport, {'upcoming': 0 if covered else None, 'next_start': None})
+            }
+        return json_response({'data': summary, 'hours': hours})
+
+    @app.route('/api/v1/status/health', methods=['GET'])
+    def get_health():
+        """Database reachability, live update listener state and snapshot ages; 503 if the database is down"""
+        live_updates.start()
+        try:
+            database = {'ok': True, 'latency_ms': round(db.ping() * 1000, 2)}
+        except Exception as e:
+            database = {'ok': False, 'error': str(e)}
+        if not database['ok']:
+            status = 'down'
+        else:
+            status = 'ok' if live_updates.connected else 'degraded'
+        response = jsonify({
+            'status': status,
+            'database': database,
+            'live_updates': {'ok': live_updates.connected},
+            'snapshot_age_seconds': live_cache.ages()
+        })
+        response.status_code = 503 if status == 'down' else 200
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    @app.route('/api/v1/odds/changes', methods=['GET'])
+    def get_odds_changes():
+        """Get matches and markets added, changed or removed since a version"""
+        sport = request.args.get('sport', 'tennis')
+        if sport not in SPORT_TABLES:
+            return jsonify({'error': f'Unknown sport: {sport}'}), 400
+
+        live_updates.start()
+        version, changes = deltas.since(sport, request.args.get('since', type=int))
+        if changes is None:
+            # Too old for the buffer: splice the cached snapshot body into a
+            # full response instead of re-serializing it
+            entry = live_cache.get(sport)
+            body = b'{"full": true, "version": %d, ' % version + entry.body.lstrip()[1:]
+            return Response(body, mimetype='application/json')
+
+        return jsonify({'full': False, 'version': version, **coalesce_deltas(changes)})
+
+    @app.route('/api/v1/upcoming', methods=['GET'])
+    @app.route('/api/v1/odds/upcoming', methods=['GET'])
+    def get_upcoming():
+        """Get fixtures that have not started yet, with their latest prematch odds"""
+        sport = request.args.get('sport', 'soccer')
+        if sport not in PREMATCH_CONFIG['leagues']:
+            return jsonify({'error': f'No prematch coverage for sport: {sport}'}), 400
+        hours = request.args.get('hours', 24, type=float)
+        if not 0 < hours <= 168:
+            return jsonify({'error': 'hours must be in (0, 168]'}), 400
+        try:
+            limit = page_limit()
+            fields = parse_fields(request.args.get('fields'), UPCOMING_COLUMNS)
+            after = request.args.get('after')
+            if after:
+                start_time, match_id = decode_cursor(after, 2)
+                after = (datetime.fromisoformat(start_time), str(match_id))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        # The sort key is always read, for the next cursor
+        columns = UPCOMING_COLUMNS if fields is None else tuple(dict.fromkeys(fields + ['start_time', 'match_id']))
+        until = datetime.now(timezone.utc) + timedelta(hours=hours)
+        matches = db.get_upcoming_matches(sport, until, request.args.get('league'), limit + 1, after, columns)
+        next_cursor = None
+        if len(matches) > limit:
+            matches = matches[:limit]
+            next_cursor = encode_cursor([matches[-1]['start_time'].isoformat(), matches[-1]['match_id']])
+        return json_response({'data': project(matches, fields), 'next': next_cursor})
+
+    @app.route('/api/v1/odds/stream', methods=['GET'])
+    def stream_odds():
+        """Push odds changes for a sport, match_id or market as Server-Sent Events"""
+        sport = request.args.get('sport', 'tennis')
+        if sport not in SPORT_TABLES:
+            return jsonify({'error': f'Unknown sport: {sport}'}), 400
+
+        live_updates.start()
+        subscription = broker.subscribe(sport, request.args.get('match_id'), request.args.get('market'))
+        if subscription is None:
+            return jsonify({'error': 'Too many subscribers'}), 503
+
+        def generate():
+            try:
+                yield "retry: 3000\n\n"
+                while True:
+                    update = subscription.wait(PUSH_CONFIG["keepalive_interval"])
+                    if update is None:
+                        yield ": keepalive\n\n"
+                        continue
+                    event = "resync" if update.get("resync") else "odds"
+                    data = dumps(update, default=str).decode()
+                    yield f"id: {update['version']}\nevent: {event}\ndata: {data}\n\n"
+            finally:
+                broker.unsubscribe(subscription)
+
+        response = Response(generate(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    @app.route('/api/status/push', methods=['GET'])
+    def get_push_status():
+        """Get push channel subscriber statistics"""
+        return jsonify({'data': broker.stats()})
+
+    @app.route('/api/status/cache', methods=['GET'])
+    def get_cache_status():
+        """Get live snapshot cache hit/miss statistics"""
+        return jsonify({'data': live_cache.stats()})
+
+    @app.route('/api/status/db-pool', methods=['GET'])
+    def get_db_pool_status():
+        """Get database connection pool statistics"""
+        return jsonify({'data': db.pool_stats()})
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        """Prometheus metrics of this API worker"""
+        return Response(render(), content_type=CONTENT_TYPE)
+
+    @app.route('/api/v1/odds/history', methods=['GET'])
+    def get_odds_history():
+        """Stream a match's price movements as newline-delimited JSON"""
+        sport = request.args.get('sport', 'tennis')
+        match_id = request.args.get('match_id')
+        if sport not in HISTORY_TABLES:
+            return jsonify({'error': f'Unknown sport: {sport}'}), 400
+        if not match_id:
+            return jsonify({'error': 'match_id is required'}), 400
+
+        now = datetime.now(timezone.utc)
+        try:
+            start = parse_time(request.args.get('from'), now - timedelta(days=1))
+            end = parse_time(request.args.get('to'), now)
+        except ValueError:
+            return jsonify({'error': 'from/to must be ISO 8601 timestamps'}), 400
+
+        def generate():
+            for row in db.stream_odds_history(sport, match_id, start, end):
+                yield dumps(row, default=str) + b"\n"
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
-    # Add more routes for other sports here
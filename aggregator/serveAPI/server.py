@@ -1,16 +1,38 @@
 """
 Main entry point for the web server.
+
+Development server:
+
+    python server.py
+
+Production, pre-forked under gunicorn (see gunicorn.conf.py); the SSE push
+channel runs separately with gevent workers (see gunicorn_sse.conf.py):
+
+    gunicorn -c gunicorn.conf.py "server:create_app()"
 """
 
 from flask import Flask
 from flask_cors import CORS
+from compression import ResponseCompressor
+from fast_json import FastJSONProvider
 from routes import register_routes
 
-app = Flask(__name__)
-CORS(app)
+def create_app(db=None) -> Flask:
+    """Build the API app.
+
+    Safe to call before forking: the connection pool and the live update
+    listener are created per process on first use, so each worker gets its own.
+    """
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    CORS(app)
 
-# Register all routes
-register_routes(app)
+    # Register all routes
+    register_routes(app, db)
+    # Registered last so it runs first of the after_request hooks, and the
+    # request metrics include compression time
+    app.after_request(ResponseCompressor())
+    return app
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    create_app().run(host="0.0.0.0", port=5000, threaded=True)
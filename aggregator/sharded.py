@@ -0,0 +1,298 @@
+"""
+Run the aggregator as one of several worker processes sharing the work.
+
+Every worker heartbeats into aggregator_workers. Whichever worker holds the
+coordinator advisory lock also fetches each sport's in-play event list and
+assigns every match to a live worker by consistent hashing, so a worker
+joining or leaving moves only its share of the matches. Workers poll odds only
+for their own matches, on the part of each provider's quota that work needs.
+Start one per core or node, from the repository root with the aggregator
+directory on PYTHONPATH:
+
+    python -m aggregator.sharded --worker-id node-a-1 --metrics-port 9101
+    python -m aggregator.sharded --worker-id node-a-2 --metrics-port 9102
+
+A worker that stops heartbeating stops polling before its matches can be
+assigned elsewhere, and a live worker hands a match over only at the start of
+its next cycle, so no match is polled by two workers at once. A cycle that
+runs past that point re-checks its assignments before storing and drops the
+results of matches it no longer owns.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from config import ADAPTIVE_POLLING_CONFIG, METRICS_CONFIG, PIPELINE_CONFIG, SHARDING_CONFIG
+from metrics import stage_timer
+from models import Event
+from polling import AdaptivePoller, provider_rpm
+from rate_limiter import get_limiter
+from sharding import CoordinatorLock, HashRing, WorkerMembership, shard_key
+from streaming import stream_complete
+from .aggregator import SportsAggregator
+
+logger = logging.getLogger(__name__)
+
+# match_id of the single assignment row of a sport polled whole
+WHOLE_SPORT = "*"
+
+def payload_hash(event: Dict) -> str:
+    return hashlib.blake2b(json.dumps(event, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+class ShardedAggregator(SportsAggregator):
+    """A SportsAggregator polling only the matches assigned to this worker"""
+
+    def __init__(self, worker_id: str = None, config: Dict = None):
+        super().__init__()
+        self.config = SHARDING_CONFIG if config is None else config
+        self.membership = WorkerMembership(self.db, worker_id, self.config)
+        self.worker_id = self.membership.worker_id
+        self.coordinator = CoordinatorLock(self.db, self.config["coordinator_lock"])
+        self.workers: List[str] = [self.worker_id]
+        # Whole sports this worker polls, and what set_share last sized the quotas for
+        self.whole_owned: Dict[str, bool] = {}
+        self._sized_for = None
+        # {sport: {match_id: payload hash}} of the events last written to shard_assignments
+        self._payload_hashes: Dict[str, Dict[str, str]] = {}
+        # {sport: (fetched at, {match_id: raw event})} of the last complete event list
+        self._discovered: Dict[str, Tuple[float, Dict[str, Dict]]] = {}
+        self.sources = {
+            "soccer": (self.soccer_events, self.soccer_parser, self.soccer_upcoming),
+            "basketball": (self.basketball_events, self.basketball_parser, self.basketball_upcoming)
+        }
+
+    @property
+    def sharded_sports(self) -> List[str]:
+        return [sport for sport in self.sources if sport not in self.config["whole_sports"]]
+
+    def inplay_events(self, poller: AdaptivePoller, fetcher, parser) -> Optional[Tuple[List[Event], bool]]:
+        """This worker's matches of a sport, parsed from the events the coordinator stored with them"""
+        sport = poller.sport
+        if sport not in self.sharded_sports:
+            return super().inplay_events(poller, fetcher, parser)
+        if not self.membership.healthy:
+            # Our matches may already be someone else's; start over once back
+            self.change_detector.forget(sport)
+            logger.warning(f"Not polling {sport}: worker {self.worker_id} has missed its heartbeats")
+            return None
+        released = self.db.release_assignments(sport, self.worker_id)
+        if released:
+            # Their new owner reports them from now on
+            self.change_detector.forget(sport, released)
+            logger.info(f"Handed {len(released)} {sport} matches over to their new workers")
+        with stage_timer(sport, "fetch_events"):
+            rows = self.db.owned_assignments(sport, self.worker_id)
+        with stage_timer(sport, "parse"):
+            return parser.parse_events([row["event"] for row in rows]), True
+
+    def owns_whole_sport(self, sport: str) -> bool:
+        """Whether this worker polls a sport that is assigned whole"""
+        if not self.membership.healthy:
+            self.change_detector.forget(sport)
+            return False
+        if self.db.release_assignments(sport, self.worker_id):
+            self.change_detector.forget(sport)
+            logger.info(f"Handed {sport} over to its new worker")
+        owned = any(row["match_id"] == WHOLE_SPORT for row in self.db.owned_assignments(sport, self.worker_id))
+        self.whole_owned[sport] = owned
+        self.refresh_shares()
+        return owned
+
+    def store_changes(self, sport: str, merged_data: List[Event], partial: bool = False):
+        """Store only the matches this worker still owns.
+
+        A cycle that outlasts the heartbeat grace may find its matches moved to
+        another worker meanwhile; their results are dropped rather than
+        written by two workers.
+        """
+        if not self.membership.healthy:
+            self.change_detector.forget(sport)
+            logger.warning(f"Dropping {sport} results: worker {self.worker_id} has missed its heartbeats")
+            return
+        owned = set(self.db.owned_match_ids(sport, self.worker_id))
+        if sport not in self.sharded_sports:
+            if WHOLE_SPORT not in owned:
+                self.change_detector.forget(sport)
+                logger.warning(f"Dropping {sport} results: the sport moved to another worker during the cycle")
+                return
+        else:
+            lost = [event.match_id for event in merged_data if str(event.match_id) not in owned]
+            if lost:
+                # Forgotten first, so they are not reported removed either
+                self.change_detector.forget(sport, lost)
+                merged_data = [event for event in merged_data if str(event.match_id) in owned]
+                logger.info(f"Dropping {len(lost)} {sport} results of matches moved to other workers during the cycle")
+        super().store_changes(sport, merged_data, partial)
+
+    def set_share(self, workers: int):
+        """Size this worker's odds budgets and provider quotas to the work it owns.
+
+        Pollers of sharded sports get 1/workers of their budget. Each
+        provider's limiter gets the budgets this worker spends: those slices,
+        the whole sports it polls in full and, on the coordinator, the part of
+        the quota left for prematch fetches.
+        """
+        share = 1.0 / max(workers, 1)
+        owned_rpm: Dict[str, float] = {}
+        for poller in self.pollers:
+            if poller.sport in self.config["whole_sports"]:
+                spent = poller.budget_rpm if self.whole_owned.get(poller.sport) else 0.0
+            else:
+                poller.share = share
+                spent = poller.budget_rpm * share
+            owned_rpm[poller.provider] = owned_rpm.get(poller.provider, 0.0) + spent
+        for provider, rpm in owned_rpm.items():
+            quota = provider_rpm(provider)
+            if self.coordinator.held:
+                rpm += quota * (1 - ADAPTIVE_POLLING_CONFIG["daily_share"])
+            if rpm > 0:
+                # A provider this worker sends nothing keeps its last share
+                get_limiter(provider).set_share(min(rpm / quota, 1.0))
+
+    def refresh_shares(self):
+        """Call set_share when the worker count, whole-sport ownership or coordinator role changed"""
+        sized_for = (len(self.workers), self.coordinator.held, frozenset(
+            sport for sport, owned in self.whole_owned.items() if owned
+        ))
+        if sized_for != self._sized_for:
+            self._sized_for = sized_for
+            self.set_share(len(self.workers))
+
+    def discover(self, sport: str) -> Optional[Dict[str, Dict]]:
+        """{match_id: raw event} of a sport's in-play matches, None if the event list could not be fetched.
+
+        The list is fetched at most every events_interval; coordination
+        rounds in between reassign the last one.
+        """
+        now = time.monotonic()
+        cached = self._discovered.get(sport)
+        if cached is not None and now - cached[0] < PIPELINE_CONFIG[sport]["events_interval"]:
+            return cached[1]
+        fetcher, parser, _ = self.sources[sport]
+        with stage_timer(sport, "discover"):
+            raw_events = fetcher.fetch_events()
+            if raw_events is None:
+                return None
+            events = {}
+            for raw_event in raw_events:
+                for event in parser.parse_events([raw_event]):
+                    if event.match_id:
+                        events[str(event.match_id)] = raw_event
+            if not stream_complete(raw_events):
+                # Syncing a cut-short list would end every match after the cut
+                return None
+        self._discovered[sport] = (now, events)
+        return events
+
+    def assign(self, sport: str, ring: HashRing):
+        """Write a sport's discovered matches and their owners on the ring to shard_assignments"""
+        if sport not in self.sharded_sports:
+            owner = ring.owner(shard_key(sport, WHOLE_SPORT))
+            counts = self.db.sync_assignments(sport, {WHOLE_SPORT: owner}, {WHOLE_SPORT: {}}, ring.nodes)
+            if counts["reassigned"] or counts["moving"]:
+                logger.info(f"Moving {sport} to worker {owner}")
+            return
+
+        events = self.discover(sport)
+        if events is None:
+            # Keep the current assignments rather than dropping every match
+            logger.warning(f"Keeping {sport} assignments: event fetch failed or was cut short")
+            return
+        _, _, upcoming = self.sources[sport]
+        # The prematch pipeline runs here only; stop tracking fixtures now in-play on any worker
+        upcoming.handover(list(events))
+
+        targets = {match_id: ring.owner(shard_key(sport, match_id)) for match_id in events}
+        hashes = {match_id: payload_hash(event) for match_id, event in events.items()}
+        previous = self._payload_hashes.get(sport, {})
+        # Ship only payloads that changed; owners keep polling from the stored ones
+        changed = {match_id: event for match_id, event in events.items() if previous.get(match_id) != hashes[match_id]}
+        counts = self.db.sync_assignments(sport, targets, changed, ring.nodes)
+        self._payload_hashes[sport] = hashes
+        logger.info(
+            f"Assigned {len(targets)} {sport} matches to {len(ring.nodes)} workers: "
+            f"{counts['upserted']} updated, {counts['reassigned']} taken from dead workers, "
+            f"{counts['moving']} moving, {counts['deleted']} ended"
+        )
+
+    def coordinate(self):
+        """Every worker: adopt the current worker count. The lock holder: (re)assign every sport's matches"""
+        if not self.membership.healthy:
+            self.coordinator.release()
+            return
+        try:
+            workers = self.membership.live_workers()
+        except Exception as e:
+            logger.error(f"Error listing live workers: {str(e)}")
+            return
+        if self.worker_id not in workers:
+            workers.append(self.worker_id)
+        if workers != self.workers:
+            logger.info(f"Live workers: {', '.join(workers)}")
+            self.workers = workers
+
+        leading = self.coordinator.held
+        acquired = self.coordinator.acquire()
+        self.refresh_shares()
+        if not acquired:
+            return
+        if not leading:
+            # Another coordinator may have written newer payloads meanwhile
+            self._payload_hashes.clear()
+
+        ring = HashRing(workers, self.config["virtual_nodes"])
+        for sport in ("tennis", "soccer", "basketball"):
+            try:
+                self.assign(sport, ring)
+            except Exception as e:
+                self._payload_hashes.pop(sport, None)
+                logger.error(f"Error assigning {sport} matches: {str(e)}")
+
+    def whole_sport(self, sport: str, job: Callable[[], None]) -> Callable[[], None]:
+        def run():
+            if self.owns_whole_sport(sport):
+                job()
+        return run
+
+    def coordinator_only(self, job: Callable[[], None]) -> Callable[[], None]:
+        def run():
+            if self.coordinator.held and self.membership.healthy:
+                job()
+        return run
+
+    def pipelines(self) -> Dict[str, Callable[[], None]]:
+        jobs = super().pipelines()
+        for sport in self.config["whole_sports"]:
+            jobs[sport] = self.whole_sport(sport, jobs[sport])
+        # Fixture lists and partition maintenance are needed once, not per worker
+        jobs["prematch"] = self.coordinator_only(jobs["prematch"])
+        jobs["maintenance"] = self.coordinator_only(jobs["maintenance"])
+        jobs["coordination"] = self.coordinate
+        return jobs
+
+    def prepare(self):
+        super().prepare()
+        self.membership.start()
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            self.coordinator.release()
+            self.membership.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker-id", help="unique and stable per worker; defaults to WORKER_ID or host-pid")
+    parser.add_argument("--metrics-port", type=int, help="port for /metrics, 0 to disable; defaults to METRICS_PORT")
+    args = parser.parse_args()
+
+    if args.metrics_port is not None:
+        METRICS_CONFIG["aggregator_port"] = args.metrics_port
+    ShardedAggregator(args.worker_id).run()
+
+if __name__ == "__main__":
+    main()
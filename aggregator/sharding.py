@@ -0,0 +1,142 @@
+"""
+Consistent-hash sharding of matches across aggregator workers, with
+heartbeat membership and an advisory-lock coordinator.
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from psycopg2 import extensions
+from config import SHARDING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+class HashRing:
+    """Maps keys to nodes so that adding or removing a node moves only that node's share of keys"""
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = None):
+        self.virtual_nodes = SHARDING_CONFIG["virtual_nodes"] if virtual_nodes is None else virtual_nodes
+        self.nodes = sorted(set(nodes))
+        points = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in self.nodes
+            for replica in range(self.virtual_nodes)
+        )
+        self._positions = [position for position, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """Node owning key: the first ring point clockwise from its hash"""
+        if not self._positions:
+            return None
+        index = bisect.bisect(self._positions, _hash(key)) % len(self._positions)
+        return self._owners[index]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, str]:
+        return {key: self.owner(key) for key in keys}
+
+def shard_key(sport: str, match_id: str) -> str:
+    return f"{sport}:{match_id}"
+
+def default_worker_id() -> str:
+    return os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+class WorkerMembership:
+    """Heartbeats this worker into aggregator_workers and reports who else is alive.
+
+    A worker whose own heartbeat has not succeeded within worker_ttl minus one
+    interval is no longer healthy and must stop polling: by then the
+    coordinator may already have moved its matches.
+    """
+
+    def __init__(self, db, worker_id: str = None, config: Dict = None):
+        self.db = db
+        self.worker_id = worker_id or default_worker_id()
+        self.config = SHARDING_CONFIG if config is None else config
+        self.last_heartbeat: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def heartbeat(self) -> bool:
+        try:
+            self.db.heartbeat_worker(self.worker_id, socket.gethostname(), os.getpid())
+        except Exception as e:
+            logger.error(f"Heartbeat of worker {self.worker_id} failed: {str(e)}")
+            return False
+        self.last_heartbeat = time.monotonic()
+        return True
+
+    @property
+    def healthy(self) -> bool:
+        if self.last_heartbeat is None:
+            return False
+        grace = self.config["worker_ttl"] - self.config["heartbeat_interval"]
+        return time.monotonic() - self.last_heartbeat < grace
+
+    def live_workers(self) -> List[str]:
+        return self.db.live_workers(self.config["worker_ttl"])
+
+    def _run(self):
+        while not self._stop.wait(self.config["heartbeat_interval"]):
+            self.heartbeat()
+
+    def start(self):
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._run, name="worker-heartbeat", daemon=True)
+        self._thread.start()
+        logger.info(f"Worker {self.worker_id} joined")
+
+    def stop(self):
+        self._stop.set()
+        try:
+            self.db.remove_worker(self.worker_id)
+        except Exception as e:
+            logger.error(f"Error deregistering worker {self.worker_id}: {str(e)}")
+
+class CoordinatorLock:
+    """Session-level advisory lock on a dedicated connection; whoever holds it coordinates"""
+
+    def __init__(self, db, name: str = None):
+        self.db = db
+        self.name = SHARDING_CONFIG["coordinator_lock"] if name is None else name
+        self._conn = None
+        self.held = False
+
+    def acquire(self) -> bool:
+        """Try to take or keep the lock; False if another worker holds it or the connection dropped"""
+        try:
+            if self._conn is None or self._conn.closed:
+                self._conn = self.db.get_connection()
+                self._conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                self.held = False
+            with self._conn.cursor() as cur:
+                if self.held:
+                    # The lock lives as long as the session; make sure it still does
+                    cur.execute("SELECT 1")
+                else:
+                    cur.execute("SELECT pg_try_advisory_lock(hashtext(%s)) AS locked", (self.name,))
+                    self.held = cur.fetchone()["locked"]
+                    if self.held:
+                        logger.info(f"Took the {self.name} lock; this worker now coordinates")
+        except Exception as e:
+            if self.held:
+                logger.error(f"Lost the {self.name} lock: {str(e)}")
+            self.release()
+        return self.held
+
+    def release(self):
+        self.held = False
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
@@ -4,32 +4,29 @@ Common parsing logic for basketball data.
 
 from typing import Dict, List, Optional
 import logging
+from models import Event
+from odds_engine import OddsBatch, OddsEngine
 
 logger = logging.getLogger(__name__)
 
 class BasketballParser:
-    def parse_events(self, raw_events: List[Dict]) -> List[Dict]:
+    def parse_events(self, raw_events: List[Dict]) -> List[Event]:
         """Parse raw basketball events data into standardized format"""
         parsed_events = []
         
         for event in raw_events:
             try:
-                parsed_event = {
-                    "match_id": event.get("id"),
-                    "event_name": event.get("name"),
-                    "status": event.get("status"),
-                    "score": {
-                        "home": event.get("home_score"),
-                        "away": event.get("away_score"),
-                        "period": event.get("period")
-                    },
-                    "teams": {
-                        "home": event.get("home_team"),
-                        "away": event.get("away_team")
-                    },
-                    "league": event.get("league"),
-                    "start_time": event.get("time")
-                }
+                parsed_event = Event(
+                    match_id=event.get("id"),
+                    sport="basketball",
+                    event_name=event.get("name"),
+                    status=event.get("status"),
+                    score=(event.get("home_score"), event.get("away_score"), event.get("period")),
+                    home=event.get("home_team"),
+                    away=event.get("away_team"),
+                    competition=event.get("league"),
+                    start_time=event.get("time")
+                )
                 parsed_events.append(parsed_event)
             except Exception as e:
                 logger.error(f"Error parsing basketball event {event.get('id')}: {str(e)}")
@@ -37,22 +34,10 @@ class BasketballParser:
                 
         return parsed_events
 
-    def parse_odds(self, raw_odds: Dict) -> Dict:
-        """Parse raw basketball odds data into standardized format"""
-        parsed_odds = {}
-        
-        try:
-            for market in raw_odds.get("markets", []):
-                market_name = market.get("name")
-                if not market_name:
-                    continue
-                    
-                parsed_odds[market_name] = {
-                    outcome.get("name"): outcome.get("odds")
-                    for outcome in market.get("outcomes", [])
-                    if outcome.get("name") and outcome.get("odds")
-                }
-        except Exception as e:
-            logger.error(f"Error parsing basketball odds: {str(e)}")
-            
-        return parsed_odds
+    def parse_odds_batch(self, raw_odds: Dict[str, Dict], provider: str = "bet365") -> OddsBatch:
+        """Normalize every event's raw basketball odds in one pass; keeps prices, probabilities and margins"""
+        return OddsEngine(provider).normalize(raw_odds)
+
+    def parse_odds(self, raw_odds: Dict[str, Dict], provider: str = "bet365") -> Dict[str, Dict]:
+        """Parse {event_id: raw odds} into {event_id: {market: {outcome: decimal price}}}"""
+        return self.parse_odds_batch(raw_odds, provider).odds
@@ -5,20 +5,20 @@ Handle basketball prematch data.
 import requests
 import logging
 from typing import Dict, List, Optional
-from config import API_CREDENTIALS, API_URLS, REQUEST_CONFIG
+from config import API_URLS, REQUEST_CONFIG
+from http_client import get_client
+from rate_limiter import PRIORITY_PREMATCH
+from streaming import JSONItems, json_items
 
 logger = logging.getLogger(__name__)
 
 class BasketballPrematchFetcher:
     def __init__(self):
         self.base_url = API_URLS["bet365"]
-        self.headers = {
-            "x-rapidapi-key": API_CREDENTIALS["bet365"]["api_key"],
-            "x-rapidapi-host": API_CREDENTIALS["bet365"]["api_host"]
-        }
         self.config = REQUEST_CONFIG
+        self.http = get_client("bet365")
 
-    def fetch_prematch_events(self, league_id: Optional[str] = None) -> Optional[List[Dict]]:
+    def fetch_prematch_events(self, league_id: Optional[str] = None) -> Optional[JSONItems]:
         """Fetch upcoming basketball matches"""
         try:
             url = f"{self.base_url}/get_prematch_events/basketball"
@@ -26,17 +26,18 @@ class BasketballPrematchFetcher:
             if league_id:
                 params["league_id"] = league_id
                 
-            response = requests.get(
+            response = self.http.get(
                 url, 
-                headers=self.headers,
                 params=params,
-                timeout=self.config["timeout"]
+                priority=PRIORITY_PREMATCH,
+                timeout=self.config["timeout"],
+                stream=True
             )
             response.raise_for_status()
             
-            events = response.json()
-            logger.info(f"Successfully fetched {len(events)} upcoming basketball matches")
-            return events
+            # Events are decoded as the parser consumes them
+            logger.info("Streaming upcoming basketball matches")
+            return json_items(response)
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching upcoming basketball matches: {str(e)}")
@@ -46,9 +47,9 @@ class BasketballPrematchFetcher:
         """Fetch prematch odds for a specific basketball match"""
         try:
             url = f"{self.base_url}/get_prematch_odds/{event_id}"
-            response = requests.get(
+            response = self.http.get(
                 url, 
-                headers=self.headers,
+                priority=PRIORITY_PREMATCH,
                 timeout=self.config["timeout"]
             )
             response.raise_for_status()
@@ -5,33 +5,34 @@ Fetch soccer in-play events.
 import requests
 import logging
 from typing import Dict, List, Optional
-from config import API_CREDENTIALS, API_URLS, REQUEST_CONFIG
+from config import API_URLS, REQUEST_CONFIG
+from http_client import get_client
+from rate_limiter import PRIORITY_EVENTS
+from streaming import JSONItems, json_items
 
 logger = logging.getLogger(__name__)
 
 class SoccerInplayEventsFetcher:
     def __init__(self):
         self.base_url = API_URLS["bet365"]
-        self.headers = {
-            "x-rapidapi-key": API_CREDENTIALS["bet365"]["api_key"],
-            "x-rapidapi-host": API_CREDENTIALS["bet365"]["api_host"]
-        }
         self.config = REQUEST_CONFIG
+        self.http = get_client("bet365")
 
-    def fetch_events(self) -> Optional[List[Dict]]:
+    def fetch_events(self) -> Optional[JSONItems]:
         """Fetch all live soccer events"""
         try:
             url = f"{self.base_url}/get_sport_events/soccer"
-            response = requests.get(
+            response = self.http.get(
                 url, 
-                headers=self.headers,
-                timeout=self.config["timeout"]
+                priority=PRIORITY_EVENTS,
+                timeout=self.config["timeout"],
+                stream=True
             )
             response.raise_for_status()
             
-            events = response.json()
-            logger.info(f"Successfully fetched {len(events)} live soccer events")
-            return events
+            # Events are decoded as the parser consumes them
+            logger.info("Streaming live soccer events")
+            return json_items(response)
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching soccer events: {str(e)}")
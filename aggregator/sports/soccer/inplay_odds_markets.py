@@ -5,45 +5,48 @@ Fetch soccer in-play odds/markets.
 import requests
 import logging
 from typing import Dict, List, Optional
-from config import API_CREDENTIALS, API_URLS, REQUEST_CONFIG
+from config import API_URLS, REQUEST_CONFIG
+from http_client import get_client
+from rate_limiter import PRIORITY_LIVE_ODDS
+from fanout import fan_out
+from streaming import decode_json
 
 logger = logging.getLogger(__name__)
 
 class SoccerInplayOddsFetcher:
+    # A module-level function, so parse pool processes can unpickle it
+    decode_odds = staticmethod(decode_json)
+
     def __init__(self):
         self.base_url = API_URLS["bet365"]
-        self.headers = {
-            "x-rapidapi-key": API_CREDENTIALS["bet365"]["api_key"],
-            "x-rapidapi-host": API_CREDENTIALS["bet365"]["api_host"]
-        }
         self.config = REQUEST_CONFIG
+        self.http = get_client("bet365")
 
-    def fetch_odds(self, event_id: str) -> Optional[Dict]:
-        """Fetch odds for a specific soccer match"""
+    def fetch_odds_body(self, event_id: str) -> Optional[bytes]:
+        """Fetch the undecoded odds response for a specific soccer match"""
         try:
             url = f"{self.base_url}/get_event_markets/{event_id}"
-            response = requests.get(
+            response = self.http.get(
                 url, 
-                headers=self.headers,
+                priority=PRIORITY_LIVE_ODDS,
                 timeout=self.config["timeout"]
             )
             response.raise_for_status()
             
-            odds = response.json()
             logger.info(f"Successfully fetched odds for soccer match {event_id}")
-            return odds
+            return response.content
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching odds for soccer match {event_id}: {str(e)}")
             return None
 
+    def fetch_odds(self, event_id: str) -> Optional[Dict]:
+        """Fetch odds for a specific soccer match"""
+        body = self.fetch_odds_body(event_id)
+        return None if body is None else self.decode_odds(body)
+
     def fetch_odds_for_matches(self, event_ids: List[str]) -> Dict[str, Dict]:
         """Fetch odds for multiple soccer matches"""
-        all_odds = {}
-        for event_id in event_ids:
-            odds = self.fetch_odds(event_id)
-            if odds:
-                all_odds[event_id] = odds
-        
+        all_odds = fan_out("bet365", self.fetch_odds, event_ids)
         logger.info(f"Successfully fetched odds for {len(all_odds)}/{len(event_ids)} soccer matches")
         return all_odds
@@ -5,20 +5,20 @@ Handle soccer prematch data.
 import requests
 import logging
 from typing import Dict, List, Optional
-from config import API_CREDENTIALS, API_URLS, REQUEST_CONFIG
+from config import API_URLS, REQUEST_CONFIG
+from http_client import get_client
+from rate_limiter import PRIORITY_PREMATCH
+from streaming import JSONItems, json_items
 
 logger = logging.getLogger(__name__)
 
 class SoccerPrematchFetcher:
     def __init__(self):
         self.base_url = API_URLS["bet365"]
-        self.headers = {
-            "x-rapidapi-key": API_CREDENTIALS["bet365"]["api_key"],
-            "x-rapidapi-host": API_CREDENTIALS["bet365"]["api_host"]
-        }
         self.config = REQUEST_CONFIG
+        self.http = get_client("bet365")
 
-    def fetch_prematch_events(self, league_id: Optional[str] = None) -> Optional[List[Dict]]:
+    def fetch_prematch_events(self, league_id: Optional[str] = None) -> Optional[JSONItems]:
         """Fetch upcoming soccer matches"""
         try:
             url = f"{self.base_url}/get_prematch_events/soccer"
@@ -26,17 +26,18 @@ class SoccerPrematchFetcher:
             if league_id:
                 params["league_id"] = league_id
                 
-            response = requests.get(
+            response = self.http.get(
                 url, 
-                headers=self.headers,
                 params=params,
-                timeout=self.config["timeout"]
+                priority=PRIORITY_PREMATCH,
+                timeout=self.config["timeout"],
+                stream=True
             )
             response.raise_for_status()
             
-            events = response.json()
-            logger.info(f"Successfully fetched {len(events)} upcoming soccer matches")
-            return events
+            # Events are decoded as the parser consumes them
+            logger.info("Streaming upcoming soccer matches")
+            return json_items(response)
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching upcoming soccer matches: {str(e)}")
@@ -46,9 +47,9 @@ class SoccerPrematchFetcher:
         """Fetch prematch odds for a specific soccer match"""
         try:
             url = f"{self.base_url}/get_prematch_odds/{event_id}"
-            response = requests.get(
+            response = self.http.get(
                 url, 
-                headers=self.headers,
+                priority=PRIORITY_PREMATCH,
                 timeout=self.config["timeout"]
             )
             response.raise_for_status()
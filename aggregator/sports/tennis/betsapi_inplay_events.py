@@ -6,6 +6,8 @@ import requests
 import logging
 from typing import Dict, List, Optional
 from config import API_CREDENTIALS, API_URLS, REQUEST_CONFIG
+from http_client import get_client
+from rate_limiter import PRIORITY_EVENTS
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,7 @@ class BetsAPIInplayEventsFetcher:
         self.base_url = API_URLS["betsapi"]
         self.api_key = API_CREDENTIALS["betsapi"]["api_key"]
         self.config = REQUEST_CONFIG
+        self.http = get_client("betsapi")
 
     def fetch_events(self) -> Optional[List[Dict]]:
         """Fetch all live tennis events from BetsAPI"""
@@ -24,9 +27,10 @@ class BetsAPIInplayEventsFetcher:
                 "sport_id": 13  # Tennis sport ID in BetsAPI
             }
             
-            response = requests.get(
+            response = self.http.get(
                 url, 
                 params=params,
+                priority=PRIORITY_EVENTS,
                 timeout=self.config["timeout"]
             )
             response.raise_for_status()
@@ -6,17 +6,35 @@ import requests
 import logging
 from typing import Dict, List, Optional
 from config import API_CREDENTIALS, API_URLS, REQUEST_CONFIG
+from http_client import get_client
+from rate_limiter import PRIORITY_LIVE_ODDS
+from fanout import fan_out
+from streaming import decode_json
 
 logger = logging.getLogger(__name__)
 
+def decode_odds(body: bytes) -> Optional[Dict]:
+    """The odds in a BetsAPI event/odds response body, None for an error response"""
+    data = decode_json(body)
+    if data is None:
+        return None
+    if data.get("success") == 1:
+        return data.get("results", {})
+    logger.error(f"BetsAPI error: {data.get('error')}")
+    return None
+
 class BetsAPIInplayOddsFetcher:
+    # A module-level function, so parse pool processes can unpickle it
+    decode_odds = staticmethod(decode_odds)
+
     def __init__(self):
         self.base_url = API_URLS["betsapi"]
         self.api_key = API_CREDENTIALS["betsapi"]["api_key"]
         self.config = REQUEST_CONFIG
+        self.http = get_client("betsapi")
 
-    def fetch_odds(self, event_id: str) -> Optional[Dict]:
-        """Fetch odds for a specific tennis match"""
+    def fetch_odds_body(self, event_id: str) -> Optional[bytes]:
+        """Fetch the undecoded odds response for a specific tennis match"""
         try:
             url = f"{self.base_url}/event/odds"
             params = {
@@ -24,33 +42,28 @@ class BetsAPIInplayOddsFetcher:
                 "event_id": event_id
             }
             
-            response = requests.get(
+            response = self.http.get(
                 url, 
                 params=params,
+                priority=PRIORITY_LIVE_ODDS,
                 timeout=self.config["timeout"]
             )
             response.raise_for_status()
             
-            data = response.json()
-            if data.get("success") == 1:
-                odds = data.get("results", {})
-                logger.info(f"Successfully fetched odds for match {event_id} from BetsAPI")
-                return odds
-            else:
-                logger.error(f"BetsAPI error: {data.get('error')}")
-                return None
+            logger.info(f"Successfully fetched odds for match {event_id} from BetsAPI")
+            return response.content
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching odds for match {event_id} from BetsAPI: {str(e)}")
             return None
 
+    def fetch_odds(self, event_id: str) -> Optional[Dict]:
+        """Fetch odds for a specific tennis match"""
+        body = self.fetch_odds_body(event_id)
+        return None if body is None else self.decode_odds(body)
+
     def fetch_odds_for_matches(self, event_ids: List[str]) -> Dict[str, Dict]:
         """Fetch odds for multiple tennis matches"""
-        all_odds = {}
-        for event_id in event_ids:
-            odds = self.fetch_odds(event_id)
-            if odds:
-                all_odds[event_id] = odds
-        
+        all_odds = fan_out("betsapi", self.fetch_odds, event_ids)
         logger.info(f"Successfully fetched odds for {len(all_odds)}/{len(event_ids)} matches from BetsAPI")
         return all_odds
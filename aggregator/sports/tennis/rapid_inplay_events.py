@@ -5,28 +5,29 @@ Fetch tennis in-play events from Rapid API.
 import requests
 import logging
 from typing import Dict, List, Optional
-from config import API_KEYS
+from config import API_URLS, REQUEST_CONFIG
+from http_client import get_client
+from rate_limiter import PRIORITY_EVENTS
+from streaming import JSONItems, json_items
 
 logger = logging.getLogger(__name__)
 
 class RapidInplayEventsFetcher:
     def __init__(self):
-        self.base_url = "https://bet365-api-inplay.p.rapidapi.com/bet365"
-        self.headers = {
-            "x-rapidapi-key": API_KEYS["bet365"],
-            "x-rapidapi-host": "bet365-api-inplay.p.rapidapi.com"
-        }
+        self.base_url = API_URLS["bet365"]
+        self.config = REQUEST_CONFIG
+        self.http = get_client("bet365")
 
-    def fetch_events(self) -> Optional[List[Dict]]:
+    def fetch_events(self) -> Optional[JSONItems]:
         """Fetch all live tennis events"""
         try:
             url = f"{self.base_url}/get_sport_events/tennis"
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(url, priority=PRIORITY_EVENTS, timeout=self.config["timeout"], stream=True)
             response.raise_for_status()
             
-            events = response.json()
-            logger.info(f"Successfully fetched {len(events)} live tennis events")
-            return events
+            # Events are decoded as the parser consumes them
+            logger.info("Streaming live tennis events")
+            return json_items(response)
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching tennis events: {str(e)}")
             return None
@@ -5,37 +5,43 @@ Fetch tennis in-play odds from Rapid API.
 import requests
 import logging
 from typing import Dict, List, Optional
-from config import API_KEYS
+from config import API_URLS, REQUEST_CONFIG
+from http_client import get_client
+from rate_limiter import PRIORITY_LIVE_ODDS
+from fanout import fan_out
+from streaming import decode_json
 
 logger = logging.getLogger(__name__)
 
 class RapidInplayOddsFetcher:
+    # A module-level function, so parse pool processes can unpickle it
+    decode_odds = staticmethod(decode_json)
+
     def __init__(self):
-        self.base_url = "https://bet365-api-inplay.p.rapidapi.com/bet365"
-        self.headers = {
-            "x-rapidapi-key": API_KEYS["bet365"],
-            "x-rapidapi-host": "bet365-api-inplay.p.rapidapi.com"
-        }
+        self.base_url = API_URLS["bet365"]
+        self.config = REQUEST_CONFIG
+        self.http = get_client("bet365")
 
-    def fetch_odds(self, market_fi: str) -> Optional[Dict]:
-        """Fetch odds for a specific tennis match"""
+    def fetch_odds_body(self, market_fi: str) -> Optional[bytes]:
+        """Fetch the undecoded odds response for a specific tennis match"""
         try:
             url = f"{self.base_url}/get_event_markets/{market_fi}"
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(url, priority=PRIORITY_LIVE_ODDS, timeout=self.config["timeout"])
             response.raise_for_status()
             
-            odds = response.json()
             logger.info(f"Successfully fetched odds for match {market_fi}")
-            return odds
+            return response.content
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching odds for match {market_fi}: {str(e)}")
             return None
 
+    def fetch_odds(self, market_fi: str) -> Optional[Dict]:
+        """Fetch odds for a specific tennis match"""
+        body = self.fetch_odds_body(market_fi)
+        return None if body is None else self.decode_odds(body)
+
     def fetch_odds_for_matches(self, market_fis: List[str]) -> Dict[str, Dict]:
         """Fetch odds for multiple tennis matches"""
-        all_odds = {}
-        for market_fi in market_fis:
-            odds = self.fetch_odds(market_fi)
-            if odds:
-                all_odds[market_fi] = odds
+        all_odds = fan_out("bet365", self.fetch_odds, market_fis)
+        logger.info(f"Successfully fetched odds for {len(all_odds)}/{len(market_fis)} matches")
         return all_odds
@@ -2,28 +2,79 @@
 Combines tennis data from multiple APIs if needed.
 """
 
-from typing import Dict, List
+from array import array
+from typing import Dict, List, Optional
 import logging
+from models import Event, Market
+from .tennis_resolver import TennisEventResolver
 
 logger = logging.getLogger(__name__)
 
 class TennisMerger:
-    def merge_events_and_odds(self, events: List[Dict], odds: Dict[str, Dict]) -> List[Dict]:
+    def __init__(self, resolver: Optional[TennisEventResolver] = None):
+        self.resolver = resolver or TennisEventResolver()
+
+    def merge_events_and_odds(self, events: List[Event], markets: Dict[str, Dict[str, Market]]) -> List[Event]:
         """Merge tennis events with their corresponding odds data"""
         merged_data = []
         
         for event in events:
-            match_id = event.get("match_id")
+            match_id = event.match_id
             if not match_id:
                 continue
-                
-            match_odds = odds.get(match_id, {})
-            
-            merged_match = {
-                **event,
-                "odds": match_odds
-            }
-            merged_data.append(merged_match)
+
+            # Attach in place rather than copying the event
+            event.markets = markets.get(match_id, {})
+            merged_data.append(event)
             
         logger.info(f"Merged {len(merged_data)} matches with their odds")
         return merged_data
+
+    def best_prices(self, first: Dict[str, Market], second: Dict[str, Market]) -> Dict[str, Market]:
+        """Union of two providers' markets, keeping the higher price for each shared outcome"""
+        markets = dict(first)
+        for name, market in second.items():
+            current = markets.get(name)
+            if current is None:
+                markets[name] = market
+                continue
+            prices = dict(zip(current.outcome_names, current.prices))
+            for outcome, price in zip(market.outcome_names, market.prices):
+                if price > prices.get(outcome, 0.0):
+                    prices[outcome] = price
+            outcome_names = tuple(prices)
+            best = array("d", prices.values())
+            # Overround of the best available book; below zero is an arbitrage.
+            # Suspended outcomes can be quoted at 0 and carry no probability
+            priced = [price for price in best if price > 0]
+            margin = round(sum(1.0 / price for price in priced) - 1.0, 4) if priced else None
+            markets[name] = Market(name, outcome_names, best, margin)
+        return markets
+
+    def merge_providers(self, primary: List[Event], secondary: List[Event],
+                        primary_provider: str = "bet365", secondary_provider: str = "betsapi") -> List[Event]:
+        """Collapse events both providers report into one, with the best price per outcome.
+
+        Resolved and primary-only events keep the primary provider's id;
+        secondary-only events are stored as "<provider>:<id>" so ids from the
+        two providers cannot collide.
+        """
+        merged_data = []
+        for event, other in self.resolver.resolve(primary, secondary):
+            if event is None:
+                other.sources = {secondary_provider: other.match_id}
+                other.match_id = f"{secondary_provider}:{other.match_id}"
+                merged_data.append(other)
+                continue
+
+            event.sources = {primary_provider: event.match_id}
+            if other is not None:
+                event.sources[secondary_provider] = other.match_id
+                event.markets = self.best_prices(event.markets, other.markets)
+                for field in ("score", "competition", "start_time"):
+                    if getattr(event, field) is None:
+                        setattr(event, field, getattr(other, field))
+            merged_data.append(event)
+
+        logger.info(f"Merged {len(primary)} + {len(secondary)} provider events into {len(merged_data)} matches")
+        return merged_data
@@ -4,28 +4,29 @@ Common parsing logic for tennis data from various APIs.
 
 from typing import Dict, List, Optional
 import logging
+from models import Event
+from odds_engine import OddsBatch, OddsEngine
 
 logger = logging.getLogger(__name__)
 
 class TennisParser:
-    def parse_events(self, raw_events: List[Dict]) -> List[Dict]:
+    def parse_events(self, raw_events: List[Dict]) -> List[Event]:
         """Parse raw tennis events data into standardized format"""
         parsed_events = []
         
         for event in raw_events:
             try:
-                parsed_event = {
-                    "match_id": event.get("marketFI"),
-                    "event_name": event.get("eventName"),
-                    "status": "Live" if event.get("isLive") else "Upcoming",
-                    "score": event.get("score"),
-                    "players": {
-                        "home": event.get("homeTeam"),
-                        "away": event.get("awayTeam")
-                    },
-                    "tournament": event.get("tournament"),
-                    "start_time": event.get("startTime")
-                }
+                parsed_event = Event(
+                    match_id=event.get("marketFI"),
+                    sport="tennis",
+                    event_name=event.get("eventName"),
+                    status="Live" if event.get("isLive") else "Upcoming",
+                    score=event.get("score"),
+                    home=event.get("homeTeam"),
+                    away=event.get("awayTeam"),
+                    competition=event.get("tournament"),
+                    start_time=event.get("startTime")
+                )
                 parsed_events.append(parsed_event)
             except Exception as e:
                 logger.error(f"Error parsing event {event.get('marketFI')}: {str(e)}")
@@ -33,22 +34,36 @@ class TennisParser:
                 
         return parsed_events
 
-    def parse_odds(self, raw_odds: Dict) -> Dict:
-        """Parse raw tennis odds data into standardized format"""
-        parsed_odds = {}
-        
-        try:
-            for market in raw_odds.get("markets", []):
-                market_name = market.get("marketName")
-                if not market_name:
-                    continue
-                    
-                parsed_odds[market_name] = {
-                    outcome.get("outcomeName"): outcome.get("price")
-                    for outcome in market.get("outcomes", [])
-                    if outcome.get("outcomeName") and outcome.get("price")
-                }
-        except Exception as e:
-            logger.error(f"Error parsing odds: {str(e)}")
-            
-        return parsed_odds
+    def parse_betsapi_events(self, raw_events: List[Dict]) -> List[Event]:
+        """Parse BetsAPI in-play tennis events, which nest names under home/away/league"""
+        parsed_events = []
+
+        for event in raw_events:
+            try:
+                home = (event.get("home") or {}).get("name")
+                away = (event.get("away") or {}).get("name")
+                parsed_event = Event(
+                    match_id=event.get("id"),
+                    sport="tennis",
+                    event_name=f"{home} vs {away}" if home and away else None,
+                    status="Live" if str(event.get("time_status")) == "1" else "Upcoming",
+                    score=event.get("ss"),
+                    home=home,
+                    away=away,
+                    competition=(event.get("league") or {}).get("name"),
+                    start_time=event.get("time")
+                )
+                parsed_events.append(parsed_event)
+            except Exception as e:
+                logger.error(f"Error parsing BetsAPI event {event.get('id')}: {str(e)}")
+                continue
+
+        return parsed_events
+
+    def parse_odds_batch(self, raw_odds: Dict[str, Dict], provider: str = "bet365_tennis") -> OddsBatch:
+        """Normalize every event's raw tennis odds in one pass; keeps prices, probabilities and margins"""
+        return OddsEngine(provider).normalize(raw_odds)
+
+    def parse_odds(self, raw_odds: Dict[str, Dict], provider: str = "bet365_tennis") -> Dict[str, Dict]:
+        """Parse {event_id: raw odds} into {event_id: {market: {outcome: decimal price}}}"""
+        return self.parse_odds_batch(raw_odds, provider).odds
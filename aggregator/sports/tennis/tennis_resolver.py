@@ -0,0 +1,142 @@
+"""
+Resolves the same tennis match reported by different providers.
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from config import RESOLVER_CONFIG
+from models import Event, start_epoch
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+def name_tokens(name: Optional[str]) -> List[str]:
+    """Lowercase, accent-free alphanumeric tokens of a player or tournament name"""
+    if not name:
+        return []
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return [token for token in _NON_ALNUM.split(ascii_name.lower()) if token]
+
+class PlayerKey:
+    """A player (or doubles pair) as full name tokens plus the initials of abbreviated ones"""
+    __slots__ = ("tokens", "initials")
+
+    def __init__(self, name: Optional[str]):
+        tokens = name_tokens(name)
+        self.tokens: FrozenSet[str] = frozenset(token for token in tokens if len(token) > 1)
+        self.initials: FrozenSet[str] = frozenset(token for token in tokens if len(token) == 1)
+
+    def similarity(self, other: "PlayerKey") -> float:
+        """1.0 for identical names; "Djokovic N." against "Novak Djokovic" scores 0.9"""
+        shared = self.tokens & other.tokens
+        if not shared:
+            return 0.0
+        extra = self.tokens ^ other.tokens
+        initials = self.initials | other.initials
+        explained = sum(1 for token in extra if token[0] in initials)
+        return (len(shared) + 0.8 * explained) / (len(shared) + len(extra))
+
+class _Candidate:
+    __slots__ = ("event", "home", "away", "tournament", "start", "bucket")
+
+    def __init__(self, event: Event, time_bucket: float):
+        self.event = event
+        self.home = PlayerKey(event.home)
+        self.away = PlayerKey(event.away)
+        self.tournament = frozenset(name_tokens(event.competition))
+        self.start = start_epoch(event.start_time)
+        self.bucket = None if self.start is None else int(self.start // time_bucket)
+
+    @property
+    def tokens(self) -> FrozenSet[str]:
+        return self.home.tokens | self.away.tokens
+
+class TennisEventResolver:
+    """Pairs events from two providers that describe the same match.
+
+    Secondary events are indexed by (name token -> start-time bucket), so each
+    primary event is only compared with events sharing a distinctive player
+    token and starting in the same or a neighbouring bucket, keeping matching
+    close to linear in the number of events.
+    """
+
+    def __init__(self, time_bucket: float = None, max_start_diff: float = None, min_score: float = None,
+                 max_block_size: int = None):
+        self.time_bucket = RESOLVER_CONFIG["time_bucket"] if time_bucket is None else time_bucket
+        self.max_start_diff = RESOLVER_CONFIG["max_start_diff"] if max_start_diff is None else max_start_diff
+        self.min_score = RESOLVER_CONFIG["min_score"] if min_score is None else min_score
+        self.max_block_size = RESOLVER_CONFIG["max_block_size"] if max_block_size is None else max_block_size
+        self.last_comparisons = 0
+
+    def score(self, a: _Candidate, b: _Candidate) -> float:
+        """Name similarity of two events in either player order, 0 if their start times are too far apart"""
+        if a.start is not None and b.start is not None and abs(a.start - b.start) > self.max_start_diff:
+            return 0.0
+        score = max(
+            (a.home.similarity(b.home) + a.away.similarity(b.away)) / 2,
+            (a.home.similarity(b.away) + a.away.similarity(b.home)) / 2
+        )
+        if a.tournament and b.tournament and not a.tournament & b.tournament:
+            # Different tournament names are only a weak signal: providers
+            # label the same event very differently
+            score *= 0.9
+        return score
+
+    def resolve(self, primary: List[Event], secondary: List[Event]) -> List[Tuple[Optional[Event], Optional[Event]]]:
+        """Return (primary, secondary) pairs; either side is None for an unmatched event"""
+        left = [_Candidate(event, self.time_bucket) for event in primary]
+        right = [_Candidate(event, self.time_bucket) for event in secondary]
+
+        index: Dict[str, Dict[Optional[int], List[int]]] = {}
+        frequency: Dict[str, int] = {}
+        for position, candidate in enumerate(right):
+            for token in candidate.tokens:
+                index.setdefault(token, {}).setdefault(candidate.bucket, []).append(position)
+                frequency[token] = frequency.get(token, 0) + 1
+
+        pairs = []
+        comparisons = 0
+        for left_position, candidate in enumerate(left):
+            tokens = sorted((token for token in candidate.tokens if token in index), key=frequency.get)
+            # Block on distinctive tokens only; a common first name would
+            # pull in most of the other side
+            tokens = [token for token in tokens if frequency[token] <= self.max_block_size] or tokens[:1]
+            seen = set()
+            for token in tokens:
+                buckets = index[token]
+                if candidate.bucket is None:
+                    keys = list(buckets)
+                else:
+                    keys = (candidate.bucket - 1, candidate.bucket, candidate.bucket + 1, None)
+                for key in keys:
+                    seen.update(buckets.get(key, ()))
+            for right_position in seen:
+                comparisons += 1
+                score = self.score(candidate, right[right_position])
+                if score >= self.min_score:
+                    pairs.append((score, left_position, right_position))
+
+        # Best pairs first, each event used at most once
+        pairs.sort(key=lambda pair: pair[0], reverse=True)
+        matched_left: Dict[int, int] = {}
+        matched_right = set()
+        for _, left_position, right_position in pairs:
+            if left_position in matched_left or right_position in matched_right:
+                continue
+            matched_left[left_position] = right_position
+            matched_right.add(right_position)
+
+        self.last_comparisons = comparisons
+        resolved = [
+            (event, secondary[matched_left[position]] if position in matched_left else None)
+            for position, event in enumerate(primary)
+        ]
+        resolved.extend((None, event) for position, event in enumerate(secondary) if position not in matched_right)
+        logger.info(
+            f"Resolved {len(matched_left)} tennis matches across providers "
+            f"({len(primary)} primary, {len(secondary)} secondary, {comparisons} comparisons)"
+        )
+        return resolved
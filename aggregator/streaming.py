@@ -0,0 +1,60 @@
+"""
+Incremental JSON decoding of large provider responses.
+"""
+
+import json
+import logging
+from typing import Dict, Iterable, Iterator, Optional
+import ijson
+import requests
+import urllib3
+
+logger = logging.getLogger(__name__)
+
+# Bytes handed to the decoder per read
+READ_SIZE = 64 * 1024
+
+class JSONItems:
+    """The elements of the JSON array at prefix, yielded one at a time as the body arrives.
+
+    Iterate once; the response must have been requested with stream=True and
+    is closed once iteration ends or is abandoned. A body that turns out
+    malformed or is cut off ends iteration early instead of raising: the
+    error is logged and complete is set to False, so callers keep the items
+    already yielded but know the list is partial.
+    """
+
+    def __init__(self, response: requests.Response, prefix: str = "item"):
+        self.response = response
+        self.prefix = prefix
+        self.complete = True
+
+    def __iter__(self) -> Iterator[Dict]:
+        # Let urllib3 undo gzip/deflate so the decoder sees plain JSON
+        self.response.raw.decode_content = True
+        count = 0
+        try:
+            for item in ijson.items(self.response.raw, self.prefix, use_float=True, buf_size=READ_SIZE):
+                count += 1
+                yield item
+        except (ijson.JSONError, urllib3.exceptions.HTTPError) as e:
+            self.complete = False
+            logger.error(f"Response from {self.response.url} cut short after {count} items: {str(e)}")
+        finally:
+            self.response.close()
+
+def json_items(response: requests.Response, prefix: str = "item") -> JSONItems:
+    """Stream the elements of the JSON array at prefix; see JSONItems"""
+    return JSONItems(response, prefix)
+
+def stream_complete(items: Iterable) -> bool:
+    """False if items is a JSONItems whose body ended early; other iterables are always complete"""
+    return getattr(items, "complete", True)
+
+def decode_json(body: bytes) -> Optional[Dict]:
+    """Decode a whole JSON response body, None (logged) if it is malformed"""
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        logger.error(f"Error decoding JSON response: {str(e)}")
+        return None
@@ -0,0 +1,193 @@
+"""
+wrk-style HTTP load test for the read API.
+
+Keeps --connections keep-alive connections busy for --duration seconds,
+cycling through the given URLs, and reports throughput, latency percentiles,
+bytes on the wire and status codes. Each client process runs its
+connections as coroutines on one event loop; use --processes so the client
+is not the bottleneck:
+
+    cd aggregator/serveAPI && gunicorn -c gunicorn.conf.py "server:create_app()"
+    python benchmarks/api_load_test.py --connections 64 --duration 30 --processes 4 \\
+        --url "http://127.0.0.1:5000/api/tennis/live" \\
+        --url "http://127.0.0.1:5000/api/tennis/live?limit=100&fields=match_id,odds_data" \\
+        --header "Accept-Encoding: br"
+
+--suite loads each /api/v1 read endpoint in turn and checks it against its
+p95 latency target in SUITE, exiting non-zero if any misses:
+
+    python benchmarks/api_load_test.py --suite http://127.0.0.1:5000 --connections 4
+
+Responses must carry Content-Length (chunked bodies count as errors), which
+holds for every non-streaming API route.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from urllib.parse import urlsplit
+
+# /api/v1 read endpoints and their p95 latency targets in milliseconds at
+# 4 connections, with the API under gunicorn.conf.py and the client on the
+# same host. Live lists and events come from the snapshot cache and should
+# never wait on the database; the rest make one indexed query.
+SUITE = [
+    ("/api/v1/odds/live?sport=tennis", 15),
+    ("/api/v1/odds/live?sport=tennis&limit=100", 15),
+    ("/api/v1/odds/live?sport=tennis&market=Match%20Winner&min_price=3&limit=100", 25),
+    ("/api/v1/odds/prices?sport=tennis&market=Match%20Winner&limit=100", 25),
+    ("/api/v1/events/active?sport=tennis", 15),
+    ("/api/v1/events/summary", 15),
+    ("/api/v1/odds/upcoming?sport=soccer&limit=100", 25),
+    ("/api/v1/status/health", 10)
+]
+MATCH_P95_MS = 15
+
+class Counters:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.bytes = 0
+
+async def read_response(reader: asyncio.StreamReader):
+    """(status, body length, keep-alive) of one response"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    length = None
+    keep_alive = status_line.startswith(b"HTTP/1.1")
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection":
+            keep_alive = value.strip().lower() == "keep-alive"
+        elif name == "transfer-encoding":
+            raise ValueError("chunked responses are not supported")
+    if length is None:
+        if status in (204, 304):
+            length = 0
+        else:
+            raise ValueError("response without Content-Length")
+    await reader.readexactly(length)
+    return status, length, keep_alive
+
+async def connection(urls, headers, deadline: float, counters: Counters, offset: int):
+    position = offset
+    reader = writer = None
+    while time.monotonic() < deadline:
+        parts = urlsplit(urls[position % len(urls)])
+        position += 1
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+            request = f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n{headers}\r\n"
+            started = time.perf_counter()
+            writer.write(request.encode())
+            status, length, keep_alive = await asyncio.wait_for(read_response(reader), deadline - time.monotonic() + 5)
+            counters.latencies.append(time.perf_counter() - started)
+            counters.statuses[status] = counters.statuses.get(status, 0) + 1
+            counters.bytes += length
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            counters.errors += 1
+            if writer is not None:
+                writer.close()
+                writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+async def run_client(urls, headers: str, connections: int, duration: float, first: int) -> dict:
+    counters = Counters()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(connection(urls, headers, deadline, counters, first + i) for i in range(connections)))
+    return {"latencies": counters.latencies, "statuses": counters.statuses,
+            "errors": counters.errors, "bytes": counters.bytes}
+
+def client_process(args) -> dict:
+    urls, headers, connections, duration, first = args
+    return asyncio.run(run_client(urls, headers, connections, duration, first))
+
+def percentile(ordered, q):
+    return round(ordered[min(int(len(ordered) * q), len(ordered) - 1)] * 1000, 2) if ordered else None
+
+def load(urls, headers: str, connections: int, processes: int, duration: float) -> dict:
+    per_process = max(connections // processes, 1)
+    jobs = [(urls, headers, per_process, duration, index * per_process) for index in range(processes)]
+    started = time.monotonic()
+    if processes == 1:
+        results = [client_process(jobs[0])]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(client_process, jobs)
+    elapsed = time.monotonic() - started
+
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    statuses = {}
+    for result in results:
+        for status, count in result["statuses"].items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+    transferred = sum(result["bytes"] for result in results)
+    return {
+        "connections": per_process * processes,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {"p50": percentile(latencies, 0.50), "p95": percentile(latencies, 0.95),
+                       "p99": percentile(latencies, 0.99), "max": percentile(latencies, 1.0)},
+        "body_mb_per_second": round(transferred / elapsed / 1e6, 2),
+        "mean_body_bytes": round(transferred / len(latencies)) if latencies else None,
+        "statuses": statuses,
+        "errors": sum(result["errors"] for result in results)
+    }
+
+def run_suite(base: str, args, headers: str) -> bool:
+    """Load each SUITE endpoint in turn; True if all met their p95 target without errors"""
+    paths = list(SUITE)
+    if args.match_id:
+        paths.append((f"/api/v1/odds/match/{args.match_id}?sport=tennis", MATCH_P95_MS))
+    passed = True
+    for path, target in paths:
+        report = load([base.rstrip("/") + path], headers, args.connections, args.processes, args.duration)
+        ok = (report["latency_ms"]["p95"] is not None and report["latency_ms"]["p95"] <= target
+              and not report["errors"] and set(report["statuses"]) <= {"200", "304"})
+        passed = passed and ok
+        print(json.dumps({"path": path, "p95_target_ms": target, "ok": ok,
+                          "requests_per_second": report["requests_per_second"],
+                          "latency_ms": report["latency_ms"], "statuses": report["statuses"],
+                          "errors": report["errors"]}))
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", help="repeat to cycle through several URLs")
+    parser.add_argument("--suite", metavar="BASE_URL", help="load every /api/v1 endpoint against its p95 target")
+    parser.add_argument("--match-id", help="a tennis match id to include the match endpoint in --suite")
+    parser.add_argument("--header", action="append", default=[], help='e.g. "Accept-Encoding: gzip"')
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    if not args.url and not args.suite:
+        parser.error("give --url or --suite")
+
+    headers = "".join(f"{header}\r\n" for header in args.header)
+    if args.suite:
+        sys.exit(0 if run_suite(args.suite, args, headers) else 1)
+    print(json.dumps(load(args.url, headers, args.connections, args.processes, args.duration), indent=2))
+
+if __name__ == "__main__":
+    main()
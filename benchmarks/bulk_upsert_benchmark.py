@@ -0,0 +1,88 @@
+"""
+Rows/second of DatabaseManager.bulk_upsert vs. one INSERT per row.
+
+Runs against the PostgreSQL instance in DB_CONFIG, using a scratch table
+that is dropped afterwards:
+
+    python benchmarks/bulk_upsert_benchmark.py [--sizes 100 1000 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator"))
+
+from psycopg2.extras import Json
+from database.db_utils import DatabaseManager
+
+TABLE = "bench_odds"
+
+def make_rows(count: int):
+    return [
+        (
+            str(i),
+            f"Player {i} vs Player {i + 1}",
+            "Live",
+            Json({"Match Winner": {"Home": "1.85", "Away": "1.95"}, "Set 1 Winner": {"Home": "1.70", "Away": "2.10"}})
+        )
+        for i in range(count)
+    ]
+
+def per_row(db, cur, rows):
+    for row in rows:
+        cur.execute(f"""
+            INSERT INTO {TABLE} (match_id, event_name, status, odds_data, timestamp)
+            VALUES (%s, %s, %s, %s, NOW())
+            ON CONFLICT (match_id) DO UPDATE SET odds_data = %s, timestamp = NOW()
+        """, row + (row[3],))
+
+def bulk(db, cur, rows):
+    db.bulk_upsert(
+        cur, TABLE,
+        ("match_id", "event_name", "status", "odds_data", "timestamp"),
+        rows,
+        conflict_columns=("match_id",),
+        update_columns=("event_name", "status", "odds_data", "timestamp"),
+        template="(%s, %s, %s, %s, NOW())"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    conn = db.get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {TABLE} (
+                match_id TEXT PRIMARY KEY, event_name TEXT, status TEXT,
+                odds_data JSONB, timestamp TIMESTAMPTZ
+            )
+        """)
+        conn.commit()
+
+        print(f"{'rows':>8} {'method':>8} {'seconds':>9} {'rows/s':>10}")
+        for size in args.sizes:
+            rows = make_rows(size)
+            for name, method in (("per-row", per_row), ("bulk", bulk)):
+                cur.execute(f"TRUNCATE {TABLE}")
+                conn.commit()
+                # Second pass exercises the ON CONFLICT update path
+                for _ in range(2):
+                    started = time.perf_counter()
+                    method(db, cur, rows)
+                    conn.commit()
+                    elapsed = time.perf_counter() - started
+                print(f"{size:>8} {name:>8} {elapsed:>9.3f} {size / elapsed:>10.0f}")
+    finally:
+        cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        conn.commit()
+        cur.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Bytes per event: the old nested-dict pipeline against the slotted Event model.
+
+Both sides start from the same JSON text, so every name is a separate string
+object as it would be off the wire. The raw payload is dropped afterwards and
+only what the pipeline keeps for a cycle is counted; peak is the high-water
+mark while parsing and merging.
+
+    python benchmarks/model_memory_benchmark.py --events 5000 --markets 20
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator", "sports", "soccer"))
+
+from soccer_merger import SoccerMerger
+from soccer_parser import SoccerParser
+
+LEAGUES = ["Premier League", "La Liga", "Serie A", "Bundesliga", "Ligue 1", "Eredivisie"]
+
+def make_json(events: int, markets: int, outcomes: int, seed: int = 11):
+    rng = random.Random(seed)
+    raw_events = []
+    raw_odds = {}
+    for event in range(events):
+        event_id = str(2000000 + event)
+        raw_events.append({
+            "id": event_id,
+            "name": f"Team {event % 400} v Team {(event * 7) % 400}",
+            "status": "Live",
+            "home_score": rng.randint(0, 4),
+            "away_score": rng.randint(0, 4),
+            "home_team": f"Team {event % 400}",
+            "away_team": f"Team {(event * 7) % 400}",
+            "league": LEAGUES[event % len(LEAGUES)],
+            "time": "2024-01-01T15:00:00Z"
+        })
+        raw_odds[event_id] = {"markets": [
+            {"name": f"Market {market}", "outcomes": [
+                {"name": f"Outcome {outcome}", "odds": str(round(rng.uniform(1.05, 15.0), 2))}
+                for outcome in range(outcomes)
+            ]}
+            for market in range(markets)
+        ]}
+    return json.dumps(raw_events), json.dumps(raw_odds)
+
+def dict_pipeline(raw_events, raw_odds):
+    """The parse and merge steps as they were before the model"""
+    parsed_events = [{
+        "match_id": event.get("id"),
+        "event_name": event.get("name"),
+        "status": event.get("status"),
+        "score": {"home": event.get("home_score"), "away": event.get("away_score")},
+        "teams": {"home": event.get("home_team"), "away": event.get("away_team")},
+        "league": event.get("league"),
+        "start_time": event.get("time")
+    } for event in raw_events]
+    parsed_odds = {
+        event_id: {
+            market["name"]: {outcome["name"]: float(outcome["odds"]) for outcome in market["outcomes"]}
+            for market in payload["markets"]
+        }
+        for event_id, payload in raw_odds.items()
+    }
+    return [{**event, "odds": parsed_odds.get(event["match_id"], {})} for event in parsed_events]
+
+def model_pipeline(raw_events, raw_odds):
+    parser = SoccerParser()
+    return SoccerMerger().merge_events_and_odds(
+        parser.parse_events(raw_events), parser.parse_odds_batch(raw_odds).markets
+    )
+
+def measure(pipeline, events_json, odds_json, events):
+    gc.collect()
+    tracemalloc.start()
+    raw_events, raw_odds = json.loads(events_json), json.loads(odds_json)
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = pipeline(raw_events, raw_odds)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    del raw_events, raw_odds
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return {"retained_bytes_per_event": retained // events, "peak_bytes_per_event": peak // events}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--markets", type=int, default=20)
+    parser.add_argument("--outcomes", type=int, default=3)
+    args = parser.parse_args()
+
+    events_json, odds_json = make_json(args.events, args.markets, args.outcomes)
+    print(json.dumps({
+        "events": args.events,
+        "markets_per_event": args.markets,
+        "outcomes_per_market": args.outcomes,
+        "dicts": measure(dict_pipeline, events_json, odds_json, args.events),
+        "model": measure(model_pipeline, events_json, odds_json, args.events)
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Compare per-outcome Python odds normalization with the batched NumPy engine.
+
+Builds a synthetic {event_id: payload} mapping in the bet365 markets shape,
+with prices in mixed decimal/fractional/American formats, and times:
+
+  python_loop   the old nested-dict parse plus a per-outcome price conversion
+  engine        OddsEngine.normalize (flatten once, convert and score in NumPy)
+  engine_dicts  engine plus building the odds and margins dicts the mergers use
+
+    python benchmarks/odds_normalization_benchmark.py --events 5000 --markets 20
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator"))
+
+from odds_engine import OddsEngine
+
+def make_payload(events: int, markets: int, outcomes: int, seed: int = 7):
+    rng = random.Random(seed)
+    payload = {}
+    for event in range(events):
+        event_markets = []
+        for market in range(markets):
+            event_outcomes = []
+            for outcome in range(outcomes):
+                style = rng.random()
+                if style < 0.6:
+                    price = str(round(rng.uniform(1.05, 15.0), 2))
+                elif style < 0.8:
+                    price = f"{rng.randint(1, 20)}/{rng.randint(1, 10)}"
+                else:
+                    price = rng.choice(["+", "-"]) + str(rng.randint(101, 900))
+                event_outcomes.append({"name": f"Outcome {outcome}", "odds": price})
+            event_markets.append({"name": f"Market {market}", "outcomes": event_outcomes})
+        payload[str(1000000 + event)] = {"markets": event_markets}
+    return payload
+
+def python_decimal(price):
+    text = str(price).strip()
+    try:
+        if "/" in text:
+            numerator, denominator = text.split("/", 1)
+            value = 1.0 + float(numerator) / float(denominator)
+        elif text[:1] in "+-":
+            american = float(text)
+            value = 1.0 + american / 100.0 if american > 0 else 1.0 + 100.0 / abs(american)
+        else:
+            value = float(text)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return value if value > 1.0 else None
+
+def python_loop(payload):
+    odds, margins = {}, {}
+    for event_id, raw in payload.items():
+        event_odds, event_margins = {}, {}
+        for market in raw.get("markets", []):
+            name = market.get("name")
+            if not name:
+                continue
+            prices = {}
+            for outcome in market.get("outcomes", []):
+                decimal = python_decimal(outcome.get("odds")) if outcome.get("odds") else None
+                if outcome.get("name") and decimal:
+                    prices[outcome["name"]] = round(decimal, 4)
+            event_odds[name] = prices
+            if prices:
+                event_margins[name] = round(sum(1.0 / price for price in prices.values()) - 1.0, 4)
+        odds[event_id] = event_odds
+        margins[event_id] = event_margins
+    return odds, margins
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--markets", type=int, default=20)
+    parser.add_argument("--outcomes", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_payload(args.events, args.markets, args.outcomes)
+    engine = OddsEngine("bet365")
+    total = args.events * args.markets * args.outcomes
+
+    # Same prices and margins either way
+    batch = engine.normalize(payload)
+    expected_odds, _ = python_loop(payload)
+    assert batch.odds == {event_id: {m: o for m, o in markets.items() if o} for event_id, markets in expected_odds.items()}
+
+    results = {
+        "python_loop": best_of(lambda: python_loop(payload), args.repeat),
+        "engine": best_of(lambda: engine.normalize(payload), args.repeat),
+        "engine_dicts": best_of(lambda: (lambda b: (b.odds, b.margins))(engine.normalize(payload)), args.repeat)
+    }
+    print(json.dumps({
+        "events": args.events,
+        "outcomes": total,
+        "seconds": {name: round(seconds, 4) for name, seconds in results.items()},
+        "outcomes_per_second": {name: int(total / seconds) for name, seconds in results.items()}
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Odds fetch-and-parse throughput with parsing inline versus in a process pool.
+
+Serves synthetic bet365-shaped odds bodies from a fake fetcher (each fetch
+sleeps --latency seconds, standing in for network I/O, then returns the
+raw bytes) and runs them through:
+
+  workers 0   fan_out + decode + OddsEngine.normalize on the calling process,
+              as SportsAggregator does with PARSE_WORKERS=0
+  workers N   ParsePool with N parser processes
+
+For each worker count it reports events/s and the cores actually used
+(parent plus parser CPU time over wall time):
+
+    python benchmarks/parse_pool_benchmark.py --events 5000 --workers 0 1 2 4 8
+
+Pool sizes beyond the machine's cores only add pickling and scheduling
+overhead, so compare the results against os.cpu_count().
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "aggregator"))
+
+import config
+from fanout import fan_out
+from odds_engine import OddsEngine
+from parse_pool import ParsePool
+from streaming import decode_json
+
+PROVIDER = "benchmark"
+
+def make_bodies(events: int, markets: int, outcomes: int, seed: int = 11) -> dict:
+    rng = random.Random(seed)
+    bodies = {}
+    for event in range(events):
+        payload = {"markets": [
+            {"name": f"Market {market}", "outcomes": [
+                {"name": f"Outcome {outcome}", "odds": str(round(rng.uniform(1.05, 15.0), 2))}
+                for outcome in range(outcomes)
+            ]}
+            for market in range(markets)
+        ]}
+        bodies[str(2000000 + event)] = json.dumps(payload).encode()
+    return bodies
+
+class FakeOddsFetcher:
+    decode_odds = staticmethod(decode_json)
+
+    def __init__(self, bodies: dict, latency: float):
+        self.bodies = bodies
+        self.latency = latency
+
+    def fetch_odds_body(self, event_id: str):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.bodies.get(event_id)
+
+    def fetch_odds(self, event_id: str):
+        body = self.fetch_odds_body(event_id)
+        return None if body is None else self.decode_odds(body)
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def run_inline(fetcher: FakeOddsFetcher, keys: list) -> int:
+    raw_odds = fan_out(PROVIDER, fetcher.fetch_odds, keys)
+    return len(OddsEngine("bet365").normalize(raw_odds).markets)
+
+def measure(workers: int, fetcher: FakeOddsFetcher, keys: list, repeat: int) -> dict:
+    pool = ParsePool(workers) if workers else None
+    if pool is not None:
+        # Start the processes (and their imports) outside the timing
+        pool.fetch_odds("benchmark", PROVIDER, fetcher, keys[:workers * 4], "bet365")
+
+    parsed = 0
+    cpu_started = cpu_seconds()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        if pool is None:
+            parsed += run_inline(fetcher, keys)
+        else:
+            parsed += len(pool.fetch_odds("benchmark", PROVIDER, fetcher, keys, "bet365"))
+    elapsed = time.perf_counter() - started
+    if pool is not None:
+        # Parser CPU time is only reported once the processes have exited
+        pool.close()
+    cpu = cpu_seconds() - cpu_started
+    return {
+        "workers": workers,
+        "events_per_second": round(parsed / elapsed, 1),
+        "seconds": round(elapsed, 3),
+        "cores_used": round(cpu / elapsed, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--markets", type=int, default=30)
+    parser.add_argument("--outcomes", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per fetch")
+    parser.add_argument("--fetch-threads", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=config.PARSE_CONFIG["batch_size"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    config.REQUEST_CONFIG["max_in_flight"][PROVIDER] = args.fetch_threads
+    config.PARSE_CONFIG["batch_size"] = args.batch_size
+    bodies = make_bodies(args.events, args.markets, args.outcomes)
+    fetcher = FakeOddsFetcher(bodies, args.latency)
+    keys = list(bodies)
+
+    results = [measure(workers, fetcher, keys, args.repeat) for workers in args.workers]
+    print(json.dumps({
+        "cpu_count": os.cpu_count(),
+        "events": args.events,
+        "body_bytes": sum(len(body) for body in bodies.values()) // len(bodies),
+        "results": results
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
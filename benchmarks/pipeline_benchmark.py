@@ -0,0 +1,322 @@
+"""
+End-to-end SportsAggregator cycles with per-stage timings, across load tiers.
+
+Each tier runs in its own subprocess (so peak RSS is per tier) against a
+local HTTP stub playing both providers, the PostgreSQL instance in
+DB_CONFIG, and the read API through Flask's test client. Every cycle a
+share of the matches gets new prices, so the store stage writes a
+realistic mix of changed and unchanged rows.
+
+Stages, timed per call:
+  fetch   event lists and per-event odds (streamed event bodies are read
+          while parsing, so part of their transfer lands in parse)
+  parse   parse_events, parse_betsapi_events and parse_odds_batch (with
+          PARSE_WORKERS > 0, odds are parsed in the pool and timed as fetch)
+  merge   merge_events_and_odds and tennis merge_providers
+  store   store_changes: change detection, delta, upsert and history
+  serve   GET /api/v1/odds/changes?sport=... for the full live list
+
+    python benchmarks/pipeline_benchmark.py --tiers 50 500 5000 --cycles 5 \
+        --output bench.json
+
+Pass --recording DIR to replay recorded responses (see aggregator/replay.py)
+instead of the synthetic stub; the tier sizes are then ignored.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "aggregator", "serveAPI"))
+sys.path.insert(0, os.path.join(ROOT, "aggregator"))
+# Ahead of aggregator/, so "aggregator" is the package rather than aggregator.py
+sys.path.insert(0, ROOT)
+
+SPORTS = ("tennis", "soccer", "basketball")
+STAGES = ("fetch", "parse", "merge", "store", "serve")
+
+class PayloadStub:
+    """Provider-shaped bodies for one cycle, rebuilt before each cycle"""
+
+    def __init__(self, matches: int, change_ratio: float, seed: int = 3):
+        self.matches = matches
+        self.change_ratio = change_ratio
+        self.rng = random.Random(seed)
+        self.bodies = {}
+        self.prices = {}
+
+    def price(self, key):
+        if key not in self.prices or self.rng.random() < self.change_ratio:
+            self.prices[key] = round(self.rng.uniform(1.05, 12.0), 2)
+        return self.prices[key]
+
+    def markets(self, event_id, name_key, outcome_key, price_key):
+        return {"markets": [
+            {name_key: market, "outcomes": [
+                {outcome_key: outcome, price_key: str(self.price((event_id, market, outcome)))}
+                for outcome in outcomes
+            ]}
+            for market, outcomes in (("Match Winner", ("Home", "Away")), ("Total", ("Over", "Under")),
+                                     ("Handicap", ("Home", "Away")), ("Next Point", ("Home", "Away")))
+        ]}
+
+    def build(self, cycle: int):
+        start = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+        bodies = {}
+        for sport in ("soccer", "basketball"):
+            events = []
+            for match in range(self.matches):
+                event_id = f"{sport[0]}{match}"
+                events.append({"id": event_id, "name": f"Home {match} v Away {match}", "status": "Live",
+                               "home_score": cycle % 3, "away_score": 1, "period": 2,
+                               "home_team": f"Home {match}", "away_team": f"Away {match}",
+                               "league": f"League {match % 40}", "time": start.isoformat()})
+                bodies[f"/bet365/get_event_markets/{event_id}"] = self.markets(event_id, "name", "name", "odds")
+            bodies[f"/bet365/get_sport_events/{sport}"] = events
+
+        rapid, betsapi = [], []
+        for match in range(self.matches):
+            home, away = f"Alpha Player{match}", f"Beta Opponent{match}"
+            rapid.append({"marketFI": f"t{match}", "eventName": f"{home} vs {away}", "isLive": True,
+                          "homeTeam": home, "awayTeam": away, "tournament": "ATP Bench",
+                          "startTime": start.isoformat()})
+            bodies[f"/bet365/get_event_markets/t{match}"] = self.markets(
+                f"t{match}", "marketName", "outcomeName", "price")
+            # BetsAPI reports most of the same matches with abbreviated names
+            if match % 5:
+                betsapi.append({"id": f"b{match}", "home": {"name": f"Player{match} A."}, "away": {"name": f"Opponent{match} B."},
+                                "league": {"name": "Bench"}, "time": str(int(start.timestamp())), "ss": "0-0",
+                                "time_status": "1"})
+                bodies[f"/betsapi/event/odds?event_id=b{match}"] = {"success": 1, "results": self.markets(
+                    f"b{match}", "marketName", "outcomeName", "price")}
+        bodies["/bet365/get_sport_events/tennis"] = rapid
+        bodies["/betsapi/events/inplay"] = {"success": 1, "results": betsapi}
+        self.bodies = {path: json.dumps(body).encode() for path, body in bodies.items()}
+
+def run_stub(matches: int, change_ratio: float, ports):
+    """Stub server process; GET /__cycle/<n> rebuilds the bodies for cycle n"""
+    stub = PayloadStub(matches, change_ratio)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Send headers and body in one segment; split writes hit delayed ACKs
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path.startswith("/__cycle/"):
+                stub.build(int(parts.path.rsplit("/", 1)[1]))
+                body = b"{}"
+            else:
+                query = parse_qs(parts.query)
+                path = parts.path
+                if "event_id" in query:
+                    path += f"?event_id={query['event_id'][0]}"
+                body = stub.bodies.get(path)
+            self.send_response(200 if body is not None else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - started)
+        return timed
+
+    def instrument(self, aggregator):
+        for name in ("tennis_rapid_events", "tennis_betsapi_events", "soccer_events", "basketball_events"):
+            fetcher = getattr(aggregator, name)
+            fetcher.fetch_events = self.wrap("fetch", fetcher.fetch_events)
+        for name in ("tennis_rapid_odds", "tennis_betsapi_odds", "soccer_odds", "basketball_odds"):
+            fetcher = getattr(aggregator, name)
+            fetcher.fetch_odds_for_matches = self.wrap("fetch", fetcher.fetch_odds_for_matches)
+        if aggregator.parse_pool is not None:
+            # Odds are parsed in the pool while they are fetched
+            aggregator.parse_pool.fetch_odds = self.wrap("fetch", aggregator.parse_pool.fetch_odds)
+        for sport in SPORTS:
+            parser = getattr(aggregator, f"{sport}_parser")
+            parser.parse_events = self.wrap("parse", parser.parse_events)
+            parser.parse_odds_batch = self.wrap("parse", parser.parse_odds_batch)
+            merger = getattr(aggregator, f"{sport}_merger")
+            merger.merge_events_and_odds = self.wrap("merge", merger.merge_events_and_odds)
+        aggregator.tennis_parser.parse_betsapi_events = self.wrap("parse", aggregator.tennis_parser.parse_betsapi_events)
+        aggregator.tennis_merger.merge_providers = self.wrap("merge", aggregator.tennis_merger.merge_providers)
+        aggregator.store_changes = self.wrap("store", aggregator.store_changes)
+
+def percentiles(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(int(len(ordered) * q), len(ordered) - 1)] * 1000, 3)
+
+    return {"count": len(ordered), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3), "total_ms": round(sum(ordered) * 1000, 1)}
+
+def run_tier(args) -> dict:
+    import config
+    from http_client import get_client, use_transport
+    from aggregator.aggregator import SportsAggregator
+    from server import create_app
+
+    base = None
+    transport = None
+    if args.recording:
+        from recording import ReplayTransport, read_segments
+        transport = ReplayTransport(read_segments(args.recording), speed=None)
+        use_transport(transport, rate_limited=False)
+    else:
+        # A separate process, so serving does not compete with the pipeline for the GIL
+        ports = multiprocessing.Queue()
+        multiprocessing.Process(target=run_stub, args=(args.tier, args.change_ratio, ports), daemon=True).start()
+        base = f"http://127.0.0.1:{ports.get(timeout=30)}"
+        config.API_URLS["bet365"] = f"{base}/bet365"
+        config.API_URLS["betsapi"] = f"{base}/betsapi"
+
+    # Per-request INFO logging would dominate the smaller stages
+    logging.getLogger().setLevel(logging.WARNING)
+    # Benchmarks measure the pipeline, not provider quotas: every event list
+    # and every match's odds are fetched every cycle
+    config.ADAPTIVE_POLLING_CONFIG["enabled"] = False
+    aggregator = SportsAggregator()
+    for poller in aggregator.pollers:
+        poller.events_interval = 0
+    for provider in ("bet365", "betsapi"):
+        get_client(provider).limiter = None
+    aggregator.prepare()
+
+    client = create_app().test_client()
+
+    timer = StageTimer()
+    timer.instrument(aggregator)
+    jobs = {sport: getattr(aggregator, f"aggregate_{sport}_data") for sport in SPORTS}
+    written = 0
+    events = 0
+    cycle_seconds = []
+
+    def cycle(number):
+        nonlocal written, events
+        if base is not None:
+            requests.get(f"{base}/__cycle/{number}").raise_for_status()
+        else:
+            transport.step_to(min(transport.start + number * config.PIPELINE_CONFIG["soccer"]["interval"], transport.end))
+        started = time.perf_counter()
+        for sport, job in jobs.items():
+            job()
+            stats = aggregator.change_detector.last_stats.get(sport, {})
+            written += stats.get("new", 0) + stats.get("changed", 0) + stats.get("heartbeat", 0)
+            events += sum(stats.get(key, 0) for key in ("new", "changed", "heartbeat")) + stats.get("unchanged", 0)
+            serve_started = time.perf_counter()
+            response = client.get(f"/api/v1/odds/changes?sport={sport}")
+            response.get_data()
+            timer.samples["serve"].append(time.perf_counter() - serve_started)
+        cycle_seconds.append(time.perf_counter() - started)
+
+    for number in range(args.cycles):
+        cycle(number)
+
+    # One extra cycle under tracemalloc, kept out of the timings above
+    samples = timer.samples
+    timer.samples = defaultdict(list)
+    tracemalloc.start()
+    cycle(args.cycles)
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timer.samples = samples
+    cycle_seconds.pop()
+
+    total = sum(cycle_seconds)
+    store_seconds = sum(samples["store"])
+    return {
+        "tier": args.tier if base is not None else None,
+        "cycles": args.cycles,
+        "stages": {stage: percentiles(samples[stage]) for stage in STAGES},
+        "cycle": percentiles(cycle_seconds),
+        "events_per_second": round(events / total, 1) if total else None,
+        "rows_per_second": round(written / store_seconds, 1) if store_seconds else None,
+        "rows_written": written,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "alloc_peak_mb_per_cycle": round(alloc_peak / 2 ** 20, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiers", type=int, nargs="+", default=[50, 500, 5000], help="live matches per sport")
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--change-ratio", type=float, default=0.2, help="share of prices that move each cycle")
+    parser.add_argument("--recording", help="replay this recording directory instead of the synthetic stub")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--tier", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.tier is not None:
+        print(json.dumps(run_tier(args)))
+        return
+
+    tiers = [None] if args.recording else args.tiers
+    results = []
+    for tier in tiers:
+        command = [sys.executable, os.path.abspath(__file__), "--tier", str(tier or 0), "--cycles", str(args.cycles),
+                   "--change-ratio", str(args.change_ratio)]
+        if args.recording:
+            command += ["--recording", args.recording]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            sys.stderr.write(completed.stderr)
+            sys.exit(completed.returncode)
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=ROOT).stdout.strip() or None
+    except OSError:
+        revision = None
+    report = {
+        "benchmark": "pipeline",
+        "revision": revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "tiers": results
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
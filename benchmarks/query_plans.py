@@ -0,0 +1,143 @@
+"""
+Check that the read API's queries are answered from indexes.
+
+In one transaction that is rolled back at the end, seeds every snapshot
+table and prematch_odds with --matches synthetic rows each (one in
+--live-every of the snapshot rows live, fixtures spread over the next week
+across --leagues competitions) and live_market_prices from the live rows,
+ANALYZEs them, then EXPLAINs each query
+built by database.db_utils with representative parameters. Nothing is left
+behind, but run it against a development database:
+
+    python benchmarks/query_plans.py --matches 50000
+
+Prints the plan nodes of every query and exits non-zero if any of them
+reads a table with a sequential scan. --analyze runs the queries too and
+reports their execution times.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "aggregator"))
+
+from psycopg2 import sql
+from config import MARKET_INDEX_CONFIG, PREMATCH_CONFIG
+from database.db_utils import (
+    SPORT_TABLES, DatabaseManager, live_matches_query, market_filter_query, market_prices_query, match_query,
+    upcoming_matches_query, upcoming_summary_query
+)
+
+PREFIX = "plan-check-"
+# Varying prices in the sport's first indexed market, plus one of 50 other
+# markets per match for the GIN path
+ODDS = """
+    jsonb_build_object(
+        %(market)s, jsonb_build_object('Home', 1.01 + (i %% 997) / 50.0, 'Away', 1.01 + (i %% 991) / 50.0),
+        'Market ' || (i %% 50), jsonb_build_object('Yes', 1.01 + (i %% 13) / 4.0)
+    )
+"""
+
+def indexed_market(sport: str) -> str:
+    return (MARKET_INDEX_CONFIG["markets"].get(sport) or ["Match Winner"])[0]
+
+def seed(cur, matches: int, live_every: int, leagues: int):
+    for sport, table in SPORT_TABLES.items():
+        params = {"prefix": PREFIX, "leagues": leagues, "live_every": live_every, "matches": matches,
+                  "market": indexed_market(sport), "sport": sport, "pattern": f"{PREFIX}%"}
+        cur.execute(sql.SQL("""
+            INSERT INTO {} (match_id, event_name, competition, status, odds_data, timestamp)
+            SELECT %(prefix)s || i, 'Event ' || i, 'League ' || (i %% %(leagues)s),
+                   CASE WHEN i %% %(live_every)s = 0 THEN 'Live' ELSE 'Ended' END,
+                   {}, NOW() - i * INTERVAL '1 second'
+            FROM generate_series(1, %(matches)s) AS i
+            ON CONFLICT (match_id) DO NOTHING
+        """).format(sql.Identifier(table), sql.SQL(ODDS)), params)
+        cur.execute(sql.SQL("""
+            INSERT INTO live_market_prices (sport, match_id, market, outcome, price)
+            SELECT %(sport)s, match_id, %(market)s, price.key, price.value::float8
+            FROM {}, jsonb_each_text(odds_data -> %(market)s) AS price
+            WHERE status = 'Live' AND match_id LIKE %(pattern)s
+            ON CONFLICT DO NOTHING
+        """).format(sql.Identifier(table)), params)
+        cur.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table)))
+    cur.execute("ANALYZE live_market_prices")
+    for sport in PREMATCH_CONFIG["leagues"]:
+        cur.execute(sql.SQL("""
+            INSERT INTO prematch_odds (sport, match_id, event_name, competition, start_time, odds_data)
+            SELECT %(sport)s, %(prefix)s || i, 'Fixture ' || i, 'League ' || (i %% %(leagues)s),
+                   NOW() + (i %% 10080) * INTERVAL '1 minute', {}
+            FROM generate_series(1, %(matches)s) AS i
+            ON CONFLICT (sport, match_id) DO NOTHING
+        """).format(sql.SQL(ODDS)), {"sport": sport, "prefix": PREFIX, "leagues": leagues, "matches": matches,
+                                      "market": indexed_market(sport)})
+    cur.execute("ANALYZE prematch_odds")
+
+def read_queries():
+    """(name, (query, params)) for every read the API makes"""
+    now = datetime.now(timezone.utc)
+    day = now + timedelta(hours=24)
+    for sport in SPORT_TABLES:
+        yield f"live {sport}", live_matches_query(sport)
+        yield f"match {sport}", match_query(sport, f"{PREFIX}42")
+        yield f"live {sport} by indexed market", market_filter_query(sport, indexed_market(sport), 3.0, 4.0)
+        yield f"live {sport} by market", market_filter_query(sport, "Market 7", 2.0)
+        yield f"live {sport} league by market", market_filter_query(sport, "Market 7", competition="League 7")
+        yield f"prices {sport}", market_prices_query(sport, indexed_market(sport), 3.0, limit=101)
+    for sport in PREMATCH_CONFIG["leagues"]:
+        yield f"upcoming {sport}", upcoming_matches_query(sport, day, limit=501)
+        yield f"upcoming {sport} league", upcoming_matches_query(sport, day, "League 7", limit=501)
+        yield f"upcoming {sport} next page", upcoming_matches_query(
+            sport, day, limit=501, after=(now + timedelta(hours=6), f"{PREFIX}360")
+        )
+    yield "upcoming summary", upcoming_summary_query(list(PREMATCH_CONFIG["leagues"]), day)
+
+def plan_nodes(plan: dict):
+    """Flatten a JSON plan into (node type, relation, index) tuples"""
+    yield plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name")
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=50000, help="synthetic rows per table and sport")
+    parser.add_argument("--live-every", type=int, default=20, help="one live match in this many")
+    parser.add_argument("--leagues", type=int, default=200)
+    parser.add_argument("--analyze", action="store_true", help="also execute the queries and time them")
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    db.init_schema()
+    explain = sql.SQL("EXPLAIN (ANALYZE, FORMAT JSON) " if args.analyze else "EXPLAIN (FORMAT JSON) ")
+    results = []
+    with db.pool.connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                seed(cur, args.matches, args.live_every, args.leagues)
+                for name, (query, params) in read_queries():
+                    cur.execute(explain + query, params)
+                    plan = cur.fetchone()["QUERY PLAN"][0]
+                    nodes = list(plan_nodes(plan["Plan"]))
+                    result = {
+                        "query": name,
+                        "nodes": [" ".join(part for part in node if part) for node in nodes],
+                        "cost": plan["Plan"]["Total Cost"],
+                        "indexed": not any(node_type == "Seq Scan" for node_type, _, _ in nodes)
+                    }
+                    if args.analyze:
+                        result["execution_ms"] = plan["Execution Time"]
+                    results.append(result)
+        finally:
+            conn.rollback()
+
+    print(json.dumps(results, indent=2))
+    failed = [result["query"] for result in results if not result["indexed"]]
+    if failed:
+        print(f"Sequential scans in: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Throughput against a provider quota: the shared RateLimiter in front of a fake provider.
+
+Serves a local HTTP server that answers at most --quota requests in any
+sliding second and 429 (Retry-After: 1) beyond that, then sends --requests
+requests from --threads threads through an HTTPClient whose limiter runs at
+--headroom of that quota: spacing requests exactly 1/quota apart leaves no
+room for network jitter in a sliding window. A third of the requests are
+event lists, a third live odds and a third prematch, so the report also
+shows the priorities' waits.
+
+    python benchmarks/rate_limit_test.py --quota 5 --requests 100 --threads 16
+
+Exits non-zero if the server sent any 429 or throughput fell below
+--min-ratio of the quota.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "aggregator"))
+
+from http_client import HTTPClient
+from rate_limiter import PRIORITY_EVENTS, PRIORITY_LIVE_ODDS, PRIORITY_PREMATCH, RateLimiter
+
+PRIORITIES = {"events": PRIORITY_EVENTS, "live_odds": PRIORITY_LIVE_ODDS, "prematch": PRIORITY_PREMATCH}
+
+def serve(quota: int):
+    """Fake provider enforcing quota requests per sliding second; returns (server, counters)"""
+    arrivals = deque()
+    counters = {"ok": 0, "throttled": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            now = time.monotonic()
+            with lock:
+                while arrivals and now - arrivals[0] >= 1.0:
+                    arrivals.popleft()
+                allowed = len(arrivals) < quota
+                if allowed:
+                    arrivals.append(now)
+                counters["ok" if allowed else "throttled"] += 1
+            body = b'{"results": []}' if allowed else b'{"error": "rate limited"}'
+            self.send_response(200 if allowed else 429)
+            if not allowed:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quota", type=int, default=5, help="requests per sliding second the server allows")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--headroom", type=float, default=0.95, help="limiter rate as a fraction of the quota")
+    parser.add_argument("--min-ratio", type=float, default=0.9, help="lowest acceptable throughput / quota")
+    args = parser.parse_args()
+
+    server, counters = serve(args.quota)
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/bet365/inplay"
+    client = HTTPClient("bet365")
+    # burst 1, as RATE_LIMITS recommends for sliding-window quotas
+    client.limiter = RateLimiter("fake", args.quota * args.headroom, 1)
+    kinds = list(PRIORITIES)
+    waits = {kind: [] for kind in kinds}
+    statuses = {}
+    lock = threading.Lock()
+
+    def send(index: int):
+        kind = kinds[index % len(kinds)]
+        started = time.perf_counter()
+        response = client.get(url, priority=PRIORITIES[kind])
+        with lock:
+            waits[kind].append(time.perf_counter() - started)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(send, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    # The bucket starts with one token, so the first request is free
+    throughput = (args.requests - 1) / elapsed
+    report = {
+        "quota_per_second": args.quota,
+        "requests": args.requests,
+        "duration_s": round(elapsed, 2),
+        "requests_per_second": round(throughput, 2),
+        "server_429s": counters["throttled"],
+        "statuses": statuses,
+        "mean_wait_s": {kind: round(sum(values) / len(values), 2) for kind, values in waits.items() if values},
+        "limiter": client.limiter.stats()
+    }
+    print(json.dumps(report, indent=2))
+    if counters["throttled"] or throughput < args.quota * args.min_ratio:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Open many concurrent Server-Sent Events subscribers against a local API.
+
+Each client is a coroutine on one event loop, so this script itself needs no
+thread per connection. Raise the open-file limit first (ulimit -n 65536):
+
+    python benchmarks/sse_load_test.py --clients 10000 --duration 120 \
+        --url "http://127.0.0.1:5001/api/v1/odds/stream?sport=soccer"
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+class Counters:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.events = 0
+        self.keepalives = 0
+        self.resyncs = 0
+        self.first_event_latency = []
+
+async def subscriber(url, deadline: float, counters: Counters):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    started = time.monotonic()
+    try:
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    except OSError:
+        counters.failed += 1
+        return
+
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    try:
+        status = await asyncio.wait_for(reader.readline(), deadline - time.monotonic())
+        if b" 200 " not in status:
+            counters.failed += 1
+            return
+        counters.connected += 1
+
+        got_first = False
+        while time.monotonic() < deadline:
+            line = await asyncio.wait_for(reader.readline(), deadline - time.monotonic())
+            if not line:
+                break
+            if line.startswith(b": keepalive"):
+                counters.keepalives += 1
+            elif line.startswith(b"event: resync"):
+                counters.resyncs += 1
+            elif line.startswith(b"data: "):
+                counters.events += 1
+                if not got_first:
+                    counters.first_event_latency.append(time.monotonic() - started)
+                    got_first = True
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def run(args):
+    counters = Counters()
+    deadline = time.monotonic() + args.duration
+    tasks = []
+    for _ in range(args.clients):
+        tasks.append(asyncio.create_task(subscriber(args.url, deadline, counters)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.clients)
+
+    while time.monotonic() < deadline:
+        await asyncio.sleep(5)
+        print(f"connected={counters.connected} failed={counters.failed} events={counters.events}", flush=True)
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = sorted(counters.first_event_latency)
+    print(json.dumps({
+        "clients": args.clients,
+        "connected": counters.connected,
+        "failed": counters.failed,
+        "events": counters.events,
+        "keepalives": counters.keepalives,
+        "resyncs": counters.resyncs,
+        "events_per_client": round(counters.events / counters.connected, 2) if counters.connected else 0,
+        "first_event_p50": latencies[len(latencies) // 2] if latencies else None,
+        "first_event_p95": latencies[int(len(latencies) * 0.95)] if latencies else None
+    }, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5001/api/v1/odds/stream?sport=soccer")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--ramp", type=float, default=10, help="seconds over which to open connections")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
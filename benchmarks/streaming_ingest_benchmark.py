@@ -0,0 +1,122 @@
+"""
+Peak memory and time-to-first-event: response.json() against streamed ingest.
+
+Serves a generated prematch event list (several MB) from a local HTTP server
+and feeds it to SoccerParser.parse_events both ways. "consume" counts events
+without keeping them, which isolates the decoder's own footprint; "parse"
+keeps the parsed events as the aggregator does.
+
+    python benchmarks/streaming_ingest_benchmark.py --events 50000
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator", "sports", "soccer"))
+
+from soccer_parser import SoccerParser
+from streaming import json_items
+
+def make_fixture(events: int) -> bytes:
+    return json.dumps([{
+        "id": str(3000000 + event),
+        "name": f"Home {event} v Away {event}",
+        "status": "Upcoming",
+        "home_score": None,
+        "away_score": None,
+        "home_team": f"Home {event}",
+        "away_team": f"Away {event}",
+        "league": f"League {event % 300}",
+        "time": "2024-06-01T18:45:00Z",
+        "venue": {"name": f"Stadium {event % 900}", "city": f"City {event % 500}"},
+        "extra": {"round": event % 38, "tags": ["prematch", "featured" if event % 10 == 0 else "standard"]}
+    } for event in range(events)]).encode()
+
+def serve(body: bytes) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def eager_items(session, url):
+    return session.get(url).json()
+
+def streamed_items(session, url):
+    return json_items(session.get(url, stream=True))
+
+def consume(session, url, fetch, keep: bool):
+    """Returns (event count, seconds to first event, total seconds)"""
+    started = time.perf_counter()
+    first = None
+    count = 0
+
+    def tap(items):
+        nonlocal first, count
+        for item in items:
+            if first is None:
+                first = time.perf_counter() - started
+            count += 1
+            yield item
+
+    items = tap(fetch(session, url))
+    if keep:
+        SoccerParser().parse_events(items)
+    else:
+        for _ in items:
+            pass
+    return count, first, time.perf_counter() - started
+
+def run(session, url, fetch, keep: bool):
+    # Timed without tracemalloc, whose per-allocation hook would skew it
+    count, first, total = consume(session, url, fetch, keep)
+    tracemalloc.start()
+    consume(session, url, fetch, keep)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "events": count,
+        "time_to_first_event_ms": round(first * 1000, 2),
+        "total_ms": round(total * 1000, 1),
+        "peak_mb": round(peak / 2 ** 20, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50000)
+    args = parser.parse_args()
+
+    body = make_fixture(args.events)
+    server = serve(body)
+    url = f"http://127.0.0.1:{server.server_address[1]}/get_prematch_events/soccer"
+    session = requests.Session()
+
+    results = {"payload_mb": round(len(body) / 2 ** 20, 2)}
+    for mode, keep in (("consume", False), ("parse", True)):
+        results[mode] = {
+            "json": run(session, url, eager_items, keep),
+            "streamed": run(session, url, streamed_items, keep)
+        }
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cross-provider tennis matching: speed and accuracy of the blocking resolver.
+
+Generates the same matches as both providers would report them (full names
+and ISO times on one side, "Surname F." and epoch times on the other, with
+players sometimes swapped and start times skewed), plus events only one
+provider has, then times TennisEventResolver.resolve.
+
+    python benchmarks/tennis_resolver_benchmark.py --matches 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator", "sports", "tennis"))
+
+from models import Event
+from tennis_resolver import TennisEventResolver
+
+FIRST = ["Novak", "Carlos", "Daniil", "Jannik", "Alexander", "Andrey", "Holger", "Casper", "Taylor", "Hubert",
+         "Iga", "Aryna", "Coco", "Elena", "Jessica", "Ons", "Maria", "Karolina", "Petra", "Barbora"]
+LAST = ["Djokovic", "Alcaraz", "Medvedev", "Sinner", "Zverev", "Rublev", "Rune", "Ruud", "Fritz", "Hurkacz",
+        "Swiatek", "Sabalenka", "Gauff", "Rybakina", "Pegula", "Jabeur", "Sakkari", "Muchova", "Kvitova", "Krejcikova",
+        "Martinez", "Garcia", "Lopez", "Silva", "Novak", "Popescu", "Nagy", "Kowalski", "Horvat", "Jovanovic"]
+
+def player(rng):
+    return f"{rng.choice(FIRST)} {rng.choice(LAST)}{rng.randint(1, 60)}"
+
+def abbreviated(name):
+    first, last = name.split(" ", 1)
+    return f"{last} {first[0]}."
+
+def make_events(matches: int, only_each: int, seed: int = 5):
+    rng = random.Random(seed)
+    day = datetime(2024, 6, 1, tzinfo=timezone.utc).timestamp()
+    primary, secondary, truth = [], [], {}
+    for match in range(matches + only_each * 2):
+        home, away = player(rng), player(rng)
+        start = day + rng.randint(0, 86400 // 900) * 900
+        in_primary = match < matches or match < matches + only_each
+        in_secondary = match < matches or match >= matches + only_each
+        if in_primary:
+            primary.append(Event(f"r{match}", "tennis", home=home, away=away, competition="ATP Halle",
+                                 start_time=datetime.fromtimestamp(start, timezone.utc).isoformat()))
+        if in_secondary:
+            sides = (abbreviated(away), abbreviated(home)) if rng.random() < 0.2 else (abbreviated(home), abbreviated(away))
+            secondary.append(Event(f"b{match}", "tennis", home=sides[0], away=sides[1], competition="Halle",
+                                   start_time=str(int(start + rng.randint(-600, 600)))))
+        if in_primary and in_secondary:
+            truth[f"r{match}"] = f"b{match}"
+    return primary, secondary, truth
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=5000, help="matches both providers report")
+    parser.add_argument("--only-each", type=int, default=500, help="matches only one provider reports")
+    args = parser.parse_args()
+
+    primary, secondary, truth = make_events(args.matches, args.only_each)
+    resolver = TennisEventResolver()
+    started = time.perf_counter()
+    resolved = resolver.resolve(primary, secondary)
+    elapsed = time.perf_counter() - started
+
+    found = {left.match_id: right.match_id for left, right in resolved if left is not None and right is not None}
+    correct = sum(1 for left, right in found.items() if truth.get(left) == right)
+    print(json.dumps({
+        "primary": len(primary),
+        "secondary": len(secondary),
+        "seconds": round(elapsed, 3),
+        "comparisons": resolver.last_comparisons,
+        "all_pairs": len(primary) * len(secondary),
+        "precision": round(correct / len(found), 4) if found else None,
+        "recall": round(correct / len(truth), 4) if truth else None
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()